@@ -6,6 +6,7 @@ import { getTerrainHeight } from './Terrain.js';
 const CELL_SIZE = 16;
 const MAX_SLIDE_ITERATIONS = 3;
 const PUSH_EPSILON = 0.001;
+const BVH_MAX_DEPTH = 64;
 
 const COLLIDER_AABB = 0;
 const COLLIDER_CYLINDER = 1;
@@ -15,6 +16,7 @@ const COLLIDER_TRIMESH = 3;
 // ── Module state ──
 const colliders = [];
 const spatialGrid = new Map();
+const bvhStack = new Uint32Array(BVH_MAX_DEPTH);
 
 // ── Spatial hash helpers ──
 
@@ -96,8 +98,67 @@ export function addOBBCollider(cx, cz, halfW, halfD, cosA, sinA, minY, maxY) {
   insertIntoGrid(index, cx - extentX, cz - extentZ, cx + extentX, cz + extentZ);
 }
 
-export function addTrimeshCollider(tris, minY, maxY, tris3D) {
+// ── Trimesh BVH ──
+// links come from the collision pack (tools/collision_pack.py): per node
+// (first triangle, count) for leaves and (right child, 0) for interior nodes;
+// node i's left child is i + 1. Triangles are stored in leaf order, so the
+// world-space tris array built from the pack lines up with the leaf ranges.
+
+function computeBVHBounds(links, tris) {
+  const numNodes = links.length / 2;
+  const bounds = new Float32Array(numNodes * 4); // minX, minZ, maxX, maxZ per node
+  // Children always follow their parent, so a reverse pass sees children first
+  for (let n = numNodes - 1; n >= 0; n--) {
+    const o = n * 4;
+    const count = links[n * 2 + 1];
+    if (count > 0) {
+      let minX = Infinity, maxX = -Infinity;
+      let minZ = Infinity, maxZ = -Infinity;
+      const end = links[n * 2] + count;
+      for (let t = links[n * 2]; t < end; t++) {
+        const to = t * 6;
+        const tMinX = Math.min(tris[to], tris[to + 2], tris[to + 4]);
+        const tMaxX = Math.max(tris[to], tris[to + 2], tris[to + 4]);
+        const tMinZ = Math.min(tris[to + 1], tris[to + 3], tris[to + 5]);
+        const tMaxZ = Math.max(tris[to + 1], tris[to + 3], tris[to + 5]);
+        // Pad by the point-in-triangle edge tolerance of getCollisionHeightAt
+        const pad = 0.03 * Math.max(tMaxX - tMinX, tMaxZ - tMinZ);
+        if (tMinX - pad < minX) minX = tMinX - pad;
+        if (tMaxX + pad > maxX) maxX = tMaxX + pad;
+        if (tMinZ - pad < minZ) minZ = tMinZ - pad;
+        if (tMaxZ + pad > maxZ) maxZ = tMaxZ + pad;
+      }
+      bounds[o] = minX; bounds[o + 1] = minZ; bounds[o + 2] = maxX; bounds[o + 3] = maxZ;
+    } else {
+      const l = (n + 1) * 4, r = links[n * 2] * 4;
+      bounds[o] = Math.min(bounds[l], bounds[r]);
+      bounds[o + 1] = Math.min(bounds[l + 1], bounds[r + 1]);
+      bounds[o + 2] = Math.max(bounds[l + 2], bounds[r + 2]);
+      bounds[o + 3] = Math.max(bounds[l + 3], bounds[r + 3]);
+    }
+  }
+  return bounds;
+}
+
+/**
+ * Register a triangle-mesh collider.
+ * @param {Float32Array} tris - World XZ triangles (ax,az, bx,bz, cx,cz per triangle)
+ * @param {Float32Array} [tris3D] - World 3D triangles (9 floats each) for floor queries
+ * @param {Uint32Array} [bvhLinks] - BVH node links from the collision pack
+ * @param {Float32Array} [bvhBounds] - World XZ node bounds (computed from tris if omitted)
+ */
+export function addTrimeshCollider(tris, minY, maxY, tris3D, bvhLinks, bvhBounds) {
   const index = colliders.length;
+  const bvh = bvhLinks && bvhLinks.length > 0
+    ? { links: bvhLinks, bounds: bvhBounds || computeBVHBounds(bvhLinks, tris) }
+    : null;
+  colliders.push({ type: COLLIDER_TRIMESH, tris, minY, maxY, tris3D: tris3D || null, bvh });
+  if (bvh) {
+    // Root node bounds cover every triangle
+    insertIntoGrid(index, bvh.bounds[0], bvh.bounds[1], bvh.bounds[2], bvh.bounds[3]);
+    return;
+  }
+
   // Compute XZ AABB from triangle vertices for spatial grid
   let minX = Infinity, maxX = -Infinity;
   let minZ = Infinity, maxZ = -Infinity;
@@ -107,7 +168,6 @@ export function addTrimeshCollider(tris, minY, maxY, tris3D) {
     if (tris[i + 1] < minZ) minZ = tris[i + 1];
     if (tris[i + 1] > maxZ) maxZ = tris[i + 1];
   }
-  colliders.push({ type: COLLIDER_TRIMESH, tris, minY, maxY, tris3D: tris3D || null });
   insertIntoGrid(index, minX, minZ, maxX, maxZ);
 }
 
@@ -228,6 +288,9 @@ function testCircleVsTriangle(px, pz, radius, ax, az, bx, bz, cx, cz) {
     if (dSq < minDistSq) { minDistSq = dSq; closestX = cpx; closestZ = cpz; }
   }
 
+  // All three corners share one XZ point (vertical sliver) — nothing to push against
+  if (minDistSq === Infinity) return null;
+
   // Check if center is inside triangle (cross product winding test)
   const d1 = (bx - ax) * (pz - az) - (bz - az) * (px - ax);
   const d2 = (cx - bx) * (pz - bz) - (cz - bz) * (px - bx);
@@ -257,11 +320,9 @@ function testCircleVsTriangle(px, pz, radius, ax, az, bx, bz, cx, cz) {
   };
 }
 
-function testCylinderVsTrimesh(px, pz, pRadius, tris, tris3D) {
-  let deepest = null;
-  let deepestDepth = 0;
-  const numTris = tris.length / 6;
-  for (let t = 0; t < numTris; t++) {
+function testTrimeshRange(px, pz, pRadius, tris, tris3D, start, end, deepest) {
+  let deepestDepth = deepest ? deepest.depth : 0;
+  for (let t = start; t < end; t++) {
     // Skip walkable (floor) triangles — they handle vertical collision only.
     // Without this, standing on top of an object triggers XZ push-out from
     // the floor surface triangles, sliding the player off.
@@ -285,6 +346,31 @@ function testCylinderVsTrimesh(px, pz, pRadius, tris, tris3D) {
   return deepest;
 }
 
+function testCylinderVsTrimesh(px, pz, pRadius, tris, tris3D, bvh) {
+  if (!bvh) return testTrimeshRange(px, pz, pRadius, tris, tris3D, 0, tris.length / 6, null);
+
+  // Only test triangles in leaves whose XZ bounds overlap the player circle's box
+  const { links, bounds } = bvh;
+  let deepest = null;
+  let sp = 0;
+  bvhStack[sp++] = 0;
+  while (sp > 0) {
+    const n = bvhStack[--sp];
+    const o = n * 4;
+    if (px + pRadius < bounds[o] || px - pRadius > bounds[o + 2] ||
+        pz + pRadius < bounds[o + 1] || pz - pRadius > bounds[o + 3]) continue;
+    const count = links[n * 2 + 1];
+    if (count > 0) {
+      const first = links[n * 2];
+      deepest = testTrimeshRange(px, pz, pRadius, tris, tris3D, first, first + count, deepest);
+    } else {
+      bvhStack[sp++] = links[n * 2];
+      bvhStack[sp++] = n + 1;
+    }
+  }
+  return deepest;
+}
+
 // ── Movement resolution ──
 
 export function resolveMovement(startX, startZ, endX, endZ, playerY, grounded = true) {
@@ -329,7 +415,7 @@ export function resolveMovement(startX, startZ, endX, endZ, playerY, grounded =
       } else if (c.type === COLLIDER_OBB) {
         hit = testCylinderVsOBB(posX, posZ, PLAYER_RADIUS, c.cx, c.cz, c.halfW, c.halfD, c.cosA, c.sinA);
       } else if (c.type === COLLIDER_TRIMESH) {
-        hit = testCylinderVsTrimesh(posX, posZ, PLAYER_RADIUS, c.tris, c.tris3D);
+        hit = testCylinderVsTrimesh(posX, posZ, PLAYER_RADIUS, c.tris, c.tris3D, c.bvh);
       } else {
         hit = testCylinderVsCylinder(posX, posZ, PLAYER_RADIUS, c.cx, c.cz, c.radius);
       }
@@ -357,7 +443,7 @@ export function resolveMovement(startX, startZ, endX, endZ, playerY, grounded =
           let sh;
           if (sc.type === COLLIDER_AABB) sh = testCylinderVsAABB(startX, startZ, PLAYER_RADIUS, sc.minX, sc.minZ, sc.maxX, sc.maxZ);
           else if (sc.type === COLLIDER_OBB) sh = testCylinderVsOBB(startX, startZ, PLAYER_RADIUS, sc.cx, sc.cz, sc.halfW, sc.halfD, sc.cosA, sc.sinA);
-          else if (sc.type === COLLIDER_TRIMESH) sh = testCylinderVsTrimesh(startX, startZ, PLAYER_RADIUS, sc.tris, sc.tris3D);
+          else if (sc.type === COLLIDER_TRIMESH) sh = testCylinderVsTrimesh(startX, startZ, PLAYER_RADIUS, sc.tris, sc.tris3D, sc.bvh);
           else sh = testCylinderVsCylinder(startX, startZ, PLAYER_RADIUS, sc.cx, sc.cz, sc.radius);
           if (sh && sh.depth > PUSH_EPSILON) { startClear = false; break; }
         }
@@ -383,6 +469,58 @@ export function resolveMovement(startX, startZ, endX, endZ, playerY, grounded =
 const MIN_WALKABLE_NORMAL_Y = 0.574; // cos(55°) — WoW's walkable slope limit (55° from horizontal)
 const MIN_WALKABLE_NORMAL_Y_SQ = MIN_WALKABLE_NORMAL_Y * MIN_WALKABLE_NORMAL_Y;
 
+// Highest walkable surface at (px, pz) among tris3D[start..end), at most maxAllowedY
+function surfaceHeightInRange(t3, start, end, px, pz, maxAllowedY, maxSurfaceY) {
+  for (let t = start; t < end; t++) {
+    const o = t * 9;
+    const ax = t3[o],   ay = t3[o+1], az = t3[o+2];
+    const bx = t3[o+3], by = t3[o+4], bz = t3[o+5];
+    const cx = t3[o+6], cy = t3[o+7], cz = t3[o+8];
+
+    // Surface normal via cross product (e1 × e2)
+    const e1x = bx - ax, e1y = by - ay, e1z = bz - az;
+    const e2x = cx - ax, e2y = cy - ay, e2z = cz - az;
+    const ny = e1z * e2x - e1x * e2z;
+    const nx = e1y * e2z - e1z * e2y;
+    const nz = e1x * e2y - e1y * e2x;
+    const nLenSq = nx * nx + ny * ny + nz * nz;
+    if (nLenSq < 1e-10) continue;
+
+    // Only consider roughly horizontal surfaces (walkable floors)
+    const normalYSq = (ny * ny) / nLenSq;
+    if (normalYSq < MIN_WALKABLE_NORMAL_Y_SQ) continue;
+
+    // Point-in-triangle test (XZ projection) using barycentric coordinates
+    const v0x = cx - ax, v0z = cz - az;
+    const v1x = bx - ax, v1z = bz - az;
+    const v2x = px - ax, v2z = pz - az;
+
+    const dot00 = v0x * v0x + v0z * v0z;
+    const dot01 = v0x * v1x + v0z * v1z;
+    const dot02 = v0x * v2x + v0z * v2z;
+    const dot11 = v1x * v1x + v1z * v1z;
+    const dot12 = v1x * v2x + v1z * v2z;
+
+    const denom = dot00 * dot11 - dot01 * dot01;
+    if (Math.abs(denom) < 1e-10) continue;
+    const inv = 1 / denom;
+
+    const u = (dot11 * dot02 - dot01 * dot12) * inv; // weight for C
+    const v = (dot00 * dot12 - dot01 * dot02) * inv; // weight for B
+
+    if (u < -0.01 || v < -0.01 || u + v > 1.01) continue; // Outside triangle (small epsilon for edges)
+
+    // Interpolate Y at player position
+    const w = 1 - u - v; // weight for A
+    const surfaceY = w * ay + v * by + u * cy;
+
+    if (surfaceY <= maxAllowedY && surfaceY > maxSurfaceY) {
+      maxSurfaceY = surfaceY;
+    }
+  }
+  return maxSurfaceY;
+}
+
 /**
  * Query the highest walkable collision surface at (px, pz) that the player
  * could stand on. Returns -Infinity if no surface found.
@@ -410,53 +548,25 @@ export function getCollisionHeightAt(px, pz, playerY, stepHeight) {
 
     if (c.type === COLLIDER_TRIMESH && c.tris3D) {
       // Test each 3D triangle for point-in-triangle (XZ) + Y interpolation
-      const t3 = c.tris3D;
-      const numTris = t3.length / 9;
-      for (let t = 0; t < numTris; t++) {
-        const o = t * 9;
-        const ax = t3[o],   ay = t3[o+1], az = t3[o+2];
-        const bx = t3[o+3], by = t3[o+4], bz = t3[o+5];
-        const cx = t3[o+6], cy = t3[o+7], cz = t3[o+8];
-
-        // Surface normal via cross product (e1 × e2)
-        const e1x = bx - ax, e1y = by - ay, e1z = bz - az;
-        const e2x = cx - ax, e2y = cy - ay, e2z = cz - az;
-        const ny = e1z * e2x - e1x * e2z;
-        const nx = e1y * e2z - e1z * e2y;
-        const nz = e1x * e2y - e1y * e2x;
-        const nLenSq = nx * nx + ny * ny + nz * nz;
-        if (nLenSq < 1e-10) continue;
-
-        // Only consider roughly horizontal surfaces (walkable floors)
-        const normalYSq = (ny * ny) / nLenSq;
-        if (normalYSq < MIN_WALKABLE_NORMAL_Y_SQ) continue;
-
-        // Point-in-triangle test (XZ projection) using barycentric coordinates
-        const v0x = cx - ax, v0z = cz - az;
-        const v1x = bx - ax, v1z = bz - az;
-        const v2x = px - ax, v2z = pz - az;
-
-        const dot00 = v0x * v0x + v0z * v0z;
-        const dot01 = v0x * v1x + v0z * v1z;
-        const dot02 = v0x * v2x + v0z * v2z;
-        const dot11 = v1x * v1x + v1z * v1z;
-        const dot12 = v1x * v2x + v1z * v2z;
-
-        const denom = dot00 * dot11 - dot01 * dot01;
-        if (Math.abs(denom) < 1e-10) continue;
-        const inv = 1 / denom;
-
-        const u = (dot11 * dot02 - dot01 * dot12) * inv; // weight for C
-        const v = (dot00 * dot12 - dot01 * dot02) * inv; // weight for B
-
-        if (u < -0.01 || v < -0.01 || u + v > 1.01) continue; // Outside triangle (small epsilon for edges)
-
-        // Interpolate Y at player position
-        const w = 1 - u - v; // weight for A
-        const surfaceY = w * ay + v * by + u * cy;
-
-        if (surfaceY <= maxAllowedY && surfaceY > maxSurfaceY) {
-          maxSurfaceY = surfaceY;
+      if (!c.bvh) {
+        maxSurfaceY = surfaceHeightInRange(c.tris3D, 0, c.tris3D.length / 9, px, pz, maxAllowedY, maxSurfaceY);
+      } else {
+        // Only leaves whose XZ bounds contain the query point
+        const { links, bounds } = c.bvh;
+        let sp = 0;
+        bvhStack[sp++] = 0;
+        while (sp > 0) {
+          const n = bvhStack[--sp];
+          const o = n * 4;
+          if (px < bounds[o] || px > bounds[o + 2] || pz < bounds[o + 1] || pz > bounds[o + 3]) continue;
+          const count = links[n * 2 + 1];
+          if (count > 0) {
+            const first = links[n * 2];
+            maxSurfaceY = surfaceHeightInRange(c.tris3D, first, first + count, px, pz, maxAllowedY, maxSurfaceY);
+          } else {
+            bvhStack[sp++] = links[n * 2];
+            bvhStack[sp++] = n + 1;
+          }
         }
       }
     } else if (c.type === COLLIDER_AABB) {
@@ -1,18 +1,23 @@
 import * as THREE from 'three';
 import { GLTFLoader } from 'three/addons/loaders/GLTFLoader.js';
+import { KTX2Loader } from 'three/addons/loaders/KTX2Loader.js';
+import { MeshoptDecoder } from 'three/addons/libs/meshopt_decoder.module.js';
 import { WORLD_SIZE } from '../../shared/constants.js';
-import { addOBBCollider, addTrimeshCollider, finalize as finalizeCollision } from './CollisionSystem.js';
+import { addCylinderCollider, addOBBCollider, addTrimeshCollider, finalize as finalizeCollision } from './CollisionSystem.js';
 
 // ── Module state ──
 let doodadData = null;
 let manifest = null;
 let collisionMeshes = null;
+let bakedCollision = null;
 const modelCache = new Map();
 const loadingModels = new Map();
 
 // ── Collision helpers ──
 
 function registerDoodadColliders(modelPath, instances) {
+  if (bakedCollision) return; // Already registered by registerBakedColliders()
+
   // Use Blizzard's actual M2 collision mesh triangles (extracted from MPQ)
   const meshData = collisionMeshes?.[modelPath];
   if (!meshData) return; // No collision data = non-collidable (bushes, birds, etc.)
@@ -22,8 +27,31 @@ function registerDoodadColliders(modelPath, instances) {
   if (!modelVerts || modelVerts.length < 9) return;
   if (!triIndices || triIndices.length < 3) return;
 
+  // Concave doodads no primitive fits (tools/collision_pack.py) keep their triangles
+  if (meshData.shape === 'trimesh') {
+    for (const d of instances) registerTrimeshCollider(modelPath, d);
+    return;
+  }
+
   const numVerts = modelVerts.length / 3;
-  const numTris = triIndices.length / 3;
+
+  // Cylinder doodads: axis through the centre of the model-space XZ bounds
+  let centerX = 0, centerY = 0, centerZ = 0;
+  if (meshData.shape === 'cylinder') {
+    let minX = Infinity, maxX = -Infinity, minY = Infinity, maxY = -Infinity, minZ = Infinity, maxZ = -Infinity;
+    for (let i = 0; i < numVerts; i++) {
+      const x = modelVerts[i * 3], y = modelVerts[i * 3 + 1], z = modelVerts[i * 3 + 2];
+      if (x < minX) minX = x;
+      if (x > maxX) maxX = x;
+      if (y < minY) minY = y;
+      if (y > maxY) maxY = y;
+      if (z < minZ) minZ = z;
+      if (z > maxZ) maxZ = z;
+    }
+    centerX = (minX + maxX) / 2;
+    centerY = (minY + maxY) / 2;
+    centerZ = (minZ + maxZ) / 2;
+  }
 
   const rotHelper = new THREE.Object3D();
   const v = new THREE.Vector3();
@@ -61,6 +89,21 @@ function registerDoodadColliders(modelPath, instances) {
 
     if (maxY - minY < 0.2) continue;
 
+    if (meshData.shape === 'cylinder') {
+      // Trunks, posts, barrels: vertical cylinder around the (possibly tilted) mesh
+      v.set(centerX * s, centerY * s, centerZ * s);
+      v.applyMatrix4(rotHelper.matrix);
+      const cx = v.x + d.x;
+      const cz = v.z + d.z;
+      let radiusSq = 0;
+      for (let i = 0; i < numVerts; i++) {
+        const dx = wx[i] - cx, dz = wz[i] - cz;
+        if (dx * dx + dz * dz > radiusSq) radiusSq = dx * dx + dz * dz;
+      }
+      addCylinderCollider(cx, cz, Math.sqrt(radiusSq), minY, maxY);
+      continue;
+    }
+
     // Doodads use OBB collision (flat top, solid walls, aligned to rotation).
     // OBB matches WoW's rotated bounding volume for M2 doodads.
     const rotYRad = (d.rotY || 0) * Math.PI / 180;
@@ -92,8 +135,11 @@ function registerDoodadColliders(modelPath, instances) {
   }
 }
 
-function registerWMOColliders(modelPath, wmo) {
-  // Use Blizzard's actual WMO collision mesh triangles (extracted from MPQ MOPY flags)
+function registerTrimeshCollider(modelPath, placement) {
+  if (bakedCollision) return; // Already registered by registerBakedColliders()
+
+  // Use Blizzard's actual collision mesh triangles (WMO: extracted from MPQ MOPY
+  // flags; also concave M2 doodads, placed the same way)
   const meshData = collisionMeshes?.[modelPath];
   if (!meshData) return;
 
@@ -105,13 +151,13 @@ function registerWMOColliders(modelPath, wmo) {
   const numVerts = modelVerts.length / 3;
   const numTris = triIndices.length / 3;
 
-  const s = wmo.scale || 1.0;
+  const s = placement.scale || 1.0;
 
   const rotHelper = new THREE.Object3D();
   rotHelper.rotation.set(
-    (wmo.rotX || 0) * Math.PI / 180,
-    (wmo.rotY || 0) * Math.PI / 180,
-    -(wmo.rotZ || 0) * Math.PI / 180,
+    (placement.rotX || 0) * Math.PI / 180,
+    (placement.rotY || 0) * Math.PI / 180,
+    -(placement.rotZ || 0) * Math.PI / 180,
     'YZX'
   );
   rotHelper.updateMatrix();
@@ -131,9 +177,9 @@ function registerWMOColliders(modelPath, wmo) {
       modelVerts[i * 3 + 2] * s
     );
     v.applyMatrix4(rotHelper.matrix);
-    wx[i] = v.x + wmo.x;
-    wy[i] = v.y + wmo.y;
-    wz[i] = v.z + wmo.z;
+    wx[i] = v.x + placement.x;
+    wy[i] = v.y + placement.y;
+    wz[i] = v.z + placement.z;
     if (wy[i] < minY) minY = wy[i];
     if (wy[i] > maxY) maxY = wy[i];
   }
@@ -161,25 +207,172 @@ function registerWMOColliders(modelPath, wmo) {
     tris3D[o + 6] = wx[i2]; tris3D[o + 7] = wy[i2]; tris3D[o + 8] = wz[i2];
   }
 
-  addTrimeshCollider(tris, minY, maxY, tris3D);
+  // Pack triangles are in BVH leaf order, so the world-space arrays match meshData.bvh
+  addTrimeshCollider(tris, minY, maxY, tris3D, meshData.bvh);
+}
+
+/**
+ * Map the binary collision pack (tools/collision_pack.py) to per-model
+ * { verts: Float32Array, tris: Uint16Array | Uint32Array, bvh: Uint32Array | null, shape }
+ * views over one buffer. bvh holds the mesh's BVH node links (see addTrimeshCollider);
+ * shape is the fitted doodad collider ('cylinder', 'box' or 'trimesh'; undefined → box).
+ * @param {Object} index - Parsed collision_index.json
+ * @param {ArrayBuffer} buffer - Contents of collision.bin
+ */
+export function decodeCollisionPack(index, buffer) {
+  const verts = new Float32Array(buffer, 0, index.vertexCount * 3);
+  const IndexArray = index.indexType === 'uint32' ? Uint32Array : Uint16Array;
+  const tris = new IndexArray(buffer, index.indexByteOffset, index.triangleCount * 3);
+  const links = index.nodeCount ? new Uint32Array(buffer, index.bvhByteOffset, index.nodeCount * 2) : null;
+
+  const shapes = index.shapes || {};
+  const meshes = {};
+  for (const [modelPath, entry] of Object.entries(index.models)) {
+    const [firstVertex, vertexCount, firstTri, triCount, firstNode = 0, nodeCount = 0] = entry;
+    meshes[modelPath] = {
+      verts: verts.subarray(firstVertex * 3, (firstVertex + vertexCount) * 3),
+      tris: tris.subarray(firstTri * 3, (firstTri + triCount) * 3),
+      bvh: links && nodeCount ? links.subarray(firstNode * 2, (firstNode + nodeCount) * 2) : null,
+      shape: shapes[modelPath],
+    };
+  }
+  return meshes;
+}
+
+function registerBakedColliders() {
+  // World-space colliders from bake_collision_world.py: no per-placement transforms
+  const { obbs, cylinders, trimeshes } = bakedCollision;
+  for (let o = 0; o < obbs.length; o += 8) {
+    addOBBCollider(obbs[o], obbs[o + 1], obbs[o + 2], obbs[o + 3],
+      obbs[o + 4], obbs[o + 5], obbs[o + 6], obbs[o + 7]);
+  }
+  for (let o = 0; o < cylinders.length; o += 5) {
+    addCylinderCollider(cylinders[o], cylinders[o + 1], cylinders[o + 2], cylinders[o + 3], cylinders[o + 4]);
+  }
+  for (const mesh of trimeshes) {
+    const t3 = mesh.tris3D;
+    const numTris = t3.length / 9;
+    const tris = new Float32Array(numTris * 6);
+    for (let t = 0; t < numTris; t++) {
+      const o = t * 9, o2 = t * 6;
+      tris[o2] = t3[o];         tris[o2 + 1] = t3[o + 2];
+      tris[o2 + 2] = t3[o + 3]; tris[o2 + 3] = t3[o + 5];
+      tris[o2 + 4] = t3[o + 6]; tris[o2 + 5] = t3[o + 8];
+    }
+    addTrimeshCollider(tris, mesh.minY, mesh.maxY, t3, mesh.bvhLinks, mesh.bvhBounds);
+  }
+}
+
+/**
+ * Map the baked world colliders (tools/bake_collision_world.py) to
+ * { obbs: Float32Array (8 floats per OBB), cylinders: Float32Array (5 floats
+ * per cylinder), trimeshes: [{ tris3D, bvhLinks, bvhBounds, minY, maxY }] }
+ * views over one buffer.
+ * @param {Object} index - Parsed collision_world.json
+ * @param {ArrayBuffer} buffer - Contents of collision_world.bin
+ */
+export function decodeCollisionWorld(index, buffer) {
+  // Out-of-range offsets would throw from the view constructors below, but
+  // subarray() clamps silently, so check the layout up front; loadEnvironment
+  // falls back to the per-model pack when this throws
+  const expectedBytes = index.bvhLinksByteOffset + index.nodeCount * 8;
+  if (buffer.byteLength !== expectedBytes) {
+    throw new Error(`collision_world.bin is ${buffer.byteLength} bytes, index expects ${expectedBytes}`);
+  }
+  for (const [firstTri, triCount, firstNode, nodeCount] of index.trimeshes) {
+    if (firstTri + triCount > index.triangleCount || firstNode + nodeCount > index.nodeCount) {
+      throw new Error(`collision_world.json trimesh at triangle ${firstTri} is out of range`);
+    }
+  }
+
+  const obbs = new Float32Array(buffer, index.obbByteOffset, index.obbCount * 8);
+  const cylinders = new Float32Array(buffer, index.cylinderByteOffset || 0, (index.cylinderCount || 0) * 5);
+  const tris3D = new Float32Array(buffer, index.tris3DByteOffset, index.triangleCount * 9);
+  const bounds = new Float32Array(buffer, index.bvhBoundsByteOffset, index.nodeCount * 4);
+  const links = new Uint32Array(buffer, index.bvhLinksByteOffset, index.nodeCount * 2);
+
+  const trimeshes = index.trimeshes.map(([firstTri, triCount, firstNode, nodeCount, minY, maxY]) => ({
+    tris3D: tris3D.subarray(firstTri * 9, (firstTri + triCount) * 9),
+    bvhLinks: links.subarray(firstNode * 2, (firstNode + nodeCount) * 2),
+    bvhBounds: bounds.subarray(firstNode * 4, (firstNode + nodeCount) * 4),
+    minY,
+    maxY,
+  }));
+  return { obbs, cylinders, trimeshes };
+}
+
+/**
+ * 32-bit FNV-1a of a file's text as 8 hex digits, matching content_hash() in
+ * tools/bake_collision_world.py. Used to tell whether the baked world
+ * colliders were made from the files loaded now.
+ * @param {string|null} text
+ */
+export function contentHash(text) {
+  if (text === null) return null;
+  const bytes = new TextEncoder().encode(text);
+  let h = 0x811c9dc5;
+  for (let i = 0; i < bytes.length; i++) {
+    h = Math.imul(h ^ bytes[i], 0x01000193);
+  }
+  return (h >>> 0).toString(16).padStart(8, '0');
 }
 
 /**
  * Async loader — call in startGame() alongside loadTerrain().
- * Loads doodad placement data and model manifest in parallel.
+ * Loads doodad placement data, model manifest and collision index in
+ * parallel, then the baked world colliders if they were made from exactly
+ * these files; otherwise the per-model collision pack.
  */
 export async function loadEnvironment() {
-  const [doodadResp, manifestResp, collisionResp] = await Promise.all([
+  const [doodadResp, manifestResp, worldIndexResp, packIndexResp] = await Promise.all([
     fetch('/assets/terrain/northshire_doodads.json'),
     fetch('/assets/models/doodad_manifest.json').catch(() => null),
-    fetch('/assets/models/collision_data.json').catch(() => null),
+    fetch('/assets/models/collision_world.json').catch(() => null),
+    fetch('/assets/models/collision_index.json').catch(() => null),
   ]);
-  doodadData = await doodadResp.json();
+  // Text first: the bake is checked against hashes of these exact files
+  const doodadText = await doodadResp.text();
+  doodadData = JSON.parse(doodadText);
+  let manifestText = null;
   if (manifestResp && manifestResp.ok) {
-    manifest = await manifestResp.json();
+    manifestText = await manifestResp.text();
+    manifest = JSON.parse(manifestText);
   }
-  if (collisionResp && collisionResp.ok) {
-    collisionMeshes = await collisionResp.json();
+  const packIndexText = packIndexResp && packIndexResp.ok ? await packIndexResp.text() : null;
+
+  if (worldIndexResp && worldIndexResp.ok && packIndexText !== null) {
+    const worldIndex = await worldIndexResp.json();
+    // A bake from other placements, models or collision meshes would put
+    // colliders where there is no geometry (collision_index.json hashes collision.bin)
+    const sources = worldIndex.sources || {};
+    if (sources.placements === contentHash(doodadText) &&
+        sources.manifest === contentHash(manifestText) &&
+        sources.collisionIndex === contentHash(packIndexText)) {
+      const worldBinResp = await fetch('/assets/models/collision_world.bin').catch(() => null);
+      if (worldBinResp && worldBinResp.ok) {
+        try {
+          bakedCollision = decodeCollisionWorld(worldIndex, await worldBinResp.arrayBuffer());
+          return;
+        } catch (e) {
+          console.warn('Baked world colliders are unreadable; using the per-model collision pack:', e);
+        }
+      }
+    } else {
+      console.warn('Baked world colliders are out of date; using the per-model collision pack');
+    }
+  }
+
+  const packBinResp = packIndexText !== null
+    ? await fetch('/assets/models/collision.bin').catch(() => null)
+    : null;
+  if (packBinResp && packBinResp.ok) {
+    collisionMeshes = decodeCollisionPack(JSON.parse(packIndexText), await packBinResp.arrayBuffer());
+  } else {
+    // Asset builds from before the collision pack only have collision_data.json
+    const collisionResp = await fetch('/assets/models/collision_data.json').catch(() => null);
+    if (collisionResp && collisionResp.ok) {
+      collisionMeshes = await collisionResp.json();
+    }
   }
 }
 
@@ -198,15 +391,28 @@ export function preloadEnvironmentModels(onProgress) {
     // Collect all unique model paths from the manifest
     const allModels = [];
 
-    // Add all doodad models
+    // Add all doodad models (baked ones are drawn from their cell GLBs instead)
+    const bakedModels = new Set(manifest.baked?.models || []);
     if (manifest.models) {
       for (const [modelPath, info] of Object.entries(manifest.models)) {
-        if (info.glb) {
+        if (bakedModels.has(modelPath)) continue;
+        const instanced = manifest.instanced?.[modelPath];
+        if (instanced && instanced.length > 0) {
+          // Pre-instanced GLBs replace the single-model GLB for placement
+          for (const entry of instanced) {
+            allModels.push({ type: 'doodad', glb: entry.glb, path: modelPath });
+          }
+        } else if (info.glb) {
           allModels.push({ type: 'doodad', glb: info.glb, path: modelPath });
         }
       }
     }
 
+    // Add merged static cells
+    for (const cell of manifest.baked?.cells || []) {
+      allModels.push({ type: 'cell', glb: cell.glb, path: cell.glb });
+    }
+
     // Add all WMO models
     if (manifest.wmos) {
       for (const [wmoPath, info] of Object.entries(manifest.wmos)) {
@@ -251,12 +457,79 @@ export function preloadEnvironmentModels(onProgress) {
 
 // ── GLB loader with caching ──
 
+// Textures extracted with --shared-textures live in content-addressed files
+// (assets/textures/<hash>.png) referenced by URI from many GLBs. This GLTFLoader
+// plugin hands every GLB the same THREE.Texture per file, so each image is
+// fetched, decoded and uploaded to the GPU once. Embedded images are untouched.
+// WebP and KTX2 textures point at their image from a texture extension; GLTFLoader
+// keys plugins by name, so an instance registered under that extension's name
+// replaces the built-in handler (which would load a copy per GLB).
+const sharedTextures = new Map();
+const EXT_TEXTURE_WEBP = 'EXT_texture_webp';
+const KHR_TEXTURE_BASISU = 'KHR_texture_basisu';
+
+class SharedTexturePlugin {
+  constructor(parser, extension = null) {
+    this.parser = parser;
+    this.extension = extension;
+    this.name = extension || 'shared_textures';
+  }
+
+  loadTexture(textureIndex) {
+    const { json } = this.parser;
+    const textureDef = json.textures[textureIndex];
+    const sourceIndex = this.extension
+      ? textureDef.extensions?.[this.extension]?.source
+      : textureDef.source;
+    if (sourceIndex === undefined) return null;
+    const loader = this.extension === KHR_TEXTURE_BASISU
+      ? this.parser.options.ktx2Loader
+      : this.parser.textureLoader;
+    const uri = json.images[sourceIndex].uri;
+    if (!uri) {
+      // Embedded image: load it as the replaced built-in handler would
+      return this.extension ? this.parser.loadTextureImage(textureIndex, sourceIndex, loader) : null;
+    }
+
+    const key = uri.split('/').pop();
+    if (!sharedTextures.has(key)) {
+      const promise = this.parser.loadTextureImage(textureIndex, sourceIndex, loader);
+      promise.catch(() => sharedTextures.delete(key));
+      sharedTextures.set(key, promise);
+    }
+    return sharedTextures.get(key);
+  }
+}
+
+// GLBs extracted with --texture-format ktx2 carry the BLP's DXT blocks as KTX2
+// images (KHR_texture_basisu) that are uploaded without transcoding. KTX2Loader
+// only needs to know which compressed formats the GPU supports; models preload
+// before the game renderer exists, so probe a scratch WebGL2 context instead.
+let probeGL;
+const gpuExtensions = {
+  has(name) {
+    if (probeGL === undefined) {
+      probeGL = document.createElement('canvas').getContext('webgl2');
+    }
+    return !!probeGL?.getExtension(name);
+  },
+};
+const ktx2Loader = new KTX2Loader().detectSupport({ extensions: gpuExtensions });
+
+// Meshopt decoder handles GLBs extracted with --meshopt (EXT_meshopt_compression)
+const gltfLoader = new GLTFLoader()
+  .setMeshoptDecoder(MeshoptDecoder)
+  .setKTX2Loader(ktx2Loader)
+  .register((parser) => new SharedTexturePlugin(parser))
+  .register((parser) => new SharedTexturePlugin(parser, EXT_TEXTURE_WEBP))
+  .register((parser) => new SharedTexturePlugin(parser, KHR_TEXTURE_BASISU));
+
 function loadGLB(url) {
   if (modelCache.has(url)) return Promise.resolve(modelCache.get(url));
   if (loadingModels.has(url)) return loadingModels.get(url);
 
   const promise = new Promise((resolve, reject) => {
-    new GLTFLoader().load(url, (gltf) => {
+    gltfLoader.load(url, (gltf) => {
       modelCache.set(url, gltf);
       loadingModels.delete(url);
       resolve(gltf);
@@ -360,7 +633,40 @@ function placeWMOFallback(group, wmo) {
 
 // ── Model-based placement ──
 
+async function placeInstancedModel(group, modelPath, instances, entries) {
+  // GLBs from build_instanced_doodads.py carry every placement of the model
+  // (EXT_mesh_gpu_instancing), so GLTFLoader already returns InstancedMeshes
+  const gltfs = await Promise.all(entries.map((entry) => loadGLB('/assets/models/' + entry.glb)));
+
+  try {
+    registerDoodadColliders(modelPath, instances);
+  } catch (e) {
+    // Collision registration failure shouldn't prevent visual placement
+  }
+
+  for (const gltf of gltfs) {
+    const model = gltf.scene.clone();
+    model.traverse((child) => {
+      if (child.isMesh) {
+        child.castShadow = true;
+        child.receiveShadow = true;
+      }
+    });
+    group.add(model);
+  }
+}
+
 async function loadAndPlaceModel(group, modelPath, instances) {
+  const instancedEntries = manifest?.instanced?.[modelPath];
+  if (instancedEntries && instancedEntries.length > 0) {
+    try {
+      await placeInstancedModel(group, modelPath, instances, instancedEntries);
+      return;
+    } catch (e) {
+      // Fall back to building InstancedMeshes from the model GLB
+    }
+  }
+
   const glbInfo = manifest?.models?.[modelPath];
 
   if (glbInfo) {
@@ -420,6 +726,23 @@ async function loadAndPlaceModel(group, modelPath, instances) {
   placeFallbackInstances(group, instances);
 }
 
+async function loadAndPlaceCell(group, cell) {
+  // Props baked into world space by bake_doodad_cells.py, one primitive per material
+  try {
+    const gltf = await loadGLB('/assets/models/' + cell.glb);
+    const model = gltf.scene.clone();
+    model.traverse((child) => {
+      if (child.isMesh) {
+        child.castShadow = true;
+        child.receiveShadow = true;
+      }
+    });
+    group.add(model);
+  } catch (e) {
+    console.warn(`Failed to load baked cell ${cell.glb}:`, e);
+  }
+}
+
 async function loadAndPlaceWMO(group, wmo) {
   const halfWorld = WORLD_SIZE / 2;
   if (Math.abs(wmo.x) > halfWorld || Math.abs(wmo.z) > halfWorld) return;
@@ -433,7 +756,7 @@ async function loadAndPlaceWMO(group, wmo) {
 
       // Register collision from WMO's actual MOPY-flagged triangles
       try {
-        registerWMOColliders(wmo.model, wmo);
+        registerTrimeshCollider(wmo.model, wmo);
       } catch (e) {
         // Collision registration failure shouldn't prevent visual placement
       }
@@ -476,11 +799,33 @@ async function populateEnvironment(group) {
     byModel[d.model].push(d);
   }
 
+  if (bakedCollision) {
+    try {
+      registerBakedColliders();
+    } catch (e) {
+      console.warn('Baked collision registration failed:', e);
+    }
+  }
+
   // Place all doodads (models are already preloaded, so this is instant)
+  const bakedModels = new Set(manifest?.baked?.models || []);
   for (const [modelPath, instances] of Object.entries(byModel)) {
+    if (bakedModels.has(modelPath)) {
+      // Drawn by the baked cell GLBs; only collision is per placement
+      try {
+        registerDoodadColliders(modelPath, instances);
+      } catch (e) {
+        // Collision registration failure shouldn't prevent visual placement
+      }
+      continue;
+    }
     loadAndPlaceModel(group, modelPath, instances);
   }
 
+  for (const cell of manifest?.baked?.cells || []) {
+    loadAndPlaceCell(group, cell);
+  }
+
   // Place all WMOs (also preloaded)
   for (const wmo of doodadData.wmos) {
     loadAndPlaceWMO(group, wmo);
@@ -241,6 +241,86 @@ describe('CollisionSystem — Trimesh', () => {
   });
 });
 
+// ── Trimesh BVH (collision pack node links) ──
+
+describe('CollisionSystem — Trimesh BVH', () => {
+  // Two stacked modules: brute-force colliders and BVH-backed colliders
+  let brute, bvh;
+
+  beforeEach(async () => {
+    brute = await freshModule();
+    bvh = await freshModule();
+  });
+
+  // Stepped floor of n x n cells (2 tris each) with a slope in X, as world XZ + 3D arrays
+  function steppedFloor(n, size) {
+    const tris = [], tris3D = [];
+    for (let i = 0; i < n; i++) {
+      for (let j = 0; j < n; j++) {
+        const x0 = i * size, z0 = j * size, x1 = x0 + size, z1 = z0 + size;
+        const y0 = x0 * 0.3, y1 = x1 * 0.3;
+        tris.push(x0, z0, x1, z0, x1, z1, x0, z0, x1, z1, x0, z1);
+        tris3D.push(x0, y0, z0, x1, y1, z0, x1, y1, z1, x0, y0, z0, x1, y1, z1, x0, y0, z1);
+      }
+    }
+    return { tris: new Float32Array(tris), tris3D: new Float32Array(tris3D) };
+  }
+
+  // Node links in the collision pack layout: halve the triangle range until <= leafSize
+  function buildLinks(numTris, leafSize) {
+    const links = [];
+    function build(start, end) {
+      const node = links.length / 2;
+      links.push(start, end - start);
+      if (end - start <= leafSize) return node;
+      const mid = start + ((end - start) >> 1);
+      build(start, mid);
+      links[node * 2] = build(mid, end);
+      links[node * 2 + 1] = 0;
+      return node;
+    }
+    build(0, numTris);
+    return new Uint32Array(links);
+  }
+
+  it('matches brute-force movement and floor queries', () => {
+    const { tris, tris3D } = steppedFloor(12, 1.5);
+    brute.addTrimeshCollider(tris, 0, 6, tris3D);
+    bvh.addTrimeshCollider(tris, 0, 6, tris3D, buildLinks(tris.length / 6, 4));
+
+    for (let q = 0; q < 200; q++) {
+      const x = -1 + (q * 7.31) % 20, z = -1 + (q * 3.17) % 20;
+      const y = (q % 7) - 1;
+      expect(bvh.resolveMovement(x, z, x + 0.4, z - 0.3, y))
+        .toEqual(brute.resolveMovement(x, z, x + 0.4, z - 0.3, y));
+      expect(bvh.getCollisionHeightAt(x, z, y, 1.5)).toBe(brute.getCollisionHeightAt(x, z, y, 1.5));
+    }
+  });
+
+  it('stores world-space node bounds with the collider', () => {
+    const tris = new Float32Array([
+      0, 0, 1, 0, 1, 1,
+      10, 10, 11, 10, 11, 11,
+    ]);
+    bvh.addTrimeshCollider(tris, 0, 2, null, new Uint32Array([2, 0, 0, 1, 1, 1]));
+    const { bounds } = bvh.getColliders()[0].bvh;
+    expect(bounds.length).toBe(12);
+    // Root covers both leaves
+    expect(bounds[0]).toBeLessThanOrEqual(0);
+    expect(bounds[2]).toBeGreaterThanOrEqual(11);
+    // A query next to the second triangle still collides
+    const result = bvh.resolveMovement(12, 10.5, 11.2, 10.5, 0);
+    expect(result.x).toBeGreaterThan(11.2);
+  });
+
+  it('ignores triangles whose corners share one XZ point', () => {
+    const tris = new Float32Array([5, 5, 5, 5, 5, 5]);
+    brute.addTrimeshCollider(tris, 0, 3);
+    const result = brute.resolveMovement(0, 0, 1, 1, 0);
+    expect(result).toEqual({ x: 1, z: 1 });
+  });
+});
+
 // ── Mixed collider types ──
 
 describe('CollisionSystem — Mixed', () => {
@@ -2,16 +2,30 @@ import { describe, it, expect, vi, beforeEach } from 'vitest';
 
 vi.mock('three', () => import('../__mocks__/three.js'));
 
-const { mockGLTFLoad } = vi.hoisted(() => ({
+const { mockGLTFLoad, gltfPlugins } = vi.hoisted(() => ({
   mockGLTFLoad: vi.fn(),
+  gltfPlugins: [],
 }));
 
 vi.mock('three/addons/loaders/GLTFLoader.js', () => ({
   GLTFLoader: class {
+    setMeshoptDecoder() { return this; }
+    setKTX2Loader() { return this; }
+    register(callback) { gltfPlugins.push(callback); return this; }
     load(...args) { mockGLTFLoad(...args); }
   },
 }));
 
+vi.mock('three/addons/loaders/KTX2Loader.js', () => ({
+  KTX2Loader: class {
+    detectSupport() { return this; }
+  },
+}));
+
+vi.mock('three/addons/libs/meshopt_decoder.module.js', () => ({
+  MeshoptDecoder: {},
+}));
+
 import {
   Scene, Group, Mesh, BoxGeometry, MeshStandardMaterial,
 } from '../__mocks__/three.js';
@@ -52,20 +66,126 @@ const MANIFEST_PAYLOAD = {
   },
 };
 
-function mockFetchWith(doodads, manifest, collisionData = null) {
+// Build collision_index.json + collision.bin contents like tools/collision_pack.py
+// (each model's BVH is a single leaf node)
+function makeCollisionPack(collisionData, indexType = 'uint16', shapes = {}) {
+  const entries = Object.entries(collisionData);
+  const vertexCount = entries.reduce((n, [, m]) => n + m.verts.length / 3, 0);
+  const triangleCount = entries.reduce((n, [, m]) => n + m.tris.length / 3, 0);
+  const nodeCount = entries.length;
+  const IndexArray = indexType === 'uint32' ? Uint32Array : Uint16Array;
+  const indexByteOffset = vertexCount * 12;
+  const indexBytes = triangleCount * 3 * IndexArray.BYTES_PER_ELEMENT;
+  const bvhByteOffset = indexByteOffset + indexBytes + (-indexBytes & 3);
+  const buffer = new ArrayBuffer(bvhByteOffset + nodeCount * 8);
+  const verts = new Float32Array(buffer, 0, vertexCount * 3);
+  const tris = new IndexArray(buffer, indexByteOffset, triangleCount * 3);
+  const links = new Uint32Array(buffer, bvhByteOffset, nodeCount * 2);
+  const models = {};
+  let v = 0, t = 0, n = 0;
+  for (const [path, mesh] of entries) {
+    verts.set(mesh.verts, v * 3);
+    tris.set(mesh.tris, t * 3);
+    links.set([0, mesh.tris.length / 3], n * 2);
+    models[path] = [v, mesh.verts.length / 3, t, mesh.tris.length / 3, n, 1];
+    v += mesh.verts.length / 3;
+    t += mesh.tris.length / 3;
+    n += 1;
+  }
+  return {
+    index: {
+      version: 2, indexType, vertexCount, triangleCount, indexByteOffset,
+      nodeCount, bvhByteOffset, models, shapes,
+    },
+    buffer,
+  };
+}
+
+// Build collision_world.json + collision_world.bin contents like
+// tools/bake_collision_world.py (each trimesh's BVH is a single leaf node)
+function makeCollisionWorld(sources, obbs, trimeshes, cylinders = []) {
+  const triangleCount = trimeshes.reduce((n, m) => n + m.tris3D.length / 9, 0);
+  const nodeCount = trimeshes.length;
+  const cylinderByteOffset = obbs.length * 32;
+  const tris3DByteOffset = cylinderByteOffset + cylinders.length * 20;
+  const bvhBoundsByteOffset = tris3DByteOffset + triangleCount * 36;
+  const bvhLinksByteOffset = bvhBoundsByteOffset + nodeCount * 16;
+  const buffer = new ArrayBuffer(bvhLinksByteOffset + nodeCount * 8);
+  new Float32Array(buffer, 0, obbs.length * 8).set(obbs.flat());
+  new Float32Array(buffer, cylinderByteOffset, cylinders.length * 5).set(cylinders.flat());
+  const tris3D = new Float32Array(buffer, tris3DByteOffset, triangleCount * 9);
+  const bounds = new Float32Array(buffer, bvhBoundsByteOffset, nodeCount * 4);
+  const links = new Uint32Array(buffer, bvhLinksByteOffset, nodeCount * 2);
+  const entries = [];
+  let t = 0;
+  trimeshes.forEach((mesh, n) => {
+    const count = mesh.tris3D.length / 9;
+    tris3D.set(mesh.tris3D, t * 9);
+    const xs = mesh.tris3D.filter((_, i) => i % 3 === 0);
+    const zs = mesh.tris3D.filter((_, i) => i % 3 === 2);
+    bounds.set([Math.min(...xs), Math.min(...zs), Math.max(...xs), Math.max(...zs)], n * 4);
+    links.set([0, count], n * 2);
+    entries.push([t, count, n, 1, mesh.minY, mesh.maxY]);
+    t += count;
+  });
+  return {
+    index: {
+      version: 3, sources, obbCount: obbs.length, cylinderCount: cylinders.length,
+      triangleCount, nodeCount, obbByteOffset: 0, cylinderByteOffset, tris3DByteOffset,
+      bvhBoundsByteOffset, bvhLinksByteOffset,
+      trimeshes: entries,
+    },
+    buffer,
+  };
+}
+
+// fetch() response for a JSON file (loadEnvironment hashes some files' text)
+function jsonResponse(data) {
+  return {
+    ok: true,
+    json: () => Promise.resolve(data),
+    text: () => Promise.resolve(JSON.stringify(data)),
+  };
+}
+
+function mockFetchWith(doodads, manifest, collisionData = null, collisionPack = null, collisionWorld = null) {
   global.fetch = vi.fn((url) => {
+    if (url.includes('collision_world.json')) {
+      if (collisionWorld) {
+        return Promise.resolve(jsonResponse(collisionWorld.index));
+      }
+      return Promise.resolve({ ok: false });
+    }
+    if (url.includes('collision_world.bin')) {
+      if (collisionWorld) {
+        return Promise.resolve({ ok: true, arrayBuffer: () => Promise.resolve(collisionWorld.buffer) });
+      }
+      return Promise.resolve({ ok: false });
+    }
     if (url.includes('northshire_doodads.json')) {
-      return Promise.resolve({ ok: true, json: () => Promise.resolve(doodads) });
+      return Promise.resolve(jsonResponse(doodads));
     }
     if (url.includes('doodad_manifest.json')) {
       if (manifest) {
-        return Promise.resolve({ ok: true, json: () => Promise.resolve(manifest) });
+        return Promise.resolve(jsonResponse(manifest));
+      }
+      return Promise.resolve({ ok: false });
+    }
+    if (url.includes('collision_index.json')) {
+      if (collisionPack) {
+        return Promise.resolve(jsonResponse(collisionPack.index));
+      }
+      return Promise.resolve({ ok: false });
+    }
+    if (url.includes('collision.bin')) {
+      if (collisionPack) {
+        return Promise.resolve({ ok: true, arrayBuffer: () => Promise.resolve(collisionPack.buffer) });
       }
       return Promise.resolve({ ok: false });
     }
     if (url.includes('collision_data.json')) {
       if (collisionData) {
-        return Promise.resolve({ ok: true, json: () => Promise.resolve(collisionData) });
+        return Promise.resolve(jsonResponse(collisionData));
       }
       return Promise.resolve({ ok: false });
     }
@@ -112,9 +232,18 @@ describe('Environment', () => {
       await mod.loadEnvironment();
       expect(global.fetch).toHaveBeenCalledWith('/assets/terrain/northshire_doodads.json');
       expect(global.fetch).toHaveBeenCalledWith('/assets/models/doodad_manifest.json');
+      expect(global.fetch).toHaveBeenCalledWith('/assets/models/collision_index.json');
+      expect(global.fetch).toHaveBeenCalledWith('/assets/models/collision.bin');
+      // No pack → falls back to the JSON collision data
       expect(global.fetch).toHaveBeenCalledWith('/assets/models/collision_data.json');
     });
 
+    it('does not fetch collision_data.json when the collision pack loads', async () => {
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null, makeCollisionPack({}));
+      await mod.loadEnvironment();
+      expect(global.fetch).not.toHaveBeenCalledWith('/assets/models/collision_data.json');
+    });
+
     it('handles collision data fetch failure gracefully', async () => {
       mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null);
       await mod.loadEnvironment();
@@ -126,7 +255,7 @@ describe('Environment', () => {
     it('handles manifest fetch failure gracefully', async () => {
       global.fetch = vi.fn((url) => {
         if (url.includes('northshire_doodads.json')) {
-          return Promise.resolve({ ok: true, json: () => Promise.resolve(DOODAD_PAYLOAD) });
+          return Promise.resolve(jsonResponse(DOODAD_PAYLOAD));
         }
         return Promise.reject(new Error('Network error'));
       });
@@ -289,6 +418,140 @@ describe('Environment', () => {
     });
   });
 
+  // ── Pre-instanced doodads (EXT_mesh_gpu_instancing) ──
+
+  describe('pre-instanced doodads', () => {
+    const INSTANCED_MANIFEST = {
+      ...MANIFEST_PAYLOAD,
+      instanced: {
+        'trees/oak.m2': [
+          { glb: 'instanced/oak_7_8.glb', instances: 1, cell: [7, 8] },
+          { glb: 'instanced/oak_7_9.glb', instances: 1, cell: [7, 9] },
+        ],
+      },
+    };
+
+    beforeEach(async () => {
+      mockFetchWith(DOODAD_PAYLOAD, INSTANCED_MANIFEST);
+      await mod.loadEnvironment();
+    });
+
+    it('loads the instanced GLBs instead of building InstancedMeshes', async () => {
+      const group = await mod.createEnvironment();
+      await flushAsync();
+
+      const urls = mockGLTFLoad.mock.calls.map(c => c[0]);
+      expect(urls).toContain('/assets/models/instanced/oak_7_8.glb');
+      expect(urls).toContain('/assets/models/instanced/oak_7_9.glb');
+      expect(urls).not.toContain('/assets/models/doodads/oak.glb');
+      expect(group.children.find(c => c.count === 2)).toBeUndefined();
+    });
+
+    it('adds one cloned scene per instanced GLB with shadows', async () => {
+      const group = await mod.createEnvironment();
+      await flushAsync();
+
+      // 2 oak cells + abbey WMO
+      const clones = group.children.filter(
+        c => c.children !== undefined && c.count === undefined
+      );
+      expect(clones.length).toBe(3);
+      for (const clone of clones) {
+        const meshChild = clone.children.find(c => c.isMesh);
+        if (meshChild) {
+          expect(meshChild.castShadow).toBe(true);
+          expect(meshChild.receiveShadow).toBe(true);
+        }
+      }
+    });
+
+    it('preloads the instanced GLBs instead of the model GLB', async () => {
+      await mod.preloadEnvironmentModels();
+
+      const urls = mockGLTFLoad.mock.calls.map(c => c[0]);
+      expect(urls).toContain('/assets/models/instanced/oak_7_8.glb');
+      expect(urls).not.toContain('/assets/models/doodads/oak.glb');
+    });
+
+    it('falls back to the model GLB when an instanced GLB fails', async () => {
+      mockGLTFLoad.mockImplementation((url, onSuccess, onProgress, onError) => {
+        if (url.includes('instanced/')) {
+          onError(new Error('Instanced load failed'));
+        } else {
+          onSuccess({ scene: makeMockScene(1) });
+        }
+      });
+
+      const group = await mod.createEnvironment();
+      await flushAsync();
+
+      const oakMesh = group.children.find(c => c.count === 2);
+      expect(oakMesh).toBeDefined();
+    });
+  });
+
+  // ── Baked static cells ──
+
+  describe('baked doodad cells', () => {
+    const BAKED_MANIFEST = {
+      ...MANIFEST_PAYLOAD,
+      models: {
+        ...MANIFEST_PAYLOAD.models,
+        'rocks/boulder.m2': { glb: 'doodads/boulder.glb' },
+      },
+      baked: {
+        cellSize: 64,
+        models: ['rocks/boulder.m2'],
+        cells: [
+          { glb: 'cells/cell_12_12.glb', cell: [12, 12], instances: 1, primitives: 1 },
+        ],
+      },
+    };
+
+    beforeEach(async () => {
+      mockFetchWith(DOODAD_PAYLOAD, BAKED_MANIFEST);
+      await mod.loadEnvironment();
+    });
+
+    it('loads cell GLBs and skips the baked model GLB', async () => {
+      await mod.createEnvironment();
+      await flushAsync();
+
+      const urls = mockGLTFLoad.mock.calls.map(c => c[0]);
+      expect(urls).toContain('/assets/models/cells/cell_12_12.glb');
+      expect(urls).not.toContain('/assets/models/doodads/boulder.glb');
+    });
+
+    it('does not place baked models as instances or fallbacks', async () => {
+      const group = await mod.createEnvironment();
+      await flushAsync();
+
+      // Only oak (count=2) is instanced; boulder comes from the cell
+      const instancedMeshes = group.children.filter(c => c.count !== undefined);
+      expect(instancedMeshes.length).toBe(1);
+      expect(instancedMeshes[0].count).toBe(2);
+    });
+
+    it('adds the cell as a cloned scene with shadows', async () => {
+      const group = await mod.createEnvironment();
+      await flushAsync();
+
+      // Cell + abbey WMO
+      const clones = group.children.filter(
+        c => c.children !== undefined && c.count === undefined
+      );
+      expect(clones.length).toBe(2);
+    });
+
+    it('preloads cell GLBs instead of baked model GLBs', async () => {
+      await mod.preloadEnvironmentModels();
+
+      const urls = mockGLTFLoad.mock.calls.map(c => c[0]);
+      expect(urls).toContain('/assets/models/cells/cell_12_12.glb');
+      expect(urls).not.toContain('/assets/models/doodads/boulder.glb');
+    });
+  });
+
   // ── Rotation system ──
 
   describe('rotation handling', () => {
@@ -560,6 +823,178 @@ describe('Environment', () => {
       expect(obbColliders.length).toBe(2);
     });
 
+    it('registers the same colliders from the binary collision pack', async () => {
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null, makeCollisionPack(COLLISION_DATA));
+      await mod.loadEnvironment();
+      await mod.createEnvironment();
+      await flushAsync();
+
+      const collisionMod = await import('../../client/world/CollisionSystem.js');
+      expect(collisionMod.getStats().colliderCount).toBeGreaterThanOrEqual(3);
+      const obbColliders = collisionMod.getColliders().filter(c => c.halfW !== undefined);
+      expect(obbColliders.length).toBe(2);
+      // WMO trimesh carries the pack's BVH
+      const trimesh = collisionMod.getColliders().find(c => c.tris);
+      expect(trimesh.bvh.links.length).toBe(2);
+    });
+
+    it('registers fitted cylinder doodad colliders from the pack', async () => {
+      const pack = makeCollisionPack(COLLISION_DATA, 'uint16', { 'trees/oak.m2': 'cylinder' });
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null, pack);
+      await mod.loadEnvironment();
+      await mod.createEnvironment();
+      await flushAsync();
+
+      const collisionMod = await import('../../client/world/CollisionSystem.js');
+      const colliders = collisionMod.getColliders();
+      expect(colliders.filter(c => c.halfW !== undefined).length).toBe(0);
+      const cylinders = colliders.filter(c => c.radius !== undefined);
+      expect(cylinders.length).toBe(2);
+      // oak.m2 spans 2 x 2 around its centre; the second instance is scaled 0.8
+      expect(cylinders[0].radius).toBeCloseTo(Math.SQRT2, 4);
+      expect(cylinders[1].radius).toBeCloseTo(0.8 * Math.SQRT2, 4);
+    });
+
+    it('keeps trimesh colliders for doodads no primitive fits', async () => {
+      const pack = makeCollisionPack(COLLISION_DATA, 'uint16', { 'trees/oak.m2': 'trimesh' });
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null, pack);
+      await mod.loadEnvironment();
+      await mod.createEnvironment();
+      await flushAsync();
+
+      const collisionMod = await import('../../client/world/CollisionSystem.js');
+      const colliders = collisionMod.getColliders();
+      expect(colliders.filter(c => c.halfW !== undefined).length).toBe(0);
+      // Two oak placements + the abbey
+      expect(colliders.filter(c => c.tris).length).toBe(3);
+    });
+
+    it('decodes the collision pack into per-model typed-array views', () => {
+      for (const indexType of ['uint16', 'uint32']) {
+        const pack = makeCollisionPack(COLLISION_DATA, indexType);
+        const meshes = mod.decodeCollisionPack(pack.index, pack.buffer);
+        const abbey = meshes['buildings/abbey.wmo'];
+        expect(abbey.verts).toBeInstanceOf(Float32Array);
+        expect(abbey.tris).toBeInstanceOf(indexType === 'uint32' ? Uint32Array : Uint16Array);
+        expect(abbey.verts.buffer).toBe(pack.buffer);
+        expect(Array.from(abbey.verts)).toEqual(COLLISION_DATA['buildings/abbey.wmo'].verts);
+        expect(Array.from(abbey.tris)).toEqual(COLLISION_DATA['buildings/abbey.wmo'].tris);
+        expect(Array.from(meshes['trees/oak.m2'].tris)).toEqual(COLLISION_DATA['trees/oak.m2'].tris);
+        expect(Array.from(abbey.bvh)).toEqual([0, 2]);
+        expect(abbey.shape).toBeUndefined();
+      }
+      const pack = makeCollisionPack(COLLISION_DATA, 'uint16', { 'trees/oak.m2': 'cylinder' });
+      expect(mod.decodeCollisionPack(pack.index, pack.buffer)['trees/oak.m2'].shape).toBe('cylinder');
+    });
+
+    // Bake sources matching what mockFetchWith serves
+    const worldSources = (pack, doodads = DOODAD_PAYLOAD, manifest = MANIFEST_PAYLOAD) => ({
+      placements: mod.contentHash(JSON.stringify(doodads)),
+      manifest: mod.contentHash(JSON.stringify(manifest)),
+      collisionIndex: mod.contentHash(JSON.stringify(pack.index)),
+    });
+
+    const WORLD_TRIMESH = {
+      tris3D: [-10, 5, -10, 10, 5, -10, 10, 15, 10, -10, 5, -10, 10, 15, 10, -10, 15, 10],
+      minY: 5,
+      maxY: 15,
+    };
+    const WORLD_OBBS = [
+      [100, 200, 1, 1, 1, 0, 5, 8],
+      [300, 400, 0.8, 0.8, 0, 1, 5, 7.4],
+    ];
+
+    it('registers baked world colliders without fetching the collision pack', async () => {
+      const pack = makeCollisionPack(COLLISION_DATA);
+      const world = makeCollisionWorld(worldSources(pack), WORLD_OBBS, [WORLD_TRIMESH]);
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, COLLISION_DATA, pack, world);
+      await mod.loadEnvironment();
+      expect(global.fetch).not.toHaveBeenCalledWith('/assets/models/collision.bin');
+      expect(global.fetch).not.toHaveBeenCalledWith('/assets/models/collision_data.json');
+      await mod.createEnvironment();
+      await flushAsync();
+
+      const collisionMod = await import('../../client/world/CollisionSystem.js');
+      const obbColliders = collisionMod.getColliders().filter(c => c.halfW !== undefined);
+      expect(obbColliders.map(c => [c.cx, c.cz])).toEqual([[100, 200], [300, 400]]);
+      const trimeshes = collisionMod.getColliders().filter(c => c.tris);
+      expect(trimeshes.length).toBe(1);
+      // XZ triangles are derived from the baked 3D triangles
+      expect(Array.from(trimeshes[0].tris)).toEqual([-10, -10, 10, -10, 10, 10, -10, -10, 10, 10, -10, 10]);
+      expect(Array.from(trimeshes[0].bvh.bounds)).toEqual([-10, -10, 10, 10]);
+    });
+
+    it('ignores a baked world from another placement file', async () => {
+      const pack = makeCollisionPack(COLLISION_DATA);
+      // Same number of placements, one of them moved
+      const moved = { ...DOODAD_PAYLOAD, doodads: [{ ...DOODAD_PAYLOAD.doodads[0], x: 11 }, ...DOODAD_PAYLOAD.doodads.slice(1)] };
+      const world = makeCollisionWorld(worldSources(pack, moved), WORLD_OBBS, [WORLD_TRIMESH]);
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null, pack, world);
+      await mod.loadEnvironment();
+      expect(global.fetch).toHaveBeenCalledWith('/assets/models/collision_index.json');
+      await mod.createEnvironment();
+      await flushAsync();
+
+      const collisionMod = await import('../../client/world/CollisionSystem.js');
+      const obbColliders = collisionMod.getColliders().filter(c => c.halfW !== undefined);
+      // Per-placement OBBs from the pack, not the baked ones
+      expect(obbColliders.length).toBe(2);
+      expect(obbColliders.map(c => [c.cx, c.cz])).not.toContainEqual([100, 200]);
+    });
+
+    it('ignores a baked world made from another collision pack', async () => {
+      const pack = makeCollisionPack(COLLISION_DATA);
+      const refitted = makeCollisionPack(COLLISION_DATA, 'uint16', { 'trees/oak.m2': 'cylinder' });
+      const world = makeCollisionWorld(worldSources(refitted), WORLD_OBBS, [WORLD_TRIMESH]);
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null, pack, world);
+      await mod.loadEnvironment();
+      expect(global.fetch).not.toHaveBeenCalledWith('/assets/models/collision_world.bin');
+      expect(global.fetch).toHaveBeenCalledWith('/assets/models/collision.bin');
+    });
+
+    it('falls back to the collision pack when the baked world is truncated', async () => {
+      const pack = makeCollisionPack(COLLISION_DATA);
+      const world = makeCollisionWorld(worldSources(pack), WORLD_OBBS, [WORLD_TRIMESH]);
+      world.buffer = world.buffer.slice(0, world.buffer.byteLength - 8);
+      mockFetchWith(DOODAD_PAYLOAD, MANIFEST_PAYLOAD, null, pack, world);
+      await mod.loadEnvironment();
+      expect(global.fetch).toHaveBeenCalledWith('/assets/models/collision_world.bin');
+      expect(global.fetch).toHaveBeenCalledWith('/assets/models/collision.bin');
+      await mod.createEnvironment();
+      await flushAsync();
+
+      const collisionMod = await import('../../client/world/CollisionSystem.js');
+      const obbColliders = collisionMod.getColliders().filter(c => c.halfW !== undefined);
+      expect(obbColliders.length).toBe(2);
+      expect(obbColliders.map(c => [c.cx, c.cz])).not.toContainEqual([100, 200]);
+    });
+
+    it('rejects baked trimeshes outside the triangle range', () => {
+      const world = makeCollisionWorld({}, WORLD_OBBS, [WORLD_TRIMESH]);
+      world.index.trimeshes[0][1] += 1;
+      expect(() => mod.decodeCollisionWorld(world.index, world.buffer)).toThrow(/out of range/);
+    });
+
+    it('hashes file text like tools/bake_collision_world.py', () => {
+      expect(mod.contentHash('')).toBe('811c9dc5');
+      expect(mod.contentHash('a')).toBe('e40c292c');
+      expect(mod.contentHash(null)).toBeNull();
+    });
+
+    it('decodes the baked world into typed-array views', () => {
+      const world = makeCollisionWorld({}, WORLD_OBBS, [WORLD_TRIMESH], [[5, 6, 0.5, 5, 9]]);
+      const { obbs, cylinders, trimeshes } = mod.decodeCollisionWorld(world.index, world.buffer);
+      expect(obbs).toBeInstanceOf(Float32Array);
+      expect(obbs.buffer).toBe(world.buffer);
+      expect(Array.from(obbs.subarray(0, 8))).toEqual(WORLD_OBBS[0]);
+      expect(Array.from(cylinders)).toEqual([5, 6, 0.5, 5, 9]);
+      expect(trimeshes.length).toBe(1);
+      expect(Array.from(trimeshes[0].tris3D)).toEqual(WORLD_TRIMESH.tris3D);
+      expect(Array.from(trimeshes[0].bvhLinks)).toEqual([0, 2]);
+      expect(trimeshes[0].minY).toBe(5);
+      expect(trimeshes[0].maxY).toBe(15);
+    });
+
     it('does not crash when collision data is missing for a model', async () => {
       // Only provide collision data for oak, not for abbey
       const partialCollision = {
@@ -591,6 +1026,59 @@ describe('Environment', () => {
 
   // ── Lighting ──
 
+  describe('shared textures', () => {
+    // GLTFParser stand-in for one GLB's textures
+    function makeParser(textures, images) {
+      return {
+        json: { textures, images },
+        options: { ktx2Loader: 'ktx2' },
+        textureLoader: 'image',
+        loadTextureImage: vi.fn((textureIndex, sourceIndex, loader) =>
+          Promise.resolve({ image: images[sourceIndex].uri, loader })),
+      };
+    }
+
+    function pluginsFor(parser) {
+      return Object.fromEntries(gltfPlugins.slice(-3).map(cb => cb(parser)).map(p => [p.name, p]));
+    }
+
+    it('replaces the WebP and KTX2 texture extension handlers', () => {
+      const names = Object.keys(pluginsFor(makeParser([], [])));
+      expect(names).toEqual(['shared_textures', 'EXT_texture_webp', 'KHR_texture_basisu']);
+    });
+
+    it('shares extension images between GLBs by URI', async () => {
+      const textures = [
+        { extensions: { KHR_texture_basisu: { source: 0 } } },
+        { extensions: { EXT_texture_webp: { source: 1 } } },
+      ];
+      const images = [{ uri: '../textures/aa.ktx2' }, { uri: '../textures/bb.webp' }];
+      const first = makeParser(textures, images);
+      const second = makeParser(textures, images);
+
+      const ktx2 = pluginsFor(first).KHR_texture_basisu.loadTexture(0);
+      expect(pluginsFor(second).KHR_texture_basisu.loadTexture(0)).toBe(ktx2);
+      expect(await ktx2).toEqual({ image: '../textures/aa.ktx2', loader: 'ktx2' });
+      expect(second.loadTextureImage).not.toHaveBeenCalled();
+
+      const webp = pluginsFor(first).EXT_texture_webp.loadTexture(1);
+      expect(await webp).toEqual({ image: '../textures/bb.webp', loader: 'image' });
+      // Each plugin only answers for its own extension
+      expect(pluginsFor(first).shared_textures.loadTexture(1)).toBeNull();
+      expect(pluginsFor(first).EXT_texture_webp.loadTexture(0)).toBeNull();
+    });
+
+    it('loads embedded extension images per GLB', () => {
+      const textures = [{ extensions: { KHR_texture_basisu: { source: 0 } } }];
+      const images = [{ bufferView: 3, mimeType: 'image/ktx2' }];
+      const parser = makeParser(textures, images);
+      pluginsFor(parser).KHR_texture_basisu.loadTexture(0);
+      pluginsFor(parser).KHR_texture_basisu.loadTexture(0);
+      expect(parser.loadTextureImage).toHaveBeenCalledTimes(2);
+      expect(parser.loadTextureImage).toHaveBeenCalledWith(0, 0, 'ktx2');
+    });
+  });
+
   describe('createLighting', () => {
     it('adds 3 lights to the scene', () => {
       const scene = new Scene();
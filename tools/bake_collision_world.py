@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Bake world-space colliders from doodad/WMO placements and the collision pack.
+
+Runs after extract_terrain.py (northshire_doodads.json) and extract_doodads.py /
+extract_wmo.py (doodad_manifest.json + collision pack). At load the client
+otherwise transforms every placed model's collision mesh by its placement
+(instances x vertices) before inserting it into CollisionSystem's grid. This
+does that transform offline, exactly as Environment.js would:
+
+  - M2 doodads → one collider per placement of the shape the pack fitted
+                 (skipped if the transformed mesh is under 0.2 yards tall):
+                 an OBB (rotY-aligned box around the transformed collision
+                 mesh), a vertical cylinder around it, or a trimesh as below
+  - WMOs       → one world-space trimesh per placement, in the pack's BVH leaf
+                 order, with the BVH's world-space XZ node bounds
+
+Only placements the client would register are baked: inside the world bounds,
+and with a GLB in the manifest (or baked into cell GLBs, for doodads).
+
+Output (next to the collision pack):
+  collision_world.bin   — float32 OBBs (cx, cz, halfW, halfD, cosA, sinA,
+                          minY, maxY), float32 cylinders (cx, cz, radius, minY,
+                          maxY), float32 3D triangles (9 per triangle;
+                          the client copies out the XZ triangles), float32 BVH
+                          node bounds (minX, minZ, maxX, maxZ) and uint32 BVH
+                          node links (as in the collision pack)
+  collision_world.json  — {"version", "sources": {"placements", "manifest",
+                          "collisionIndex"} content hashes of the files the
+                          bake was made from (the client ignores a stale
+                          bake), "obbCount", "cylinderCount", "triangleCount",
+                          "nodeCount",
+                          byte offsets, "trimeshes": [[first triangle,
+                          triangle count, first node, node count, minY, maxY]]}
+
+Usage:
+    python bake_collision_world.py
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from build_instanced_doodads import DEFAULT_DOODAD_JSON, DEFAULT_OUTPUT_DIR, HALF_WORLD
+from collision_pack import COLLISION_INDEX_NAME, read_collision_arrays
+
+WORLD_NAME = "collision_world"
+WORLD_VERSION = 3
+
+MIN_COLLIDER_HEIGHT = 0.2  # flatter meshes get no collider (Environment.js)
+LEAF_BOUNDS_PAD = 0.03     # CollisionSystem computeBVHBounds: floor query edge tolerance
+
+
+def content_hash(data):
+    """
+    32-bit FNV-1a of data as 8 hex digits, the same as Environment.js
+    contentHash() computes over the fetched files.
+    """
+    h = 0x811C9DC5
+    for byte in data:
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return f"{h:08x}"
+
+
+def placement_matrices(placements):
+    """
+    (N, 3, 3) rotation matrices of the client's Euler (rotX, rotY, -rotZ)
+    degrees in 'YZX' order (THREE.Matrix4.makeRotationFromEuler).
+    """
+    angles = np.radians(np.array(
+        [[d.get("rotX") or 0, d.get("rotY") or 0, -(d.get("rotZ") or 0)] for d in placements],
+        dtype=np.float64))
+    a, c, e = np.cos(angles).T
+    b, d, f = np.sin(angles).T
+    ac, ad, bc, bd = a * c, a * d, b * c, b * d
+    return np.stack([
+        np.stack([c * e, bd - ac * f, bc * f + ad], axis=1),
+        np.stack([f, a * e, -b * e], axis=1),
+        np.stack([-d * e, ad * f + bc, ac - bd * f], axis=1),
+    ], axis=1)
+
+
+def world_vertices(verts, placements):
+    """(N, V, 3) float32 world positions of model verts for each placement."""
+    matrices = placement_matrices(placements)
+    scales = np.array([d.get("scale") or 1.0 for d in placements], dtype=np.float64)
+    translations = np.array([[d["x"], d["y"], d["z"]] for d in placements], dtype=np.float64)
+    rotated = np.einsum("nij,vj->nvi", matrices, verts.astype(np.float64)) * scales[:, None, None]
+    return (rotated + translations[:, None, :]).astype(np.float32)
+
+
+def doodad_obbs(verts, placements):
+    """(K, 8) OBB rows for the placements of one box doodad model (see module docstring)."""
+    world = world_vertices(verts, placements).astype(np.float64)
+    obbs = []
+    for d, w in zip(placements, world):
+        min_y, max_y = w[:, 1].min(), w[:, 1].max()
+        if max_y - min_y < MIN_COLLIDER_HEIGHT:
+            continue
+        rot_y = np.radians(d.get("rotY") or 0)
+        cos_a, sin_a = np.cos(rot_y), np.sin(rot_y)
+        rel_x = w[:, 0] - d["x"]
+        rel_z = w[:, 2] - d["z"]
+        local_x = cos_a * rel_x - sin_a * rel_z
+        local_z = sin_a * rel_x + cos_a * rel_z
+        local_cx = (local_x.min() + local_x.max()) / 2
+        local_cz = (local_z.min() + local_z.max()) / 2
+        obbs.append([
+            cos_a * local_cx + sin_a * local_cz + d["x"],
+            -sin_a * local_cx + cos_a * local_cz + d["z"],
+            (local_x.max() - local_x.min()) / 2,
+            (local_z.max() - local_z.min()) / 2,
+            cos_a, sin_a, min_y, max_y,
+        ])
+    return np.array(obbs, dtype=np.float32).reshape(-1, 8)
+
+
+def doodad_cylinders(verts, placements):
+    """
+    (K, 5) cylinder rows for the placements of one cylinder doodad model: the
+    axis through the centre of the model-space bounds, wide enough for every
+    transformed vertex (as Environment.js builds them).
+    """
+    verts = verts.astype(np.float64)
+    center = (verts.min(axis=0) + verts.max(axis=0)) / 2
+    world = world_vertices(verts, placements).astype(np.float64)
+    centers = world_vertices(center[None], placements)[:, 0].astype(np.float64)
+    cylinders = []
+    for w, c in zip(world, centers):
+        min_y, max_y = w[:, 1].min(), w[:, 1].max()
+        if max_y - min_y < MIN_COLLIDER_HEIGHT:
+            continue
+        radius = np.sqrt(((w[:, [0, 2]] - c[[0, 2]]) ** 2).sum(axis=1)).max()
+        cylinders.append([c[0], c[2], radius, min_y, max_y])
+    return np.array(cylinders, dtype=np.float32).reshape(-1, 5)
+
+
+def bvh_bounds(tris_xz, links):
+    """
+    (N, 4) float32 world XZ node bounds for BVH links, computed like the
+    client's computeBVHBounds (leaf boxes padded by the floor query tolerance).
+    """
+    tris_xz = tris_xz.astype(np.float64)
+    xs, zs = tris_xz[:, 0::2], tris_xz[:, 1::2]
+    pad = LEAF_BOUNDS_PAD * np.maximum(xs.max(axis=1) - xs.min(axis=1), zs.max(axis=1) - zs.min(axis=1))
+    tri_bounds = np.stack([xs.min(axis=1) - pad, zs.min(axis=1) - pad,
+                           xs.max(axis=1) + pad, zs.max(axis=1) + pad], axis=1).astype(np.float32)
+
+    bounds = np.zeros((len(links), 4), dtype=np.float32)
+    # Children follow their parent, so a reverse pass sees children first
+    for node in range(len(links) - 1, -1, -1):
+        first, count = links[node]
+        if count:
+            leaf = tri_bounds[first:first + count]
+            bounds[node, :2] = leaf[:, :2].min(axis=0)
+            bounds[node, 2:] = leaf[:, 2:].max(axis=0)
+        else:
+            left, right = bounds[node + 1], bounds[first]
+            bounds[node, :2] = np.minimum(left[:2], right[:2])
+            bounds[node, 2:] = np.maximum(left[2:], right[2:])
+    return bounds
+
+
+def placed_trimesh(verts, tris, links, placement):
+    """World-space (tris 3D (T, 9), node bounds, minY, maxY), or None if too flat."""
+    world = world_vertices(verts, [placement])[0]
+    min_y, max_y = float(world[:, 1].min()), float(world[:, 1].max())
+    if max_y - min_y < MIN_COLLIDER_HEIGHT:
+        return None
+    tris_3d = world[tris].reshape(-1, 9)
+    return tris_3d, bvh_bounds(tris_3d[:, [0, 2, 3, 5, 6, 8]], links), min_y, max_y
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake world-space colliders from placements")
+    parser.add_argument("--doodad-json", default=str(DEFAULT_DOODAD_JSON),
+                        help="Path to northshire_doodads.json")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR),
+                        help="Models directory containing doodad_manifest.json and the collision pack")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    print(f"Loading doodad data from {args.doodad_json}...")
+    # Raw bytes too: the bake records what it was made from, and the client
+    # only uses it while all three files hash the same (collision_index.json
+    # carries the hash of collision.bin)
+    doodad_bytes = Path(args.doodad_json).read_bytes()
+    manifest_bytes = (output_dir / "doodad_manifest.json").read_bytes()
+    collision_index_bytes = (output_dir / COLLISION_INDEX_NAME).read_bytes()
+    doodad_data = json.loads(doodad_bytes)
+    manifest = json.loads(manifest_bytes)
+    meshes = read_collision_arrays(output_dir)
+    shapes = json.loads(collision_index_bytes).get("shapes", {})
+
+    # Doodads the client places with a model, grouped by model in first-seen order
+    placed_models = {model for model, info in manifest.get("models", {}).items() if info.get("glb")}
+    placed_models |= set(manifest.get("instanced", {}))
+    placed_models |= set(manifest.get("baked", {}).get("models", []))
+    by_model = {}
+    for d in doodad_data["doodads"]:
+        if abs(d["x"]) > HALF_WORLD or abs(d["z"]) > HALF_WORLD:
+            continue
+        by_model.setdefault(d["model"], []).append(d)
+
+    trimeshes = []
+    parts = []
+    triangle_count = 0
+    node_count = 0
+
+    def add_trimesh(mesh, placement):
+        nonlocal triangle_count, node_count
+        baked = placed_trimesh(*mesh, placement)
+        if baked is None:
+            return
+        tris_3d, bounds, min_y, max_y = baked
+        trimeshes.append([triangle_count, len(tris_3d), node_count, len(bounds), min_y, max_y])
+        parts.append((tris_3d, bounds, mesh[2]))
+        triangle_count += len(tris_3d)
+        node_count += len(bounds)
+
+    obbs = []
+    cylinders = []
+    for model, placements in by_model.items():
+        mesh = meshes.get(model)
+        if model not in placed_models or mesh is None or len(mesh[0]) < 3 or len(mesh[1]) < 1:
+            continue
+        shape = shapes.get(model, "box")
+        if shape == "trimesh":
+            for d in placements:
+                add_trimesh(mesh, d)
+        elif shape == "cylinder":
+            cylinders.append(doodad_cylinders(mesh[0], placements))
+        else:
+            obbs.append(doodad_obbs(mesh[0], placements))
+    obbs = np.concatenate(obbs) if obbs else np.zeros((0, 8), dtype=np.float32)
+    cylinders = np.concatenate(cylinders) if cylinders else np.zeros((0, 5), dtype=np.float32)
+
+    # WMOs the client places with a model
+    wmo_models = {model for model, info in manifest.get("wmos", {}).items() if info.get("glb")}
+    for wmo in doodad_data["wmos"]:
+        if abs(wmo["x"]) > HALF_WORLD or abs(wmo["z"]) > HALF_WORLD:
+            continue
+        if wmo.get("sizeX", 0) > 2 * HALF_WORLD or wmo.get("sizeZ", 0) > 2 * HALF_WORLD:
+            continue
+        mesh = meshes.get(wmo["model"])
+        if wmo["model"] not in wmo_models or mesh is None or len(mesh[0]) < 3 or len(mesh[1]) < 1:
+            continue
+        add_trimesh(mesh, wmo)
+
+    def concat(index, dtype, width):
+        arrays = [part[index] for part in parts]
+        return np.concatenate(arrays).astype(dtype) if arrays else np.zeros((0, width), dtype=dtype)
+
+    blobs = [
+        ("obbByteOffset", obbs.astype("<f4")),
+        ("cylinderByteOffset", cylinders.astype("<f4")),
+        ("tris3DByteOffset", concat(0, "<f4", 9)),
+        ("bvhBoundsByteOffset", concat(1, "<f4", 4)),
+        ("bvhLinksByteOffset", concat(2, "<u4", 2)),
+    ]
+    index = {
+        "version": WORLD_VERSION,
+        "sources": {
+            "placements": content_hash(doodad_bytes),
+            "manifest": content_hash(manifest_bytes),
+            "collisionIndex": content_hash(collision_index_bytes),
+        },
+        "obbCount": len(obbs),
+        "cylinderCount": len(cylinders),
+        "triangleCount": triangle_count,
+        "nodeCount": node_count,
+    }
+    offset = 0
+    for key, blob in blobs:
+        index[key] = offset
+        offset += blob.nbytes  # every blob is 4-byte elements, so offsets stay aligned
+    index["trimeshes"] = trimeshes
+
+    bin_path = output_dir / f"{WORLD_NAME}.bin"
+    index_path = output_dir / f"{WORLD_NAME}.json"
+    with open(bin_path, "wb") as f:
+        for _, blob in blobs:
+            f.write(blob.tobytes())
+    with open(index_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    print("\n== Done ==")
+    print(f"  Doodad OBBs: {len(obbs)}")
+    print(f"  Doodad cylinders: {len(cylinders)}")
+    print(f"  Trimeshes: {len(trimeshes)} ({triangle_count} triangles, {node_count} BVH nodes)")
+    print(f"  Size: {(bin_path.stat().st_size + index_path.stat().st_size) / 1024:.1f} KB")
+    print(f"  Output: {index_path}, {bin_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Bake small, rarely repeated doodads into merged static meshes per world cell.
+
+Models that are placed only a few times gain nothing from instancing, but each
+copy still costs a draw call per primitive. This stage extracts those models
+(extract_single_doodad), applies every placement's world transform to the
+geometry and merges all baked props in a square cell (default 64×64 yards)
+that share a material into one primitive, so a cell costs one draw call per
+distinct material.
+
+Textures go through the shared texture store, so identical textures in
+different models resolve to the same image URI and their primitives merge.
+
+Writes <output-dir>/cells/cell_<column>_<row>.glb and records the index under
+"baked" in doodad_manifest.json: the cell size, the baked model paths (which
+the client then skips when placing doodads) and one entry per cell GLB with
+its bounds. Run after extract_doodads.py and build_instanced_doodads.py;
+models listed under "instanced" are never baked.
+
+Usage:
+    python bake_doodad_cells.py
+    python bake_doodad_cells.py --cell-size 128 --max-instances 2 --meshopt
+"""
+
+import argparse
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from extract_model import (
+    StormLib, MPQ_LOAD_ORDER, STORMLIB_DLL, add_texture_codec_args, texture_codec_from_args,
+)
+from extract_doodads import (
+    MPQArchivePool, extract_single_doodad, DEFAULT_DATA_DIR, DEFAULT_DOODAD_JSON,
+    DEFAULT_OUTPUT_DIR, DEFAULT_TEXTURE_DIR,
+)
+from build_instanced_doodads import placement_transforms, cell_of, HALF_WORLD
+from glb_writer import (
+    GLBWriter, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT,
+)
+from meshopt_encoder import apply_meshopt_compression
+from texture_store import TextureStore
+from texture_cache import add_texture_cache_args, texture_cache_from_args
+
+DEFAULT_CELL_SIZE = 64  # yards
+
+
+# ── Reading extracted geometry ──────────────────────────────────────────────
+
+def material_key(writer, material):
+    """
+    Hashable description of a material that is independent of the source GLB:
+    the material with its texture reference replaced by image URI + sampler.
+    """
+    material = json.loads(json.dumps(material))
+    texture_info = material.get("pbrMetallicRoughness", {}).pop("baseColorTexture", None)
+    texture = None
+    if texture_info is not None:
+        tex = writer.gltf["textures"][texture_info["index"]]
+        extensions = tex.get("extensions", {})
+        source = tex["source"] if "source" in tex else next(iter(extensions.values()))["source"]
+        image = writer.gltf["images"][source]
+        sampler = writer.gltf["samplers"][tex["sampler"]] if "sampler" in tex else None
+        texture = {"uri": image["uri"], "mimeType": image["mimeType"], "sampler": sampler}
+    return json.dumps({"material": material, "texture": texture}, sort_keys=True)
+
+
+def model_primitives(writer):
+    """
+    [(material key, positions, normals, uvs, indices)] for every primitive of a
+    doodad GLB's scene (full detail only; LOD meshes are not in the scene).
+    """
+    primitives = []
+    scene = writer.gltf["scenes"][writer.gltf.get("scene", 0)]
+    for node_idx in scene["nodes"]:
+        node = writer.gltf["nodes"][node_idx]
+        if "mesh" not in node:
+            continue
+        for prim in writer.gltf["meshes"][node["mesh"]]["primitives"]:
+            attrs = prim["attributes"]
+            primitives.append((
+                material_key(writer, writer.gltf["materials"][prim["material"]]),
+                writer.read_accessor(attrs["POSITION"]),
+                writer.read_accessor(attrs["NORMAL"]),
+                writer.read_accessor(attrs["TEXCOORD_0"]),
+                writer.read_accessor(prim["indices"]).astype(np.uint32),
+            ))
+    return primitives
+
+
+# ── World transforms ────────────────────────────────────────────────────────
+
+def rotation_matrices(quaternions):
+    """(N, 3, 3) rotation matrices for (N, 4) xyzw unit quaternions."""
+    x, y, z, w = quaternions.astype(np.float64).T
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=1),
+    ], axis=1)
+
+
+# ── Cell GLB ────────────────────────────────────────────────────────────────
+
+def build_cell_glb(batches, meshopt=False):
+    """
+    Build one GLB from merged batches: {material key: [(positions, normals, uvs,
+    indices)]} with positions already in world space. One primitive per material.
+    """
+    gltf = GLBWriter()
+    primitives = []
+    samplers = {}
+    images = {}
+
+    for key in sorted(batches):
+        parts = batches[key]
+        positions = np.concatenate([p[0] for p in parts]).astype(np.float32)
+        normals = np.concatenate([p[1] for p in parts]).astype(np.float32)
+        uvs = np.concatenate([p[2] for p in parts]).astype(np.float32)
+        offsets = np.cumsum([0] + [len(p[0]) for p in parts[:-1]])
+        indices = np.concatenate([p[3] + offset for p, offset in zip(parts, offsets)])
+        num_verts = len(positions)
+        if num_verts < 65536:
+            indices, idx_ct = indices.astype(np.uint16), UNSIGNED_SHORT
+        else:
+            indices, idx_ct = indices.astype(np.uint32), UNSIGNED_INT
+
+        idx_acc = gltf.add_accessor(
+            gltf.add_buffer_view(indices, target=ELEMENT_ARRAY_BUFFER), idx_ct,
+            len(indices), "SCALAR", max=[int(indices.max())], min=[int(indices.min())])
+        pos_acc = gltf.add_accessor(
+            gltf.add_buffer_view(positions, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+            num_verts, "VEC3", max=positions.max(axis=0).tolist(), min=positions.min(axis=0).tolist())
+        norm_acc = gltf.add_accessor(
+            gltf.add_buffer_view(normals, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+            num_verts, "VEC3")
+        uv_acc = gltf.add_accessor(
+            gltf.add_buffer_view(uvs, target=ARRAY_BUFFER, byte_stride=8), FLOAT,
+            num_verts, "VEC2")
+
+        desc = json.loads(key)
+        material = desc["material"]
+        texture = desc["texture"]
+        if texture is not None:
+            img_idx = images.get(texture["uri"])
+            if img_idx is None:
+                img_idx = images[texture["uri"]] = gltf.add_image_uri(texture["uri"], texture["mimeType"])
+            sampler_idx = None
+            if texture["sampler"] is not None:
+                sampler_key = json.dumps(texture["sampler"], sort_keys=True)
+                sampler_idx = samplers.get(sampler_key)
+                if sampler_idx is None:
+                    sampler_idx = samplers[sampler_key] = gltf.add("samplers", texture["sampler"])
+            tex_idx = gltf.add_texture(img_idx, sampler_idx, texture["mimeType"])
+            material["pbrMetallicRoughness"]["baseColorTexture"] = {"index": tex_idx}
+        mat_idx = gltf.add("materials", material)
+
+        primitives.append({
+            "attributes": {"POSITION": pos_acc, "NORMAL": norm_acc, "TEXCOORD_0": uv_acc},
+            "indices": idx_acc,
+            "material": mat_idx,
+        })
+
+    gltf.gltf["scene"] = 0
+    gltf.add("scenes", {"nodes": [0]})
+    gltf.add("nodes", {"mesh": 0})
+    gltf.add("meshes", {"primitives": primitives})
+
+    if meshopt:
+        apply_meshopt_compression(gltf)
+    return gltf
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake rarely placed doodads into merged per-cell GLBs")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR),
+                        help="Path to WoW Data directory with MPQ files")
+    parser.add_argument("--doodad-json", default=str(DEFAULT_DOODAD_JSON),
+                        help="Path to northshire_doodads.json")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR),
+                        help="Models directory containing doodad_manifest.json")
+    parser.add_argument("--texture-dir", default=str(DEFAULT_TEXTURE_DIR),
+                        help="Output directory for shared textures")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE,
+                        help="Cell size in yards")
+    parser.add_argument("--max-instances", type=int, default=1,
+                        help="Bake models placed at most this many times")
+    parser.add_argument("--meshopt", action="store_true",
+                        help="Compress cell geometry with EXT_meshopt_compression")
+    add_texture_codec_args(parser)
+    add_texture_cache_args(parser)
+    args = parser.parse_args()
+    texture_codec = texture_codec_from_args(args)
+    texture_cache = texture_cache_from_args(args)
+
+    output_dir = Path(args.output_dir)
+    cell_dir = output_dir / "cells"
+    cell_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / "doodad_manifest.json"
+
+    print(f"Loading doodad data from {args.doodad_json}...")
+    with open(args.doodad_json) as f:
+        doodad_data = json.load(f)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    placements = [d for d in doodad_data["doodads"]
+                  if abs(d["x"]) <= HALF_WORLD and abs(d["z"]) <= HALF_WORLD]
+    model_counts = Counter(d["model"] for d in placements)
+    instanced = manifest.get("instanced", {})
+    candidates = sorted(model for model, count in model_counts.items()
+                        if count <= args.max_instances and model not in instanced)
+    print(f"Found {len(candidates)} models placed at most {args.max_instances} time(s)")
+
+    print(f"\nLoading StormLib from {STORMLIB_DLL}...")
+    storm = StormLib(STORMLIB_DLL)
+    archive_pool = MPQArchivePool(storm, Path(args.data_dir), MPQ_LOAD_ORDER)
+    texture_store = TextureStore(args.texture_dir, cell_dir, output_dir, manifest.get("textures"))
+
+    print(f"\n== Extracting {len(candidates)} models ==")
+    geometry = {}  # model path → model_primitives()
+    for i, model in enumerate(candidates):
+        try:
+            writer = extract_single_doodad(archive_pool, model, texture_store=texture_store,
+                                           texture_codec=texture_codec,
+                                           texture_cache=texture_cache)
+        except Exception as e:
+            print(f"  [{i+1}/{len(candidates)}] ERROR {model}: {e}")
+            continue
+        if writer is None:
+            print(f"  [{i+1}/{len(candidates)}] SKIP {model}: extraction failed")
+            continue
+        geometry[model] = model_primitives(writer)
+    archive_pool.close_all()
+
+    # Transform every placement of a baked model into its cell's batches
+    cells = defaultdict(lambda: defaultdict(list))  # cell → material key → parts
+    cell_counts = Counter()
+    baked = [d for d in placements if d["model"] in geometry]
+    if baked:
+        translations, rotations, scales = placement_transforms(baked)
+        matrices = rotation_matrices(rotations)
+        for d, t, r, s in zip(baked, translations, matrices, scales[:, 0]):
+            cell = cell_of(d, args.cell_size)
+            cell_counts[cell] += 1
+            for key, positions, normals, uvs, indices in geometry[d["model"]]:
+                world_positions = (positions * s) @ r.T + t
+                world_normals = normals @ r.T
+                cells[cell][key].append((world_positions, world_normals, uvs, indices))
+
+    print(f"\n== Writing {len(cells)} cell GLBs ==")
+    cell_entries = []
+    total_size = 0
+    total_primitives = 0
+    for cell in sorted(cells):
+        gltf = build_cell_glb(cells[cell], meshopt=args.meshopt)
+        glb_path = cell_dir / f"cell_{cell[0]}_{cell[1]}.glb"
+        gltf.save(str(glb_path))
+        size = glb_path.stat().st_size
+        total_size += size
+
+        positions = [acc for acc in gltf.gltf["accessors"] if acc["type"] == "VEC3" and "min" in acc]
+        primitive_count = len(cells[cell])
+        total_primitives += primitive_count
+        cell_entries.append({
+            "glb": "cells/" + glb_path.name,
+            "cell": list(cell),
+            "instances": cell_counts[cell],
+            "primitives": primitive_count,
+            "min": np.min([acc["min"] for acc in positions], axis=0).round(3).tolist(),
+            "max": np.max([acc["max"] for acc in positions], axis=0).round(3).tolist(),
+        })
+        print(f"  {glb_path.name}: {cell_counts[cell]} props, {primitive_count} primitives, "
+              f"{size / 1024:.1f} KB")
+
+    manifest["baked"] = {
+        "cellSize": args.cell_size,
+        "models": sorted(geometry),
+        "cells": cell_entries,
+    }
+    manifest["textures"] = texture_store.index
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print("\n== Done ==")
+    print(f"  Baked: {len(geometry)}/{len(candidates)} models, {len(baked)} placements")
+    print(f"  Cells: {len(cell_entries)} GLBs, {total_primitives} primitives "
+          f"(was {sum(len(geometry[d['model']]) for d in baked)} draw calls)")
+    print(f"  Total size: {total_size / 1024 / 1024:.1f} MB")
+    if texture_cache is not None:
+        print(f"  Texture cache: {texture_cache.summary()}")
+    print(f"  Manifest: {manifest_path}")
+    print(f"  Output: {cell_dir}")
+
+
+if __name__ == "__main__":
+    main()
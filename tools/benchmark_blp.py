@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy BLP decoder (blp.py) against Pillow's BLP plugin.
+
+Collects every texture the doodad and WMO extractors convert (type-0 M2
+textures of the placed doodads, MOMT textures of the placed WMOs), decodes
+each one with both decoders and reports timings per BLP format plus any
+texel differences.
+
+Pillow takes palettized alpha from the palette instead of the alpha plane,
+so palettized textures are compared on RGB only. Pillow also misreads
+DXT3/DXT5 textures whose header says alphaDepth 0; those show up as
+differences.
+
+Usage:
+    python benchmark_blp.py
+    python benchmark_blp.py --data-dir "C:\\Path\\To\\Data" --repeat 5
+"""
+
+import argparse
+import io
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from blp import (
+    parse_blp_header, decode_blp, COMPRESSION_DXT, COMPRESSION_PALETTE, COMPRESSION_ARGB,
+    ALPHA_ENCODING_DXT1, ALPHA_ENCODING_DXT3, ALPHA_ENCODING_DXT5,
+)
+from extract_model import StormLib, STORMLIB_DLL, MPQ_LOAD_ORDER, parse_m2_textures
+from extract_doodads import MPQArchivePool, DEFAULT_DATA_DIR, DEFAULT_DOODAD_JSON
+from extract_wmo import parse_wmo_root
+
+HALF_WORLD = 800  # WORLD_SIZE / 2 from shared/constants.js
+
+DXT_NAMES = {
+    ALPHA_ENCODING_DXT1: "DXT1",
+    ALPHA_ENCODING_DXT3: "DXT3",
+    ALPHA_ENCODING_DXT5: "DXT5",
+}
+
+
+def format_name(header):
+    """Short label for a BLP's storage format, e.g. 'DXT5', 'palette/a8'."""
+    if header["type"] == 0:
+        return "JPEG"
+    if header["compression"] == COMPRESSION_DXT:
+        return DXT_NAMES.get(header["alphaEncoding"], f"DXT?{header['alphaEncoding']}")
+    if header["compression"] == COMPRESSION_PALETTE:
+        return f"palette/a{header['alphaDepth']}"
+    if header["compression"] == COMPRESSION_ARGB:
+        return "ARGB"
+    return f"compression {header['compression']}"
+
+
+def collect_texture_paths(archive_pool, doodad_data):
+    """Texture paths used by the in-bounds doodads and WMOs, in first-seen order."""
+    paths = {}
+
+    models = {d["model"] for d in doodad_data["doodads"]
+              if abs(d["x"]) <= HALF_WORLD and abs(d["z"]) <= HALF_WORLD}
+    for model in sorted(models):
+        mpq_path = model.replace("/", "\\")
+        if not mpq_path.lower().endswith(".m2"):
+            mpq_path += ".m2"
+        m2_data = archive_pool.read_file(mpq_path)
+        if not m2_data or m2_data[0:4] != b"MD20":
+            continue
+        for tex in parse_m2_textures(m2_data):
+            if tex["type"] == 0 and tex["filename"]:
+                paths.setdefault(tex["filename"].replace("/", "\\").lower(), tex["filename"])
+
+    wmos = {w["model"] for w in doodad_data.get("wmos", [])
+            if abs(w["x"]) <= HALF_WORLD and abs(w["z"]) <= HALF_WORLD}
+    for wmo in sorted(wmos):
+        root_data = archive_pool.read_file(wmo.replace("/", "\\"))
+        if not root_data:
+            continue
+        for mat in parse_wmo_root(root_data)["materials"]:
+            tex_path = mat.get("texturePath", "")
+            if tex_path:
+                paths.setdefault(tex_path.replace("/", "\\").lower(), tex_path)
+
+    return list(paths.values())
+
+
+def best_time(fn, repeat):
+    """Fastest of `repeat` runs of fn(), in seconds, and fn's last result."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark blp.py against Pillow's BLP decoder")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR),
+                        help="Path to WoW Data directory with MPQ files")
+    parser.add_argument("--doodad-json", default=str(DEFAULT_DOODAD_JSON),
+                        help="Path to northshire_doodads.json")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Decode each texture this many times and keep the fastest")
+    parser.add_argument("--limit", type=int,
+                        help="Only benchmark the first N textures")
+    args = parser.parse_args()
+
+    with open(args.doodad_json) as f:
+        doodad_data = json.load(f)
+
+    storm = StormLib(STORMLIB_DLL)
+    archive_pool = MPQArchivePool(storm, Path(args.data_dir), MPQ_LOAD_ORDER)
+
+    print("Collecting doodad and WMO textures...")
+    texture_paths = collect_texture_paths(archive_pool, doodad_data)
+    if args.limit and args.limit > 0:
+        texture_paths = texture_paths[:args.limit]
+    print(f"  {len(texture_paths)} unique textures")
+
+    # format → [count, texels, numpy seconds, Pillow seconds]
+    stats = defaultdict(lambda: [0, 0, 0.0, 0.0])
+    mismatches = []
+    unsupported = 0
+
+    for tex_path in texture_paths:
+        blp_data = archive_pool.read_file(tex_path.replace("/", "\\"))
+        header = parse_blp_header(blp_data) if blp_data else None
+        if header is None:
+            continue
+
+        name = format_name(header)
+        numpy_time, rgba = best_time(lambda: decode_blp(blp_data, 0, header), args.repeat)
+        if rgba is None:
+            unsupported += 1
+            continue
+        pillow_time, pillow_rgba = best_time(
+            lambda: np.asarray(Image.open(io.BytesIO(blp_data)).convert("RGBA")), args.repeat)
+
+        entry = stats[name]
+        entry[0] += 1
+        entry[1] += header["width"] * header["height"]
+        entry[2] += numpy_time
+        entry[3] += pillow_time
+
+        channels = 3 if header["compression"] == COMPRESSION_PALETTE else 4
+        diff = np.abs(rgba[..., :channels].astype(np.int16) -
+                      pillow_rgba[..., :channels].astype(np.int16)).max()
+        if diff:
+            mismatches.append((tex_path, name, int(diff)))
+
+    archive_pool.close_all()
+
+    print(f"\n== BLP decode: blp.py vs Pillow (best of {args.repeat}) ==")
+    print(f"  {'format':<12} {'count':>6} {'Mtexels':>8} {'numpy ms':>10} {'Pillow ms':>10} {'speedup':>8}")
+    total_numpy = total_pillow = 0.0
+    for name, (count, texels, numpy_time, pillow_time) in sorted(stats.items()):
+        total_numpy += numpy_time
+        total_pillow += pillow_time
+        speedup = pillow_time / numpy_time if numpy_time else 0
+        print(f"  {name:<12} {count:>6} {texels / 1e6:>8.2f} {numpy_time * 1000:>10.1f} "
+              f"{pillow_time * 1000:>10.1f} {speedup:>7.1f}x")
+    if total_numpy:
+        print(f"  {'total':<12} {sum(s[0] for s in stats.values()):>6} {'':>8} "
+              f"{total_numpy * 1000:>10.1f} {total_pillow * 1000:>10.1f} "
+              f"{total_pillow / total_numpy:>7.1f}x")
+    if unsupported:
+        print(f"  {unsupported} textures not handled by blp.py (JPEG / unknown compression)")
+
+    if mismatches:
+        print(f"\n  {len(mismatches)} textures differ from Pillow:")
+        for tex_path, name, diff in mismatches[:20]:
+            print(f"    {tex_path} ({name}): max channel difference {diff}")
+    else:
+        print("\n  All decoded textures match Pillow")
+
+
+if __name__ == "__main__":
+    main()
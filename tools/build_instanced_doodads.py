@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Build instanced placement GLBs for doodads (EXT_mesh_gpu_instancing).
+
+Runs after extract_terrain.py (northshire_doodads.json) and extract_doodads.py
+(doodad GLBs + doodad_manifest.json). For every placed model it copies the
+model's GLB and adds one TRANSLATION / ROTATION / SCALE entry per placement to
+its mesh nodes, so the client draws every copy of a model with one draw call
+per primitive. With --cell-size the placements are split into square world
+cells, one GLB per model per cell, so off-screen cells can be culled.
+
+Output goes to <output-dir>/instanced/, a sibling of doodads/, so relative
+shared texture URIs stay valid. The GLBs are listed under "instanced" in
+doodad_manifest.json (model path → list of {glb, instances, cell}).
+
+Usage:
+    python build_instanced_doodads.py
+    python build_instanced_doodads.py --cell-size 128
+"""
+
+import argparse
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from glb_writer import GLBWriter, FLOAT, EXT_MESH_GPU_INSTANCING
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_DOODAD_JSON = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "terrain" / "northshire_doodads.json"
+DEFAULT_OUTPUT_DIR = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "models"
+
+HALF_WORLD = 800  # WORLD_SIZE / 2 from shared/constants.js
+
+
+def placement_transforms(instances):
+    """
+    Per-instance glTF TRS arrays for doodad placements, matching the client's
+    Object3D setup: position (x, y, z), Euler (rotX, rotY, -rotZ) degrees in
+    'YZX' order, uniform scale.
+    Returns (translations (N,3), rotations (N,4) xyzw quaternions, scales (N,3)).
+    """
+    translations = np.array([[d["x"], d["y"], d["z"]] for d in instances], dtype=np.float32)
+
+    # THREE.Quaternion.setFromEuler for order 'YZX'
+    angles = np.radians(np.array(
+        [[d.get("rotX") or 0, d.get("rotY") or 0, -(d.get("rotZ") or 0)] for d in instances],
+        dtype=np.float64)) / 2
+    c1, c2, c3 = np.cos(angles).T
+    s1, s2, s3 = np.sin(angles).T
+    rotations = np.stack([
+        s1 * c2 * c3 + c1 * s2 * s3,
+        c1 * s2 * c3 + s1 * c2 * s3,
+        c1 * c2 * s3 - s1 * s2 * c3,
+        c1 * c2 * c3 - s1 * s2 * s3,
+    ], axis=1).astype(np.float32)
+
+    scales = np.repeat(np.array([[d.get("scale") or 1.0] for d in instances], dtype=np.float32), 3, axis=1)
+    return translations, rotations, scales
+
+
+def add_gpu_instancing(writer, translations, rotations, scales):
+    """Attach EXT_mesh_gpu_instancing attributes to every mesh node of a GLBWriter."""
+    attributes = {}
+    for name, data, accessor_type in (("TRANSLATION", translations, "VEC3"),
+                                      ("ROTATION", rotations, "VEC4"),
+                                      ("SCALE", scales, "VEC3")):
+        attributes[name] = writer.add_accessor(
+            writer.add_buffer_view(data), FLOAT, len(data), accessor_type)
+
+    for node in writer.gltf.get("nodes", []):
+        if "mesh" in node:
+            node.setdefault("extensions", {})[EXT_MESH_GPU_INSTANCING] = {"attributes": attributes}
+    # Without the extension the mesh would render once at the origin
+    writer.add_extension(EXT_MESH_GPU_INSTANCING, required=True)
+
+
+def cell_of(instance, cell_size):
+    """(column, row) of the square world cell containing a placement."""
+    return (math.floor((instance["x"] + HALF_WORLD) / cell_size),
+            math.floor((instance["z"] + HALF_WORLD) / cell_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build EXT_mesh_gpu_instancing doodad GLBs")
+    parser.add_argument("--doodad-json", default=str(DEFAULT_DOODAD_JSON),
+                        help="Path to northshire_doodads.json")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR),
+                        help="Models directory containing doodad_manifest.json and doodads/")
+    parser.add_argument("--cell-size", type=float, default=0,
+                        help="Split placements into square cells of this size in yards "
+                             "(0 = one GLB per model)")
+    parser.add_argument("--min-instances", type=int, default=2,
+                        help="Only instance models placed at least this many times")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    instanced_dir = output_dir / "instanced"
+    instanced_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / "doodad_manifest.json"
+
+    print(f"Loading doodad data from {args.doodad_json}...")
+    with open(args.doodad_json) as f:
+        doodad_data = json.load(f)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    # Placements per model (only those within world bounds)
+    by_model = defaultdict(list)
+    for d in doodad_data["doodads"]:
+        if abs(d["x"]) <= HALF_WORLD and abs(d["z"]) <= HALF_WORLD:
+            by_model[d["model"]].append(d)
+
+    instanced = {}
+    total_files = 0
+    total_instances = 0
+    total_size = 0
+    skipped = 0
+
+    print(f"\n== Building instanced GLBs for {len(by_model)} models ==")
+    for model, instances in sorted(by_model.items(), key=lambda item: -len(item[1])):
+        info = manifest.get("models", {}).get(model)
+        if not info or len(instances) < args.min_instances:
+            skipped += 1
+            continue
+        source = output_dir / info["glb"]
+        if not source.exists():
+            skipped += 1
+            continue
+
+        if args.cell_size > 0:
+            cells = defaultdict(list)
+            for d in instances:
+                cells[cell_of(d, args.cell_size)].append(d)
+        else:
+            cells = {None: instances}
+
+        entries = []
+        for cell, cell_instances in sorted(cells.items(), key=lambda item: item[0] or (0, 0)):
+            name = source.stem if cell is None else f"{source.stem}_{cell[0]}_{cell[1]}"
+            glb_path = instanced_dir / f"{name}.glb"
+
+            writer = GLBWriter.load(source)
+            add_gpu_instancing(writer, *placement_transforms(cell_instances))
+            writer.save(str(glb_path))
+
+            entry = {"glb": "instanced/" + glb_path.name, "instances": len(cell_instances)}
+            if cell is not None:
+                entry["cell"] = list(cell)
+            entries.append(entry)
+            total_files += 1
+            total_size += glb_path.stat().st_size
+
+        instanced[model] = entries
+        total_instances += len(instances)
+        print(f"  {source.name}: {len(instances)} instances in {len(entries)} GLB(s)")
+
+    manifest["instanced"] = instanced
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print("\n== Done ==")
+    print(f"  Instanced: {len(instanced)} models, {total_instances} placements, {total_files} GLBs")
+    print(f"  Skipped: {skipped} (not extracted or below --min-instances)")
+    print(f"  Total size: {total_size / 1024 / 1024:.1f} MB")
+    print(f"  Manifest: {manifest_path}")
+    print(f"  Output: {instanced_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Binary collision pack shared by extract_doodads.py and extract_wmo.py.
+
+Replaces collision_data.json. The client maps typed-array views straight onto
+the binary file instead of parsing JSON numbers:
+
+  collision.bin         — all vertices as little-endian float32 (x, y, z in
+                          glTF Y-up), then all triangle indices as uint16
+                          (uint32 if any model has more than 65536 vertices)
+                          starting at indexByteOffset, then the BVH node
+                          links as uint32 pairs at bvhByteOffset
+  collision_index.json  — {"version", "binHash" (SHA-256 of collision.bin),
+                          "indexType", "vertexCount",
+                          "triangleCount", "indexByteOffset", "nodeCount",
+                          "bvhByteOffset",
+                          "models": {model path: [first vertex, vertex count,
+                                                  first triangle, triangle count,
+                                                  first node, node count]},
+                          "shapes": {M2 model path: "cylinder" | "box" | "trimesh"}}
+
+Triangle indices are local to their model, as in collision_data.json.
+
+Each mesh gets a flattened BVH (build_bvh) and its triangles are stored in
+BVH leaf order. Nodes are in depth-first order: a node's left child directly
+follows it. Links are (first triangle, triangle count) for leaves and
+(right child, 0) for interior nodes, both relative to the model. Node bounds
+are not stored: every placement rotates and scales the mesh, so the client
+computes world-space bounds bottom-up while it transforms a collider's
+triangles, a linear pass instead of a tree build.
+
+M2 doodads also get the cheapest collider shape that fits them
+(fit_collider_shape): a vertical cylinder (trunks, posts, barrels), the
+box the client already builds (crates, carts), or the trimesh itself when
+neither primitive fits within the threshold. WMOs are always trimeshes.
+
+Run directly to convert collision_data.json to a pack, or to rebuild an
+existing pack after a format change.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_MODELS_DIR = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "models"
+
+COLLISION_INDEX_NAME = "collision_index.json"
+COLLISION_BIN_NAME = "collision.bin"
+LEGACY_COLLISION_NAME = "collision_data.json"
+
+PACK_VERSION = 2
+
+BVH_LEAF_TRIANGLES = 8
+
+COLLIDER_SHAPES = ("cylinder", "box", "trimesh")
+COLLIDER_FIT_THRESHOLD = 0.4  # most of a primitive's footprint the mesh may leave empty
+FIT_SAMPLES = 24              # footprint samples per axis
+
+
+def is_doodad_model(path):
+    """True for M2 doodad collision meshes (the ones that get a fitted shape)."""
+    return path.lower().endswith(".m2")
+
+
+def footprint_coverage(tris_xz, points, tolerance):
+    """
+    Which of points (P, 2) lie in the XZ projection of tris_xz (T, 3, 2),
+    or within tolerance of a triangle edge (so walls seen edge-on count).
+    """
+    a, b, c = tris_xz[:, 0], tris_xz[:, 1], tris_xz[:, 2]
+    p = points[:, None, :]
+
+    def cross(o, u, v):
+        return (u[..., 0] - o[..., 0]) * (v[..., 1] - o[..., 1]) - (u[..., 1] - o[..., 1]) * (v[..., 0] - o[..., 0])
+
+    d1, d2, d3 = cross(a, b, p), cross(b, c, p), cross(c, a, p)
+    inside = ((d1 >= 0) & (d2 >= 0) & (d3 >= 0)) | ((d1 <= 0) & (d2 <= 0) & (d3 <= 0))
+    covered = (inside & (np.abs(cross(a, b, c)) > 1e-12)).any(axis=1)
+    for start, end in ((a, b), (b, c), (c, a)):
+        edge = end - start
+        length_sq = (edge * edge).sum(axis=-1)
+        t = np.clip(((p - start) * edge).sum(axis=-1) / np.where(length_sq > 0, length_sq, 1), 0, 1)
+        offset = p - (start + t[..., None] * edge)
+        covered |= ((offset * offset).sum(axis=-1) <= tolerance * tolerance).any(axis=1)
+    return covered
+
+
+def fit_collider_shape(verts, tris, threshold=COLLIDER_FIT_THRESHOLD):
+    """
+    Cheapest collider for a doodad collision mesh: "cylinder", "box" or "trimesh".
+
+    Both primitives are fitted in model space like the client builds them:
+    the box around the XZ bounds (rotated with the placement's rotY) and the
+    vertical cylinder centred on the XZ bounds through the farthest vertex.
+    A primitive's fit error is the fraction of its XZ footprint that the
+    mesh's footprint leaves empty, where the player would be blocked by
+    nothing. The better primitive wins (the cylinder on ties, as it is the
+    cheaper test); if even that one is more than threshold empty, the
+    mesh stays a trimesh.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    tris = np.asarray(tris, dtype=np.int64).reshape(-1, 3)
+    xz = verts[:, [0, 2]]
+    tris_xz = xz[tris]
+    lo, hi = xz.min(axis=0), xz.max(axis=0)
+    center = (lo + hi) / 2
+    radius = np.sqrt(((xz - center) ** 2).sum(axis=1)).max()
+    extent = hi - lo
+    tolerance = 0.75 * max(extent.max(), 1e-6) / FIT_SAMPLES
+
+    steps = (np.arange(FIT_SAMPLES) + 0.5) / FIT_SAMPLES
+    box_points = np.stack(np.meshgrid(lo[0] + steps * extent[0], lo[1] + steps * extent[1]),
+                          axis=-1).reshape(-1, 2)
+    box_error = 1 - footprint_coverage(tris_xz, box_points, tolerance).mean()
+    disc_points = np.stack(np.meshgrid(center[0] + (2 * steps - 1) * radius,
+                                       center[1] + (2 * steps - 1) * radius), axis=-1).reshape(-1, 2)
+    disc_points = disc_points[((disc_points - center) ** 2).sum(axis=1) <= radius * radius]
+    cylinder_error = 1 - footprint_coverage(tris_xz, disc_points, tolerance).mean() if len(disc_points) else 1
+
+    if min(cylinder_error, box_error) > threshold:
+        return "trimesh"
+    return "cylinder" if cylinder_error <= box_error else "box"
+
+
+def build_bvh(verts, tris, leaf_triangles=BVH_LEAF_TRIANGLES):
+    """
+    Median-split BVH over a triangle mesh.
+    verts: (V, 3) positions, tris: (T, 3) indices.
+    Returns (tris in leaf order, (N, 2) uint32 node links) in the layout
+    described in the module docstring.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    tris = np.asarray(tris, dtype=np.int64).reshape(-1, 3)
+    centroids = verts[tris].mean(axis=1)
+
+    order = np.arange(len(tris))
+    links = []
+
+    def build(start, end):
+        node = len(links)
+        subset = order[start:end]
+        links.append([start, end - start])
+        if end - start <= leaf_triangles:
+            return node
+        # Split at the centroid median along the longest centroid axis
+        spread = centroids[subset].max(axis=0) - centroids[subset].min(axis=0)
+        axis = int(np.argmax(spread))
+        mid = (end - start) // 2
+        order[start:end] = subset[np.argpartition(centroids[subset, axis], mid)]
+        build(start, start + mid)
+        links[node] = [build(start + mid, end), 0]
+        return node
+
+    if len(tris):
+        build(0, len(tris))
+    return tris[order], np.array(links, dtype="<u4").reshape(-1, 2)
+
+
+def write_collision_pack(output_dir, collision_data, fit_threshold=COLLIDER_FIT_THRESHOLD):
+    """
+    Write collision_data ({model path: {"verts": [...], "tris": [...]}}) as a
+    collision pack in output_dir and remove a stale collision_data.json.
+    M2 meshes keep a "shape" they already have (read back from a pack) and
+    are fitted with fit_threshold otherwise.
+    Returns the combined size of both files in bytes.
+    """
+    output_dir = Path(output_dir)
+    verts = [np.asarray(mesh["verts"], dtype="<f4") for mesh in collision_data.values()]
+    bvhs = [build_bvh(model_verts, mesh["tris"])
+            for model_verts, mesh in zip(verts, collision_data.values())]
+    max_vertex_count = max((len(v) // 3 for v in verts), default=0)
+    index_type = "uint16" if max_vertex_count <= 0x10000 else "uint32"
+
+    shapes = {path: mesh.get("shape") or fit_collider_shape(mesh["verts"], mesh["tris"], fit_threshold)
+              for path, mesh in collision_data.items()
+              if is_doodad_model(path) and len(mesh["verts"]) >= 9 and len(mesh["tris"]) >= 3}
+
+    models = {}
+    vertex_count = 0
+    triangle_count = 0
+    node_count = 0
+    for path, model_verts, (model_tris, model_links) in zip(collision_data, verts, bvhs):
+        models[path] = [vertex_count, len(model_verts) // 3, triangle_count, len(model_tris),
+                        node_count, len(model_links)]
+        vertex_count += len(model_verts) // 3
+        triangle_count += len(model_tris)
+        node_count += len(model_links)
+
+    def concat(arrays, dtype, width):
+        return np.concatenate(arrays).astype(dtype) if arrays else np.zeros((0, width), dtype=dtype)
+
+    vertex_blob = concat(verts, "<f4", 3)
+    index_blob = concat([bvh[0] for bvh in bvhs], "<u2" if index_type == "uint16" else "<u4", 3)
+    links_blob = concat([bvh[1] for bvh in bvhs], "<u4", 2)
+    index_pad = -index_blob.nbytes % 4
+
+    index = {
+        "version": PACK_VERSION,
+        # Covers collision.bin for anything that only hashes this index (bake_collision_world.py)
+        "binHash": hashlib.sha256(vertex_blob.tobytes() + index_blob.tobytes() + b"\x00" * index_pad
+                                  + links_blob.tobytes()).hexdigest(),
+        "indexType": index_type,
+        "vertexCount": vertex_count,
+        "triangleCount": triangle_count,
+        "indexByteOffset": vertex_blob.nbytes,  # float32 data keeps this 4-byte aligned
+        "nodeCount": node_count,
+        "bvhByteOffset": vertex_blob.nbytes + index_blob.nbytes + index_pad,
+        "models": models,
+        "shapes": shapes,
+    }
+
+    bin_path = output_dir / COLLISION_BIN_NAME
+    index_path = output_dir / COLLISION_INDEX_NAME
+    with open(bin_path, "wb") as f:
+        f.write(vertex_blob.tobytes())
+        f.write(index_blob.tobytes())
+        f.write(b"\x00" * index_pad)
+        f.write(links_blob.tobytes())
+    with open(index_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    legacy_path = output_dir / LEGACY_COLLISION_NAME
+    if legacy_path.exists():
+        os.remove(legacy_path)
+    return bin_path.stat().st_size + index_path.stat().st_size
+
+
+def read_collision_arrays(output_dir):
+    """
+    Collision meshes from the pack in output_dir as {model path: (verts (V, 3)
+    float32, tris (T, 3) int64 in leaf order, BVH links (N, 2) uint32)}.
+    """
+    output_dir = Path(output_dir)
+    with open(output_dir / COLLISION_INDEX_NAME) as f:
+        index = json.load(f)
+    data = (output_dir / COLLISION_BIN_NAME).read_bytes()
+    verts = np.frombuffer(data, dtype="<f4", count=index["vertexCount"] * 3).reshape(-1, 3)
+    tris = np.frombuffer(data, dtype="<u2" if index["indexType"] == "uint16" else "<u4",
+                         count=index["triangleCount"] * 3, offset=index["indexByteOffset"]).reshape(-1, 3)
+    links = np.frombuffer(data, dtype="<u4", count=index.get("nodeCount", 0) * 2,
+                          offset=index.get("bvhByteOffset", 0)).reshape(-1, 2)
+
+    meshes = {}
+    for path, (first_vertex, vertex_count, first_tri, tri_count, *nodes) in index["models"].items():
+        first_node, node_count = nodes if nodes else (0, 0)
+        meshes[path] = (verts[first_vertex:first_vertex + vertex_count],
+                        tris[first_tri:first_tri + tri_count].astype(np.int64),
+                        links[first_node:first_node + node_count])
+    return meshes
+
+
+def read_collision_pack(output_dir):
+    """
+    Collision data from output_dir as {model path: {"verts": [...], "tris": [...]}},
+    read from the collision pack or, for older outputs, collision_data.json.
+    Empty if neither exists. Fitted shapes come back as "shape"; BVHs are not
+    returned (write_collision_pack rebuilds them).
+    """
+    output_dir = Path(output_dir)
+    if not (output_dir / COLLISION_INDEX_NAME).exists():
+        legacy_path = output_dir / LEGACY_COLLISION_NAME
+        if legacy_path.exists():
+            with open(legacy_path) as f:
+                return json.load(f)
+        return {}
+
+    with open(output_dir / COLLISION_INDEX_NAME) as f:
+        shapes = json.load(f).get("shapes", {})
+    collision_data = {}
+    for path, (verts, tris, _) in read_collision_arrays(output_dir).items():
+        collision_data[path] = {"verts": verts.ravel().tolist(), "tris": tris.ravel().tolist()}
+        if path in shapes:
+            collision_data[path]["shape"] = shapes[path]
+    return collision_data
+
+
+def shape_summary(output_dir):
+    """"cylinder: N, box: N, trimesh: N" for the fitted shapes of the pack in output_dir."""
+    with open(Path(output_dir) / COLLISION_INDEX_NAME) as f:
+        shapes = list(json.load(f).get("shapes", {}).values())
+    return ", ".join(f"{shape}: {shapes.count(shape)}" for shape in COLLIDER_SHAPES)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the collision pack from collision_data.json or an existing pack")
+    parser.add_argument("--models-dir", default=str(DEFAULT_MODELS_DIR),
+                        help="Directory holding collision_data.json or the collision pack")
+    parser.add_argument("--collider-fit-threshold", type=float,
+                        help="Refit doodad collider shapes with this threshold "
+                             f"(default: keep the pack's shapes, fit new ones at {COLLIDER_FIT_THRESHOLD})")
+    args = parser.parse_args()
+
+    models_dir = Path(args.models_dir)
+    collision_data = read_collision_pack(models_dir)
+    fit_threshold = COLLIDER_FIT_THRESHOLD
+    if args.collider_fit_threshold is not None:
+        fit_threshold = args.collider_fit_threshold
+        for mesh in collision_data.values():
+            mesh.pop("shape", None)
+    pack_size = write_collision_pack(models_dir, collision_data, fit_threshold)
+    with open(models_dir / COLLISION_INDEX_NAME) as f:
+        node_count = json.load(f)["nodeCount"]
+    print(f"{len(collision_data)} collision meshes, {node_count} BVH nodes: {pack_size / 1024:.1f} KB pack")
+    print(f"Doodad colliders: {shape_summary(models_dir)}")
+
+
+if __name__ == "__main__":
+    main()
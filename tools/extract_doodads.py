@@ -18,22 +18,42 @@ import os
 import numpy as np
 from pathlib import Path
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import io
+from PIL import Image
 
 # Reuse core functions from extract_model.py
 from extract_model import (
     StormLib, extract_from_mpq, MPQ_LOAD_ORDER, STORMLIB_DLL,
     read_m2array, parse_m2_vertices, parse_m2_textures,
-    parse_m2_texture_combos, parse_skin, blp_to_png_bytes, wow_to_gltf_pos,
-    parse_m2_collision,
+    parse_m2_texture_combos, parse_skin, wow_to_gltf_pos,
+    parse_m2_collision, convert_blp_texture, parse_m2_materials,
+    M2_RENDER_FLAG_TWO_SIDED, BLEND_MODE_OPAQUE, ALPHA_CUTOFF, ALPHA_MASK_THRESHOLD,
+    DEFAULT_TEXTURE_CODEC, add_texture_codec_args, texture_codec_from_args,
+    texture_size_budget, decode_blp_image, encode_texture_image,
 )
-
-import pygltflib
+from glb_writer import (
+    GLBWriter, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT,
+    read_glb_json,
+)
+from meshopt_encoder import apply_meshopt_compression
+from mesh_simplify import add_lod_args, add_lod_levels, lod_summary
+from texture_store import TextureStore
+from collision_pack import (
+    COLLIDER_FIT_THRESHOLD, COLLISION_BIN_NAME, COLLISION_INDEX_NAME, shape_summary, write_collision_pack,
+)
+from texture_cache import TextureCache, add_texture_cache_args, texture_cache_from_args
+from texture_atlas import pack_atlas, uvs_in_unit_range, ATLAS_PADDING
 
 SCRIPT_DIR = Path(__file__).parent
 DEFAULT_DATA_DIR = Path(r"C:\Program Files\Ascension Launcher\resources\epoch_live\Data")
 DEFAULT_DOODAD_JSON = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "terrain" / "northshire_doodads.json"
 DEFAULT_OUTPUT_DIR = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "models"
+DEFAULT_TEXTURE_DIR = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "textures"
+DEFAULT_COLLISION_CACHE = SCRIPT_DIR / ".collision_cache.json"
+
+# Bump when parse_m2_collision or the stored collision format changes
+COLLISION_CACHE_VERSION = 1
 
 
 # ── MPQ Archive Pool (keeps archives open for fast access) ──────────────────
@@ -66,6 +86,17 @@ class MPQArchivePool:
                     return data
         return None
 
+    def file_identity(self, filepath):
+        """
+        [archive name, archive size, archive mtime] of the archive read_file() would
+        take filepath from, or None. Identifies the file's content without reading it.
+        """
+        for mpq_name, handle in reversed(self.handles):
+            if self.storm.has_file(handle, filepath):
+                stat = (self.data_dir / mpq_name).stat()
+                return [mpq_name, stat.st_size, stat.st_mtime_ns]
+        return None
+
     def close_all(self):
         """Close all open archives."""
         for mpq_name, handle in self.handles:
@@ -73,6 +104,31 @@ class MPQArchivePool:
         self.handles.clear()
 
 
+# ── Collision cache ─────────────────────────────────────────────────────────
+
+def load_collision_cache(path):
+    """
+    Per-model collision meshes from a previous run: {wow path: {"source":
+    file_identity(), "collision": {"verts", "tris"} or None}}. Empty if missing or stale.
+    """
+    try:
+        cache = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != COLLISION_CACHE_VERSION:
+        return {}
+    return cache.get("models", {})
+
+
+def save_collision_cache(path, models):
+    """Write the collision cache atomically (see load_collision_cache)."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"version": COLLISION_CACHE_VERSION, "models": models},
+                                   separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+
 def sanitize_model_name(wow_path):
     """Convert WoW model path to a GLB filename.
     Handles collisions via the caller (appends counter if needed).
@@ -81,53 +137,63 @@ def sanitize_model_name(wow_path):
     return basename.replace(".m2", ".glb").lower()
 
 
+# Texture index used for the atlas in texture groups (real indices are >= 0, -1 = untextured)
+ATLAS_TEXTURE = -2
+
+
 def build_doodad_glb(m2_vertices, local_to_global, indices, submeshes,
-                     texture_pngs, sub_to_tex):
+                     texture_images, sub_to_tex, meshopt=False, texture_store=None,
+                     sub_to_render=None, atlas=None, lod_ratios=()):
     """
     Build a static GLB from parsed M2 + skin data.
     No skeleton, no animations — one primitive per texture group.
 
-    texture_pngs: dict mapping texture_index → PNG bytes
+    texture_images: dict mapping texture_index → (image bytes, mime type, uses_alpha)
     sub_to_tex:   dict mapping submesh_index → texture_index (or -1 for no texture)
+    sub_to_render: dict mapping submesh_index → M2 material {"flags", "blend_mode"};
+                  submeshes without one are treated as two-sided and alpha-tested
+    meshopt:      compress vertex/index buffer views with EXT_meshopt_compression
+    texture_store: TextureStore to reference shared texture files from (None = embed PNGs)
+    atlas:        texture atlas from build_texture_atlas(); submeshes using an atlased
+                  texture get remapped UVs and share one primitive per render state
+    lod_ratios:   triangle ratios of extra MSFT_lod levels (quadric simplification)
     """
-    # Group submeshes by texture index
-    tex_groups = {}  # tex_idx → list of submesh indices
+    atlas_transforms = atlas["transforms"] if atlas else {}
+
+    # Group submeshes by texture index + render state (two-sided, alpha-tested)
+    sub_to_render = sub_to_render or {}
+    tex_groups = {}  # (tex_idx, two_sided, alpha_key) → list of submesh indices
     for si, sub in enumerate(submeshes):
         if sub["level"] != 0:
             continue
         tex_idx = sub_to_tex.get(si, -1)
-        if tex_idx not in tex_groups:
-            tex_groups[tex_idx] = []
-        tex_groups[tex_idx].append(si)
+        if tex_idx in atlas_transforms:
+            tex_idx = ATLAS_TEXTURE
+        render = sub_to_render.get(si)
+        if render is not None:
+            two_sided = bool(render["flags"] & M2_RENDER_FLAG_TWO_SIDED)
+            alpha_key = render["blend_mode"] != BLEND_MODE_OPAQUE
+        else:
+            two_sided = alpha_key = True
+        group_key = (tex_idx, two_sided, alpha_key)
+        if group_key not in tex_groups:
+            tex_groups[group_key] = []
+        tex_groups[group_key].append(si)
 
     if not tex_groups:
         return None
 
-    def pad4(b):
-        rem = len(b) % 4
-        return b + b"\x00" * (4 - rem) if rem else b
-
-    bin_data = bytearray()
-
-    def append_bin(data_bytes):
-        offset = len(bin_data)
-        bin_data.extend(pad4(data_bytes))
-        return offset
-
-    bv_list = []
-    acc_list = []
+    gltf = GLBWriter()
     primitives = []
-    materials = []
-    images = []
-    textures = []
-    samplers = []
 
-    # One sampler shared by all textures
-    sampler_added = False
+    # One sampler shared by all textures (the atlas gets its own clamped one)
+    sampler_idx = None
+    gltf_textures = {}  # tex_idx → glTF texture index (groups may share a texture)
 
     # Sorted so output is deterministic
-    for tex_idx in sorted(tex_groups.keys()):
-        sub_indices = tex_groups[tex_idx]
+    for group_key in sorted(tex_groups.keys()):
+        tex_idx, two_sided, alpha_key = group_key
+        sub_indices = tex_groups[group_key]
 
         # Collect geometry for this texture group
         all_positions = []
@@ -139,19 +205,23 @@ def build_doodad_glb(m2_vertices, local_to_global, indices, submeshes,
 
         for si in sub_indices:
             sub = submeshes[si]
+            sub_tex = sub_to_tex.get(si, -1)
+            offset_u, offset_v, scale_u, scale_v = atlas_transforms.get(sub_tex, (0.0, 0.0, 1.0, 1.0))
             for i in range(sub["index_start"], sub["index_start"] + sub["index_count"]):
                 local_idx = indices[i]
                 global_idx = local_to_global[local_idx]
-                if global_idx not in global_to_output:
+                # Atlased submeshes sharing a vertex need their own remapped UVs
+                vertex_key = (global_idx, sub_tex)
+                if vertex_key not in global_to_output:
                     v = m2_vertices[global_idx]
                     pos = v["position"]
                     norm = v["normal"]
                     all_positions.append([pos[0], pos[2], -pos[1]])
                     all_normals.append([norm[0], norm[2], -norm[1]])
-                    all_uvs.append([v["uv0"][0], v["uv0"][1]])
-                    global_to_output[global_idx] = output_idx
+                    all_uvs.append([offset_u + v["uv0"][0] * scale_u, offset_v + v["uv0"][1] * scale_v])
+                    global_to_output[vertex_key] = output_idx
                     output_idx += 1
-                all_tri_indices.append(global_to_output[global_idx])
+                all_tri_indices.append(global_to_output[vertex_key])
 
         if output_idx == 0:
             continue
@@ -162,105 +232,169 @@ def build_doodad_glb(m2_vertices, local_to_global, indices, submeshes,
         idx_type = np.uint16 if output_idx < 65536 else np.uint32
         idx_arr = np.array(all_tri_indices, dtype=idx_type)
         num_verts = len(positions)
-
-        # Append to binary buffer
-        idx_offset = append_bin(idx_arr.tobytes())
-        pos_offset = append_bin(positions.tobytes())
-        norm_offset = append_bin(normals_arr.tobytes())
-        uv_offset = append_bin(uvs.tobytes())
-
-        pos_min = positions.min(axis=0).tolist()
-        pos_max = positions.max(axis=0).tolist()
-        idx_ct = 5123 if idx_type == np.uint16 else 5125
-
-        # Buffer views for this primitive
-        bv_base = len(bv_list)
-        bv_list.extend([
-            pygltflib.BufferView(buffer=0, byteOffset=idx_offset,
-                                 byteLength=len(idx_arr) * idx_arr.itemsize, target=34963),
-            pygltflib.BufferView(buffer=0, byteOffset=pos_offset,
-                                 byteLength=num_verts * 12, target=34962, byteStride=12),
-            pygltflib.BufferView(buffer=0, byteOffset=norm_offset,
-                                 byteLength=num_verts * 12, target=34962, byteStride=12),
-            pygltflib.BufferView(buffer=0, byteOffset=uv_offset,
-                                 byteLength=num_verts * 8, target=34962, byteStride=8),
-        ])
-
-        # Accessors
-        acc_base = len(acc_list)
-        acc_list.extend([
-            pygltflib.Accessor(bufferView=bv_base, componentType=idx_ct,
-                               count=len(idx_arr), type="SCALAR",
-                               max=[int(idx_arr.max())], min=[int(idx_arr.min())]),
-            pygltflib.Accessor(bufferView=bv_base + 1, componentType=5126,
-                               count=num_verts, type="VEC3", max=pos_max, min=pos_min),
-            pygltflib.Accessor(bufferView=bv_base + 2, componentType=5126,
-                               count=num_verts, type="VEC3"),
-            pygltflib.Accessor(bufferView=bv_base + 3, componentType=5126,
-                               count=num_verts, type="VEC2"),
-        ])
+        idx_ct = UNSIGNED_SHORT if idx_type == np.uint16 else UNSIGNED_INT
+
+        # Buffer views + accessors for this primitive
+        idx_acc = gltf.add_accessor(
+            gltf.add_buffer_view(idx_arr, target=ELEMENT_ARRAY_BUFFER), idx_ct,
+            len(idx_arr), "SCALAR", max=[int(idx_arr.max())], min=[int(idx_arr.min())])
+        pos_acc = gltf.add_accessor(
+            gltf.add_buffer_view(positions, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+            num_verts, "VEC3", max=positions.max(axis=0).tolist(), min=positions.min(axis=0).tolist())
+        norm_acc = gltf.add_accessor(
+            gltf.add_buffer_view(normals_arr, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+            num_verts, "VEC3")
+        uv_acc = gltf.add_accessor(
+            gltf.add_buffer_view(uvs, target=ARRAY_BUFFER, byte_stride=8), FLOAT,
+            num_verts, "VEC2")
 
         # Material for this group
-        mat_idx = len(materials)
-        tex_png = texture_pngs.get(tex_idx)
-
-        if tex_png is not None:
-            tex_bv = len(bv_list)
-            bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=append_bin(tex_png),
-                                                byteLength=len(tex_png)))
-            img_idx = len(images)
-            images.append(pygltflib.Image(bufferView=tex_bv, mimeType="image/png"))
-            if not sampler_added:
-                samplers.append(pygltflib.Sampler(magFilter=9729, minFilter=9987,
-                                                  wrapS=10497, wrapT=10497))
-                sampler_added = True
-            gltf_tex_idx = len(textures)
-            textures.append(pygltflib.Texture(source=img_idx, sampler=0))
-            materials.append(pygltflib.Material(
-                pbrMetallicRoughness=pygltflib.PbrMetallicRoughness(
-                    baseColorTexture=pygltflib.TextureInfo(index=gltf_tex_idx),
-                    metallicFactor=0.0, roughnessFactor=0.8),
-                doubleSided=True,
-                alphaMode="MASK",
-                alphaCutoff=0.5))
+        if tex_idx == ATLAS_TEXTURE:
+            image_data, mime_type = atlas["image"]
+            uses_alpha = any(atlas["uses_alpha"][sub_to_tex[si]] for si in sub_indices)
+            tex_image = (image_data, mime_type, uses_alpha)
         else:
-            materials.append(pygltflib.Material(
-                pbrMetallicRoughness=pygltflib.PbrMetallicRoughness(
-                    baseColorFactor=[0.5, 0.5, 0.5, 1.0],
-                    metallicFactor=0.0, roughnessFactor=0.8),
-                doubleSided=True))
-
-        attrs = pygltflib.Attributes(POSITION=acc_base + 1, NORMAL=acc_base + 2,
-                                     TEXCOORD_0=acc_base + 3)
-        primitives.append(pygltflib.Primitive(attributes=attrs, indices=acc_base,
-                                              material=mat_idx))
+            tex_image = texture_images.get(tex_idx)
+
+        if tex_image is not None:
+            image_data, mime_type, uses_alpha = tex_image
+            gltf_tex_idx = gltf_textures.get(tex_idx)
+            if gltf_tex_idx is None:
+                if texture_store is not None:
+                    img_idx = gltf.add_image_uri(texture_store.add(image_data, mime_type), mime_type)
+                else:
+                    img_idx = gltf.add_image(image_data, mime_type)
+                if tex_idx == ATLAS_TEXTURE:
+                    # Tiles must not wrap into their neighbours
+                    tex_sampler = gltf.add("samplers", {"magFilter": 9729, "minFilter": 9987,
+                                                        "wrapS": 33071, "wrapT": 33071})
+                else:
+                    if sampler_idx is None:
+                        sampler_idx = gltf.add("samplers", {"magFilter": 9729, "minFilter": 9987,
+                                                            "wrapS": 10497, "wrapT": 10497})
+                    tex_sampler = sampler_idx
+                gltf_tex_idx = gltf.add_texture(img_idx, tex_sampler, mime_type)
+                gltf_textures[tex_idx] = gltf_tex_idx
+            material = {
+                "pbrMetallicRoughness": {
+                    "baseColorTexture": {"index": gltf_tex_idx},
+                    "metallicFactor": 0.0, "roughnessFactor": 0.8},
+                "doubleSided": two_sided,
+            }
+            # Alpha test only where the M2 blends and the texture actually has cut-out texels
+            if alpha_key and uses_alpha:
+                material["alphaMode"] = "MASK"
+                material["alphaCutoff"] = ALPHA_CUTOFF
+            mat_idx = gltf.add("materials", material)
+        else:
+            mat_idx = gltf.add("materials", {
+                "pbrMetallicRoughness": {
+                    "baseColorFactor": [0.5, 0.5, 0.5, 1.0],
+                    "metallicFactor": 0.0, "roughnessFactor": 0.8},
+                "doubleSided": two_sided,
+            })
+
+        primitives.append({
+            "attributes": {"POSITION": pos_acc, "NORMAL": norm_acc, "TEXCOORD_0": uv_acc},
+            "indices": idx_acc,
+            "material": mat_idx,
+        })
 
     if not primitives:
         return None
 
-    gltf = pygltflib.GLTF2(
-        scene=0,
-        scenes=[pygltflib.Scene(nodes=[0])],
-        nodes=[pygltflib.Node(mesh=0)],
-        meshes=[pygltflib.Mesh(primitives=primitives)],
-        accessors=acc_list,
-        bufferViews=bv_list,
-        buffers=[pygltflib.Buffer(byteLength=len(bin_data))],
-        materials=materials,
-        textures=textures,
-        images=images,
-        samplers=samplers,
-    )
-
-    gltf.set_binary_blob(bytes(bin_data))
+    gltf.gltf["scene"] = 0
+    gltf.add("scenes", {"nodes": [0]})
+    gltf.add("nodes", {"mesh": 0})
+    gltf.add("meshes", {"primitives": primitives})
+
+    if lod_ratios:
+        add_lod_levels(gltf, lod_ratios)
+    if meshopt:
+        apply_meshopt_compression(gltf)
     return gltf
 
 
-def extract_single_doodad(archive_pool, wow_model_path):
+def unwrapped_textures(m2_vertices, local_to_global, indices, submeshes, sub_to_tex):
+    """Texture indices whose UVs stay within 0..1 in every LOD-0 submesh that uses them."""
+    uvs_by_tex = {}
+    for si, sub in enumerate(submeshes):
+        tex_idx = sub_to_tex.get(si, -1)
+        if sub["level"] != 0 or tex_idx < 0:
+            continue
+        uvs = uvs_by_tex.setdefault(tex_idx, [])
+        for i in range(sub["index_start"], sub["index_start"] + sub["index_count"]):
+            uvs.append(m2_vertices[local_to_global[indices[i]]]["uv0"])
+    return {tex_idx for tex_idx, uvs in uvs_by_tex.items() if uvs_in_unit_range(uvs)}
+
+
+def build_texture_atlas(blp_files, texture_codec=None, extent=None, texture_cache=None):
+    """
+    Pack several BLP textures into one encoded atlas image.
+    blp_files: dict texture_index → BLP bytes
+    Returns {"image": (bytes, mime type), "transforms": {tex_idx: (offset_u, offset_v,
+    scale_u, scale_v)}, "uses_alpha": {tex_idx: bool}}, or None if decoding fails or
+    the atlas would be too large.
+    """
+    codec = texture_codec or DEFAULT_TEXTURE_CODEC
+    max_size = texture_size_budget(codec, extent)
+    tex_indices = sorted(blp_files)
+
+    if texture_cache is not None:
+        cache_key = texture_cache.key(b"".join(blp_files[ti] for ti in tex_indices), {
+            "kind": "atlas",
+            "textures": tex_indices,
+            "format": codec["format"],
+            "quality": codec["quality"],
+            "lossless": codec["lossless"],
+            "method": codec["method"],
+            "max_size": max_size,
+            "padding": ATLAS_PADDING,
+        })
+        cached = texture_cache.get(cache_key)
+        if cached:
+            data, meta = cached
+            print(f"  Atlas: cached {meta['mimeType']} ({len(tex_indices)} textures)")
+            return {
+                "image": (data, meta["mimeType"]),
+                "transforms": {int(ti): tuple(t) for ti, t in meta["transforms"].items()},
+                "uses_alpha": {int(ti): a for ti, a in meta["usesAlpha"].items()},
+            }
+
+    try:
+        images = {ti: np.asarray(decode_blp_image(blp_files[ti], max_size)[0]) for ti in tex_indices}
+    except Exception as e:
+        print(f"  Warning: Failed to decode atlas textures: {e}")
+        return None
+    packed = pack_atlas(images)
+    if packed is None:
+        return None
+    atlas_rgba, transforms = packed
+    uses_alpha = {ti: int(img[:, :, 3].min()) < ALPHA_MASK_THRESHOLD for ti, img in images.items()}
+
+    data, mime_type = encode_texture_image(Image.fromarray(atlas_rgba), codec)
+    print(f"  Atlas: {len(tex_indices)} textures -> {atlas_rgba.shape[1]}x{atlas_rgba.shape[0]}")
+    if texture_cache is not None:
+        texture_cache.put(cache_key, data, {
+            "mimeType": mime_type,
+            "transforms": {str(ti): list(t) for ti, t in transforms.items()},
+            "usesAlpha": {str(ti): a for ti, a in uses_alpha.items()},
+        })
+    return {"image": (data, mime_type), "transforms": transforms, "uses_alpha": uses_alpha}
+
+
+def extract_single_doodad(archive_pool, wow_model_path, meshopt=False, texture_store=None,
+                          texture_codec=None, texture_cache=None, atlas=False, lod_ratios=()):
     """
-    Extract a single M2 doodad model and return a pygltflib.GLTF2 object.
+    Extract a single M2 doodad model and return a GLBWriter.
     Returns None on failure.
     archive_pool: MPQArchivePool instance with open archives
+    meshopt: compress geometry with EXT_meshopt_compression
+    texture_store: TextureStore for shared texture files (None = embed PNGs)
+    texture_codec: texture codec dict for convert_blp_texture (None = PNG)
+    texture_cache: TextureCache of converted textures (None = always convert)
+    atlas: pack textures whose UVs stay within 0..1 into one atlas (not for KTX2)
+    lod_ratios: triangle ratios of extra LOD levels (empty = full detail only)
     """
     # Normalize path separators for MPQ
     mpq_path = wow_model_path.replace("/", "\\")
@@ -302,8 +436,10 @@ def extract_single_doodad(archive_pool, wow_model_path):
         print(f"    Failed to parse .skin: {e}")
         return None
 
-    # Build submesh → texture index mapping from batches + texture combos
+    # Build submesh → texture index / render state mappings from batches
+    m2_materials = parse_m2_materials(m2_data)
     sub_to_tex = {}
+    sub_to_render = {}
     for batch in batches:
         sub_idx = batch["skin_section_index"]
         combo_idx = batch["texture_combo_index"]
@@ -311,24 +447,156 @@ def extract_single_doodad(archive_pool, wow_model_path):
         if combo_idx < len(tex_combos):
             tex_idx = tex_combos[combo_idx]
         sub_to_tex[sub_idx] = tex_idx
+        if batch["material_index"] < len(m2_materials):
+            sub_to_render[sub_idx] = m2_materials[batch["material_index"]]
+
+    # Largest bounding box side, for texels-per-unit texture budgets
+    vertex_positions = np.array([v["position"] for v in m2_vertices], dtype=np.float32)
+    extent = float(np.ptp(vertex_positions, axis=0).max())
 
-    # Extract ALL type-0 textures (not just the first)
-    texture_pngs = {}  # tex_index → PNG bytes
+    # Read ALL type-0 textures (not just the first)
+    blp_files = {}  # tex_index → BLP bytes
     for ti, tex in enumerate(m2_textures):
         if tex["type"] == 0 and tex["filename"]:
             tex_mpq_path = tex["filename"].replace("/", "\\")
             blp_data = archive_pool.read_file(tex_mpq_path)
             if blp_data:
-                png = blp_to_png_bytes(blp_data)
-                if png:
-                    texture_pngs[ti] = png
+                blp_files[ti] = blp_data
+
+    # Atlas the textures that never wrap (KTX2 keeps its DXT pass-through instead)
+    texture_atlas = None
+    if atlas and (texture_codec or DEFAULT_TEXTURE_CODEC)["format"] != "ktx2":
+        unwrapped = unwrapped_textures(m2_vertices, local_to_global, indices, submeshes, sub_to_tex)
+        atlas_files = {ti: data for ti, data in blp_files.items() if ti in unwrapped}
+        if len(atlas_files) >= 2:
+            texture_atlas = build_texture_atlas(atlas_files, texture_codec, extent, texture_cache)
+
+    texture_images = {}  # tex_index → (image bytes, mime type, uses_alpha)
+    for ti, blp_data in blp_files.items():
+        if texture_atlas and ti in texture_atlas["transforms"]:
+            continue
+        image = convert_blp_texture(blp_data, texture_codec, extent, texture_cache)
+        if image:
+            texture_images[ti] = image
 
     # Build GLB
     gltf = build_doodad_glb(m2_vertices, local_to_global, indices, submeshes,
-                            texture_pngs, sub_to_tex)
+                            texture_images, sub_to_tex, meshopt=meshopt,
+                            texture_store=texture_store, sub_to_render=sub_to_render,
+                            atlas=texture_atlas, lod_ratios=lod_ratios)
     return gltf
 
 
+def extract_doodad_job(archive_pool, progress, wow_path, instance_count, glb_path, options,
+                       texture_store=None, texture_cache=None):
+    """
+    Collision mesh + GLB for one doodad model (the per-model body of main()).
+    options: {"force", "meshopt", "texture_codec", "atlas", "lod_ratios",
+              "collision_cache" (load_collision_cache() entries, None = disabled)}
+    Returns a picklable result dict: status ("cached", "extracted" or "failed"),
+    GLB size, LOD summary, collision mesh (or None) with the M2's file identity
+    ("collisionSource") and texture store/cache counts for this model.
+    """
+    glb_path = Path(glb_path)
+    short_name = wow_path.rsplit("/", 1)[-1]
+    index_before = set(texture_store.index) if texture_store is not None else set()
+    store_before = (texture_store.written, texture_store.reused) if texture_store is not None else (0, 0)
+    cache_before = (texture_cache.hits, texture_cache.misses) if texture_cache is not None else (0, 0)
+    result = {"status": "failed", "size": 0, "lods": None, "collision": None,
+              "collisionSource": None}
+
+    # Collision data: reuse the cached mesh while the M2's archive is unchanged,
+    # otherwise read the M2 (header + collision arrays)
+    mpq_path = wow_path.replace("/", "\\")
+    if not mpq_path.lower().endswith(".m2"):
+        mpq_path += ".m2"
+    collision_cache = options.get("collision_cache")
+    cached_collision = collision_cache.get(wow_path) if collision_cache is not None else None
+    if collision_cache is not None:
+        result["collisionSource"] = archive_pool.file_identity(mpq_path)
+    if cached_collision is not None and cached_collision["source"] == result["collisionSource"]:
+        result["collision"] = cached_collision["collision"]
+        m2_raw = None
+    else:
+        m2_raw = archive_pool.read_file(mpq_path)
+    if m2_raw and len(m2_raw) >= 0x0F0 and m2_raw[0:4] == b"MD20":
+        try:
+            coll_verts, coll_tris = parse_m2_collision(m2_raw)
+        except Exception as e:
+            print(f"  Warning: Failed to read {short_name} collision mesh: {e}")
+            coll_verts, coll_tris = None, None
+        if coll_verts and coll_tris:
+            # Transform to glTF Y-up: (x,y,z) → (x, z, -y)
+            gltf_verts = []
+            for x, y, z in coll_verts:
+                gltf_verts.extend([round(x, 3), round(z, 3), round(-y, 3)])
+            result["collision"] = {
+                "verts": gltf_verts,
+                "tris": coll_tris,
+            }
+
+    # Check cache unless --force
+    if not options["force"] and glb_path.exists():
+        result["status"] = "cached"
+        result["size"] = glb_path.stat().st_size
+        result["lods"] = lod_summary(read_glb_json(glb_path))
+    else:
+        print(f"{progress} {short_name} ({instance_count} instances)...")
+        try:
+            gltf = extract_single_doodad(archive_pool, wow_path, meshopt=options["meshopt"],
+                                         texture_store=texture_store,
+                                         texture_codec=options["texture_codec"],
+                                         texture_cache=texture_cache,
+                                         atlas=options["atlas"],
+                                         lod_ratios=options["lod_ratios"])
+            if gltf is None:
+                print(f"  SKIP: extraction failed")
+            else:
+                gltf.save(str(glb_path))
+                result["status"] = "extracted"
+                result["size"] = glb_path.stat().st_size
+                print(f"  OK: {result['size'] / 1024:.1f} KB")
+                result["lods"] = lod_summary(gltf.gltf)
+                if result["lods"]:
+                    print("  LODs: " + ", ".join(f"{lod['triangles']} tris (error {lod['error']})"
+                                                  for lod in result["lods"][1:]))
+        except Exception as e:
+            print(f"  ERROR: {e}")
+
+    if texture_store is not None:
+        result["textureIndex"] = {k: v for k, v in texture_store.index.items() if k not in index_before}
+        result["texturesWritten"] = texture_store.written - store_before[0]
+        result["texturesReused"] = texture_store.reused - store_before[1]
+    if texture_cache is not None:
+        result["cacheHits"] = texture_cache.hits - cache_before[0]
+        result["cacheMisses"] = texture_cache.misses - cache_before[1]
+    return result
+
+
+# ── Worker processes (--jobs) ───────────────────────────────────────────────
+
+_worker = {}
+
+
+def _init_doodad_worker(data_dir, doodad_dir, output_dir, texture_dir, texture_index,
+                        texture_cache_dir, options):
+    """Process pool initializer: open this worker's archives, texture store and cache."""
+    storm = StormLib(STORMLIB_DLL)
+    _worker["archive_pool"] = MPQArchivePool(storm, Path(data_dir), MPQ_LOAD_ORDER)
+    _worker["texture_store"] = (TextureStore(texture_dir, doodad_dir, output_dir, texture_index)
+                                if texture_dir is not None else None)
+    _worker["texture_cache"] = (TextureCache(texture_cache_dir)
+                                if texture_cache_dir is not None else None)
+    _worker["options"] = options
+
+
+def _run_doodad_worker(job):
+    progress, wow_path, instance_count, glb_path = job
+    return extract_doodad_job(_worker["archive_pool"], progress, wow_path, instance_count,
+                              glb_path, _worker["options"], _worker["texture_store"],
+                              _worker["texture_cache"])
+
+
 def main():
     parser = argparse.ArgumentParser(description="Batch extract WoW M2 doodads to GLB")
     parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR),
@@ -341,7 +609,30 @@ def main():
                         help="Force re-extraction of existing files")
     parser.add_argument("--limit", type=int,
                         help="Only extract first N models (for testing)")
+    parser.add_argument("--meshopt", action="store_true",
+                        help="Compress geometry with EXT_meshopt_compression")
+    parser.add_argument("--shared-textures", action="store_true",
+                        help="Write textures once to --texture-dir and reference them by URI")
+    parser.add_argument("--texture-dir", default=str(DEFAULT_TEXTURE_DIR),
+                        help="Output directory for shared textures")
+    parser.add_argument("--atlas", action="store_true",
+                        help="Pack each model's non-repeating textures into one atlas "
+                             "(fewer primitives/draw calls; ignored for --texture-format ktx2)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Extract models in N worker processes (each opens its own archives)")
+    parser.add_argument("--collision-cache", default=str(DEFAULT_COLLISION_CACHE),
+                        help="Per-model collision cache, reused while the source archive is unchanged")
+    parser.add_argument("--no-collision-cache", action="store_true",
+                        help="Re-read every M2 for collision data")
+    parser.add_argument("--collider-fit-threshold", type=float, default=COLLIDER_FIT_THRESHOLD,
+                        help="Keep a model's collision trimesh when more than this fraction of the best "
+                             "cylinder/box footprint would be empty (0 = trimesh unless exact, 1 = never)")
+    add_lod_args(parser)
+    add_texture_codec_args(parser)
+    add_texture_cache_args(parser)
     args = parser.parse_args()
+    texture_codec = texture_codec_from_args(args)
+    texture_cache = texture_cache_from_args(args)
 
     data_dir = Path(args.data_dir)
     doodad_json_path = Path(args.doodad_json)
@@ -374,117 +665,137 @@ def main():
         basename = path.rsplit("/", 1)[-1]
         print(f"  {basename}: {count} instances")
 
-    # Initialize StormLib and open all archives
-    print(f"\nLoading StormLib from {STORMLIB_DLL}...")
-    storm = StormLib(STORMLIB_DLL)
-    archive_pool = MPQArchivePool(storm, data_dir, MPQ_LOAD_ORDER)
+    # Shared content-addressed textures (index is kept in the manifest across runs)
+    manifest_path = output_dir / "doodad_manifest.json"
+    existing_manifest = {}
+    if manifest_path.exists():
+        try:
+            existing_manifest = json.loads(manifest_path.read_text())
+        except Exception:
+            pass
+    texture_store = None
+    if args.shared_textures:
+        texture_store = TextureStore(args.texture_dir, doodad_dir, output_dir,
+                                     existing_manifest.get("textures"))
 
-    # Track filename collisions
+    # Resolve GLB filenames up front so collisions resolve the same way for any --jobs
     used_filenames = {}  # sanitized name → wow path
-    manifest = {"models": {}, "totalExtracted": 0, "totalFailed": 0, "totalSkipped": 0}
-    collision_data = {}  # wow_path → { verts: [...], tris: [...] }
-    total_size = 0
-
-    print(f"\n== Extracting {len(unique_models)} doodad models ==")
-    if not args.force:
-        print(f"   (Caching enabled - existing files will be skipped. Use --force to override)\n")
-    else:
-        print(f"   (--force enabled - re-extracting all models)\n")
-
+    jobs = []  # (progress label, wow path, instance count, GLB basename)
     for i, (wow_path, instance_count) in enumerate(unique_models):
         basename = sanitize_model_name(wow_path)
-
-        # Handle filename collisions
         if basename in used_filenames and used_filenames[basename] != wow_path:
             name, ext = basename.rsplit(".", 1)
             counter = 2
             while f"{name}_{counter}.{ext}" in used_filenames:
                 counter += 1
             basename = f"{name}_{counter}.{ext}"
-
         used_filenames[basename] = wow_path
-        glb_path = doodad_dir / basename
+        jobs.append((f"[{i+1}/{len(unique_models)}]", wow_path, instance_count, basename))
+
+    options = {
+        "force": args.force,
+        "meshopt": args.meshopt,
+        "texture_codec": texture_codec,
+        "atlas": args.atlas,
+        "lod_ratios": args.lods,
+        "collision_cache": None if args.no_collision_cache else load_collision_cache(args.collision_cache),
+    }
+    new_collision_cache = {}
+    manifest = {"models": {}, "totalExtracted": 0, "totalFailed": 0, "totalSkipped": 0}
+    collision_data = {}  # wow_path → { verts: [...], tris: [...] }
+    total_size = 0
+
+    print(f"\n== Extracting {len(unique_models)} doodad models ==")
+    if not args.force:
+        print(f"   (Caching enabled - existing files will be skipped. Use --force to override)\n")
+    else:
+        print(f"   (--force enabled - re-extracting all models)\n")
 
-        progress = f"[{i+1}/{len(unique_models)}]"
-        short_name = wow_path.rsplit("/", 1)[-1]
+    executor = None
+    if args.jobs > 1:
+        # Each worker opens its own StormLib + archive pool; results come back in job order
+        print(f"Extracting with {args.jobs} worker processes...")
+        executor = ProcessPoolExecutor(
+            max_workers=args.jobs, initializer=_init_doodad_worker,
+            initargs=(data_dir, doodad_dir, output_dir,
+                      args.texture_dir if texture_store is not None else None,
+                      texture_store.index if texture_store is not None else None,
+                      texture_cache.cache_dir if texture_cache is not None else None,
+                      options))
+        results = executor.map(_run_doodad_worker,
+                                [(progress, wow_path, instance_count, str(doodad_dir / basename))
+                                 for progress, wow_path, instance_count, basename in jobs])
+    else:
+        print(f"\nLoading StormLib from {STORMLIB_DLL}...")
+        storm = StormLib(STORMLIB_DLL)
+        archive_pool = MPQArchivePool(storm, data_dir, MPQ_LOAD_ORDER)
+        results = (extract_doodad_job(archive_pool, progress, wow_path, instance_count,
+                                      doodad_dir / basename, options, texture_store, texture_cache)
+                   for progress, wow_path, instance_count, basename in jobs)
+
+    # Merge per-model results in job order
+    for i, ((progress, wow_path, instance_count, basename), result) in enumerate(zip(jobs, results)):
+        if result["collision"] is not None:
+            collision_data[wow_path] = result["collision"]
+        if result["collisionSource"] is not None:
+            new_collision_cache[wow_path] = {"source": result["collisionSource"],
+                                             "collision": result["collision"]}
+
+        if executor is not None:
+            # Workers have their own store/cache objects; fold their counts into ours
+            if texture_store is not None:
+                texture_store.index.update(result["textureIndex"])
+                texture_store.written += result["texturesWritten"]
+                texture_store.reused += result["texturesReused"]
+            if texture_cache is not None:
+                texture_cache.hits += result["cacheHits"]
+                texture_cache.misses += result["cacheMisses"]
+
+        if result["status"] == "failed":
+            manifest["totalFailed"] += 1
+            continue
 
-        # Always read M2 for collision data (fast - just reads header + collision arrays)
-        mpq_path = wow_path.replace("/", "\\")
-        if not mpq_path.lower().endswith(".m2"):
-            mpq_path += ".m2"
-        m2_raw = archive_pool.read_file(mpq_path)
-        if m2_raw and len(m2_raw) >= 0x0F0 and m2_raw[0:4] == b"MD20":
-            coll_verts, coll_tris = parse_m2_collision(m2_raw)
-            if coll_verts and coll_tris:
-                # Transform to glTF Y-up: (x,y,z) → (x, z, -y)
-                gltf_verts = []
-                for x, y, z in coll_verts:
-                    gltf_verts.extend([round(x, 3), round(z, 3), round(-y, 3)])
-                collision_data[wow_path] = {
-                    "verts": gltf_verts,
-                    "tris": coll_tris,
-                }
-
-        # Check cache unless --force
-        if not args.force and glb_path.exists():
-            file_size = glb_path.stat().st_size
-            total_size += file_size
-            manifest["models"][wow_path] = {
-                "glb": "doodads/" + basename,
-                "instances": instance_count,
-            }
+        total_size += result["size"]
+        manifest["models"][wow_path] = {
+            "glb": "doodads/" + basename,
+            "instances": instance_count,
+        }
+        if result["lods"]:
+            manifest["models"][wow_path]["lods"] = result["lods"]
+        if result["status"] == "cached":
             manifest["totalSkipped"] += 1
             if (i + 1) % 100 == 0:  # Progress update every 100 files
                 print(f"{progress} Checked {i+1} files ({manifest['totalSkipped']} cached)...")
-            continue
-
-        print(f"{progress} {short_name} ({instance_count} instances)...")
-
-        try:
-            gltf = extract_single_doodad(archive_pool, wow_path)
-            if gltf is None:
-                print(f"  SKIP: extraction failed")
-                manifest["totalFailed"] += 1
-                continue
-
-            gltf.save(str(glb_path))
-            file_size = glb_path.stat().st_size
-            total_size += file_size
-            print(f"  OK: {file_size / 1024:.1f} KB")
-
-            manifest["models"][wow_path] = {
-                "glb": "doodads/" + basename,
-                "instances": instance_count,
-            }
+        else:
             manifest["totalExtracted"] += 1
 
-        except Exception as e:
-            print(f"  ERROR: {e}")
-            manifest["totalFailed"] += 1
-            continue
-
-    # Close all archives
-    archive_pool.close_all()
+    if executor is not None:
+        executor.shutdown()
+    else:
+        # Close all archives
+        archive_pool.close_all()
 
     # Preserve existing WMO entries (generated by separate WMO extraction)
-    manifest_path = output_dir / "doodad_manifest.json"
-    if manifest_path.exists():
-        try:
-            existing = json.loads(manifest_path.read_text())
-            if "wmos" in existing:
-                manifest["wmos"] = existing["wmos"]
-        except Exception:
-            pass
+    if "wmos" in existing_manifest:
+        manifest["wmos"] = existing_manifest["wmos"]
+    if texture_store is not None:
+        manifest["textures"] = texture_store.index
+    elif "textures" in existing_manifest:
+        manifest["textures"] = existing_manifest["textures"]
 
     # Write manifest
     with open(manifest_path, "w") as f:
         json.dump(manifest, f, indent=2)
 
     # Write collision data
-    collision_path = output_dir / "collision_data.json"
-    with open(collision_path, "w") as f:
-        json.dump(collision_data, f, separators=(",", ":"))
-    collision_size = collision_path.stat().st_size
+    if options["collision_cache"] is not None:
+        collision_cache_hits = sum(1 for path, entry in new_collision_cache.items()
+                                   if options["collision_cache"].get(path) == entry)
+        # Models outside this run (e.g. --limit) keep their cached entries
+        saved_collision_cache = dict(options["collision_cache"])
+        saved_collision_cache.update(new_collision_cache)
+        save_collision_cache(args.collision_cache, saved_collision_cache)
+    collision_size = write_collision_pack(output_dir, collision_data, args.collider_fit_threshold)
 
     # Count total collision verts/tris across all models
     total_coll_verts = sum(len(v["verts"]) // 3 for v in collision_data.values())
@@ -495,10 +806,19 @@ def main():
     print(f"  Cached (skipped): {manifest['totalSkipped']}")
     print(f"  Failed: {manifest['totalFailed']}")
     print(f"  Total size: {total_size / 1024 / 1024:.1f} MB")
+    if texture_store is not None:
+        print(f"  Shared textures: {texture_store.written} written, {texture_store.reused} reused "
+              f"({len(texture_store.index)} in index)")
+    if texture_cache is not None:
+        print(f"  Texture cache: {texture_cache.summary()}")
     print(f"  Collision: {len(collision_data)}/{len(unique_models)} models with collision meshes")
     print(f"    {total_coll_verts} vertices, {total_coll_tris} triangles ({collision_size / 1024:.1f} KB)")
+    if options["collision_cache"] is not None:
+        print(f"    collision cache: {collision_cache_hits}/{len(new_collision_cache)} models "
+              f"reused without reading the M2")
+    print(f"    colliders: {shape_summary(output_dir)}")
     print(f"  Manifest: {manifest_path}")
-    print(f"  Collision: {collision_path}")
+    print(f"  Collision: {output_dir / COLLISION_INDEX_NAME}, {output_dir / COLLISION_BIN_NAME}")
     print(f"  Output: {doodad_dir}")
 
 
@@ -14,9 +14,20 @@ import os
 import sys
 import numpy as np
 from pathlib import Path
-from PIL import Image
+from PIL import Image, features
 import io
-import pygltflib
+
+from blp import (
+    parse_blp_header, blp_dxt_levels, dxt_min_alpha, select_mip_level, decode_blp,
+    mip_dimensions, ALPHA_ENCODING_DXT1, ALPHA_ENCODING_DXT5,
+)
+from ktx2 import (
+    write_ktx2, VK_FORMAT_BC1_RGB_SRGB_BLOCK, VK_FORMAT_BC1_RGBA_SRGB_BLOCK, VK_FORMAT_BC3_SRGB_BLOCK,
+)
+from texture_cache import add_texture_cache_args, texture_cache_from_args
+from glb_writer import (
+    GLBWriter, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, UNSIGNED_BYTE, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT,
+)
 
 SCRIPT_DIR = Path(__file__).parent
 STORMLIB_DLL = SCRIPT_DIR / "stormlib" / "x64" / "StormLib.dll"
@@ -279,6 +290,22 @@ def parse_m2_textures(data, header_offset=0x050):
     return textures
 
 
+# M2Material render flags / blending modes (shared by WMO MOMT blendMode)
+M2_RENDER_FLAG_TWO_SIDED = 0x04
+BLEND_MODE_OPAQUE = 0
+BLEND_MODE_ALPHA_KEY = 1
+
+
+def parse_m2_materials(data, header_offset=0x070):
+    """Parse M2 materials (render flags + blending mode), indexed by batch material_index."""
+    count, offset = read_m2array(data, header_offset)
+    materials = []
+    for i in range(count):
+        flags, blend_mode = struct.unpack_from("<HH", data, offset + i * 4)
+        materials.append({"flags": flags, "blend_mode": blend_mode})
+    return materials
+
+
 def parse_m2_texture_combos(data, header_offset=0x080):
     """Parse texture lookup table (array of uint16)."""
     count, offset = read_m2array(data, header_offset)
@@ -466,11 +493,41 @@ def decompress_quat(x, y, z, w):
 
 # ── BLP texture handling ─────────────────────────────────────────────────────
 
-def blp_to_png_bytes(blp_data):
-    """Convert BLP texture data to PNG bytes using Pillow."""
+def decode_blp_image(blp_data, max_size=None):
+    """
+    Decode a BLP to an RGBA Pillow image with the NumPy decoder in blp.py.
+    max_size picks the largest stored mip level within that dimension.
+    JPEG BLPs (and anything else blp.py can't decode) go through Pillow at
+    full size. Returns (image, mip level used).
+    """
+    header = parse_blp_header(blp_data)
+    if header is not None:
+        level = select_mip_level(header, max_size)
+        rgba = decode_blp(blp_data, level, header)
+        if rgba is not None:
+            return Image.fromarray(rgba), level
+    return Image.open(io.BytesIO(blp_data)).convert("RGBA"), 0
+
+
+def blp_to_png_bytes(blp_data, cache=None):
+    """Convert BLP texture data to RGBA PNG bytes.
+    cache: optional TextureCache consulted before decoding."""
+    if cache is not None:
+        key = cache.key(blp_data, {"kind": "character", "format": "png"})
+        cached = cache.get(key)
+        if cached:
+            print("  Texture: cached PNG")
+            return cached[0]
+
+    png_data = _blp_to_png_bytes(blp_data)
+    if cache is not None and png_data:
+        cache.put(key, png_data, {"mimeType": "image/png"})
+    return png_data
+
+
+def _blp_to_png_bytes(blp_data):
     try:
-        img = Image.open(io.BytesIO(blp_data))
-        img = img.convert("RGBA")
+        img, _ = decode_blp_image(blp_data)
         print(f"  Texture: {img.width}x{img.height}")
         buf = io.BytesIO()
         img.save(buf, format="PNG")
@@ -480,13 +537,206 @@ def blp_to_png_bytes(blp_data):
         return None
 
 
+# BLP DXT alpha encoding → KTX2 vkFormat. DXT3 (BC2) is left out because
+# three.js' KTX2Loader cannot upload it; those textures fall back to PNG.
+KTX2_DXT_FORMATS = {
+    ALPHA_ENCODING_DXT1: VK_FORMAT_BC1_RGBA_SRGB_BLOCK,
+    ALPHA_ENCODING_DXT5: VK_FORMAT_BC3_SRGB_BLOCK,
+}
+# DXT1 BLPs without an alpha plane (alphaDepth 0) are opaque BC1
+KTX2_DXT1_OPAQUE_FORMAT = VK_FORMAT_BC1_RGB_SRGB_BLOCK
+
+TEXTURE_FORMATS = ("png", "webp", "ktx2")
+
+# Texels below this alpha are cut by an alphaMode MASK material (alphaCutoff 0.5)
+ALPHA_CUTOFF = 0.5
+ALPHA_MASK_THRESHOLD = int(ALPHA_CUTOFF * 255) + 1
+
+# Model texture codec settings (see add_texture_codec_args)
+DEFAULT_TEXTURE_CODEC = {
+    "format": "png",     # png | webp | ktx2
+    "quality": 90,       # WebP lossy quality 0-100
+    "lossless": False,   # WebP lossless instead of lossy
+    "method": 4,         # WebP effort 0 (fast) - 6 (smallest)
+    "max_size": None,    # largest texture dimension kept, None = full size
+    "texels_per_unit": None,  # texture budget per yard of mesh extent, None = off
+}
+
+# Texel-density budgets never pick a mip smaller than this
+MIN_BUDGET_TEXTURE_SIZE = 16
+
+
+def add_texture_codec_args(parser):
+    """Add the model texture codec options to an argparse parser."""
+    parser.add_argument("--texture-format", choices=TEXTURE_FORMATS,
+                        default=DEFAULT_TEXTURE_CODEC["format"],
+                        help="Model texture format: png, webp (EXT_texture_webp) or "
+                             "ktx2 (DXT pass-through, PNG fallback)")
+    parser.add_argument("--webp-quality", type=int, default=DEFAULT_TEXTURE_CODEC["quality"],
+                        help="Lossy WebP quality 0-100")
+    parser.add_argument("--webp-lossless", action="store_true",
+                        help="Encode WebP textures losslessly")
+    parser.add_argument("--webp-method", type=int, choices=range(7),
+                        default=DEFAULT_TEXTURE_CODEC["method"],
+                        help="WebP encoder effort, 0 = fastest, 6 = smallest")
+    parser.add_argument("--max-texture-size", type=int, default=DEFAULT_TEXTURE_CODEC["max_size"],
+                        help="Use the largest BLP mip level no bigger than this (e.g. 256)")
+    parser.add_argument("--texels-per-unit", type=float,
+                        default=DEFAULT_TEXTURE_CODEC["texels_per_unit"],
+                        help="Texture budget in texels per yard of the mesh bounding box; "
+                             "picks a smaller BLP mip level for small props")
+
+
+def texture_codec_from_args(args):
+    """Build a texture codec dict from parsed add_texture_codec_args options."""
+    return {
+        "format": args.texture_format,
+        "quality": args.webp_quality,
+        "lossless": args.webp_lossless,
+        "method": args.webp_method,
+        "max_size": args.max_texture_size,
+        "texels_per_unit": args.texels_per_unit,
+    }
+
+
+def texture_size_budget(codec, extent=None):
+    """
+    Largest texture dimension allowed by the codec's texture budget, or None
+    for no limit. extent is the largest side of the mesh bounding box in yards;
+    texels_per_unit budgets round up to the next power of two so the chosen mip
+    never falls below the requested density.
+    """
+    codec = codec or DEFAULT_TEXTURE_CODEC
+    budget = codec.get("max_size")
+    density = codec.get("texels_per_unit")
+    if density and extent:
+        texels = max(MIN_BUDGET_TEXTURE_SIZE, int(np.ceil(extent * density)))
+        texels = 1 << (texels - 1).bit_length()
+        budget = texels if budget is None else min(budget, texels)
+    return budget
+
+
+def blp_to_ktx2_bytes(blp_data, max_size=None):
+    """Copy a DXT1/DXT5 BLP's compressed mip chain into a KTX2 file without decoding.
+    max_size drops the leading mips larger than that dimension.
+    Returns (ktx2 bytes, min alpha of the top level), or None if the BLP can't be
+    passed through (not DXT, DXT3, incomplete mips). Like decode_blp, a header
+    alphaDepth of 0 makes the texture opaque (min alpha 255)."""
+    header = parse_blp_header(blp_data)
+    dxt = blp_dxt_levels(blp_data, header)
+    if dxt is None:
+        return None
+    alpha_encoding, width, height, levels = dxt
+    vk_format = KTX2_DXT_FORMATS.get(alpha_encoding)
+    if vk_format is None:
+        return None
+    opaque = header["alphaDepth"] == 0
+    if opaque and alpha_encoding == ALPHA_ENCODING_DXT1:
+        vk_format = KTX2_DXT1_OPAQUE_FORMAT
+
+    # WebGL only accepts S3TC level 0 sizes that are multiples of the 4x4 block
+    first = min(select_mip_level(header, max_size), len(levels) - 1)
+    while first > 0 and any(d % 4 for d in mip_dimensions(width, height, first)):
+        first -= 1
+    top_width, top_height = mip_dimensions(width, height, first)
+    if top_width % 4 or top_height % 4:
+        return None
+    levels = levels[first:]
+
+    if first:
+        print(f"  Texture: {width}x{height} -> mip {first} {top_width}x{top_height} "
+              f"DXT pass-through ({len(levels)} mips)")
+    else:
+        print(f"  Texture: {width}x{height} DXT pass-through ({len(levels)} mips)")
+    min_alpha = 255 if opaque else dxt_min_alpha(alpha_encoding, levels[0])
+    return write_ktx2(vk_format, top_width, top_height, levels), min_alpha
+
+
+def encode_texture_image(img, codec):
+    """
+    Encode a Pillow image with the given codec. Returns (bytes, mime_type).
+    Textures whose alpha is fully opaque are stored without an alpha channel.
+    """
+    if img.mode == "RGBA" and img.getextrema()[3] == (255, 255):
+        img = img.convert("RGB")
+
+    buf = io.BytesIO()
+    if codec["format"] == "webp" and features.check("webp"):
+        img.save(buf, format="WEBP", quality=codec["quality"],
+                 lossless=codec["lossless"], method=codec["method"])
+        return buf.getvalue(), "image/webp"
+    img.save(buf, format="PNG")
+    return buf.getvalue(), "image/png"
+
+
+def convert_blp_texture(blp_data, codec=None, extent=None, cache=None):
+    """
+    Convert BLP data to an image for a GLB.
+    Returns (bytes, mime_type, uses_alpha) or None, where uses_alpha is True if
+    any texel would be cut by an ALPHA_CUTOFF mask (i.e. alpha testing matters).
+    codec: texture codec dict (default DEFAULT_TEXTURE_CODEC). Format "ktx2"
+    passes DXT blocks through where possible and otherwise falls back to PNG.
+    extent: largest mesh bounding box side in yards, for texels_per_unit budgets.
+    With a texture budget the matching stored mip level is used directly, so the
+    full-size level is never decoded.
+    cache: optional TextureCache; hits skip decoding and encoding entirely.
+    """
+    codec = codec or DEFAULT_TEXTURE_CODEC
+    max_size = texture_size_budget(codec, extent)
+    if cache is None:
+        return _convert_blp_texture(blp_data, codec, max_size)
+
+    settings = {
+        "kind": "model",
+        "format": codec["format"],
+        "quality": codec["quality"],
+        "lossless": codec["lossless"],
+        "method": codec["method"],
+        "max_size": max_size,
+    }
+    key = cache.key(blp_data, settings)
+    cached = cache.get(key)
+    if cached:
+        data, meta = cached
+        print(f"  Texture: cached {meta['mimeType']}")
+        return data, meta["mimeType"], meta["usesAlpha"]
+
+    image = _convert_blp_texture(blp_data, codec, max_size)
+    if image:
+        data, mime_type, uses_alpha = image
+        cache.put(key, data, {"mimeType": mime_type, "usesAlpha": uses_alpha})
+    return image
+
+
+def _convert_blp_texture(blp_data, codec, max_size):
+    if codec["format"] == "ktx2":
+        ktx2 = blp_to_ktx2_bytes(blp_data, max_size)
+        if ktx2:
+            ktx2_data, min_alpha = ktx2
+            return ktx2_data, "image/ktx2", min_alpha < ALPHA_MASK_THRESHOLD
+        codec = dict(DEFAULT_TEXTURE_CODEC, max_size=max_size)
+
+    try:
+        img, level = decode_blp_image(blp_data, max_size)
+        if level:
+            print(f"  Texture: {img.width}x{img.height} (mip {level})")
+        else:
+            print(f"  Texture: {img.width}x{img.height}")
+        min_alpha = img.getextrema()[3][0]
+        data, mime_type = encode_texture_image(img, codec)
+        return data, mime_type, min_alpha < ALPHA_MASK_THRESHOLD
+    except Exception as e:
+        print(f"  Warning: Failed to convert BLP texture: {e}")
+        return None
+
+
 # ── glTF construction ────────────────────────────────────────────────────────
 
 def build_glb(m2_vertices, local_to_global, indices, submeshes, texture_pngs=None,
               geoset_filter=None, bones=None, sequences=None):
     """
     Build a GLB file from parsed M2 + skin data, optionally with skeletal animation.
-    Returns a pygltflib.GLTF2 object.
+    Returns a GLBWriter.
     """
     has_skeleton = bones is not None and len(bones) > 0
     num_bones = len(bones) if has_skeleton else 0
@@ -549,126 +799,66 @@ def build_glb(m2_vertices, local_to_global, indices, submeshes, texture_pngs=Non
         joints_arr = np.array(all_joints, dtype=np.uint8)
         weights_arr = np.array(all_weights, dtype=np.float32)
 
-    def pad4(b):
-        rem = len(b) % 4
-        return b + b"\x00" * (4 - rem) if rem else b
-
-    # ── Binary buffer (bytearray for easy appending) ─────────────────────
-    bin_data = bytearray()
-
-    def append_bin(data_bytes):
-        """Append padded data to bin_data, return its starting offset."""
-        offset = len(bin_data)
-        bin_data.extend(pad4(data_bytes))
-        return offset
-
-    body_idx_offset = append_bin(body_idx_arr.tobytes())
-    hair_idx_offset = append_bin(hair_idx_arr.tobytes()) if hair_idx_arr is not None else 0
-    pos_offset = append_bin(positions.tobytes())
-    norm_offset = append_bin(normals.tobytes())
-    uv_offset = append_bin(uvs.tobytes())
-    joints_offset = append_bin(joints_arr.tobytes()) if has_skeleton else 0
-    weights_offset = append_bin(weights_arr.tobytes()) if has_skeleton else 0
-
-    # Inverse bind matrices
-    ibm_offset = 0
+    gltf = GLBWriter()
+
+    # ── Buffer views + accessors ─────────────────────────────────────────
+    idx_ct = UNSIGNED_SHORT if idx_type == np.uint16 else UNSIGNED_INT
+
+    body_idx_acc = gltf.add_accessor(
+        gltf.add_buffer_view(body_idx_arr, target=ELEMENT_ARRAY_BUFFER), idx_ct,
+        len(body_idx_arr), "SCALAR", max=[int(body_idx_arr.max())], min=[int(body_idx_arr.min())])
+    hair_idx_acc = None
+    if hair_idx_arr is not None and len(hair_idx_arr) > 0:
+        hair_idx_acc = gltf.add_accessor(
+            gltf.add_buffer_view(hair_idx_arr, target=ELEMENT_ARRAY_BUFFER), idx_ct,
+            len(hair_idx_arr), "SCALAR", max=[int(hair_idx_arr.max())], min=[int(hair_idx_arr.min())])
+    pos_acc = gltf.add_accessor(
+        gltf.add_buffer_view(positions, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+        num_verts, "VEC3", max=positions.max(axis=0).tolist(), min=positions.min(axis=0).tolist())
+    norm_acc = gltf.add_accessor(
+        gltf.add_buffer_view(normals, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+        num_verts, "VEC3")
+    uv_acc = gltf.add_accessor(
+        gltf.add_buffer_view(uvs, target=ARRAY_BUFFER, byte_stride=8), FLOAT,
+        num_verts, "VEC2")
+
     if has_skeleton:
+        joints_acc = gltf.add_accessor(
+            gltf.add_buffer_view(joints_arr, target=ARRAY_BUFFER, byte_stride=4), UNSIGNED_BYTE,
+            num_verts, "VEC4")
+        weights_acc = gltf.add_accessor(
+            gltf.add_buffer_view(weights_arr, target=ARRAY_BUFFER, byte_stride=16), FLOAT,
+            num_verts, "VEC4")
+
+        # Inverse bind matrices
         ibm_floats = []
         for bone in bones:
             px, py, pz = wow_to_gltf_pos(*bone["pivot"])
             # IBM = T(-pivot) in column-major layout
             ibm_floats.extend([1, 0, 0, 0,  0, 1, 0, 0,  0, 0, 1, 0,  -px, -py, -pz, 1])
-        ibm_offset = append_bin(np.array(ibm_floats, dtype=np.float32).tobytes())
+        ibm_acc = gltf.add_accessor(
+            gltf.add_buffer_view(np.array(ibm_floats, dtype=np.float32)), FLOAT,
+            num_bones, "MAT4")
 
     # Texture image data
-    tex_offset = 0
     has_texture = texture_pngs and len(texture_pngs) > 0 and texture_pngs[0] is not None
     if has_texture:
-        tex_offset = append_bin(texture_pngs[0])
-
-    # ── Buffer views ─────────────────────────────────────────────────────
-    pos_min = positions.min(axis=0).tolist()
-    pos_max = positions.max(axis=0).tolist()
-    idx_ct = 5123 if idx_type == np.uint16 else 5125
-
-    bv_list = [
-        pygltflib.BufferView(buffer=0, byteOffset=body_idx_offset,
-                             byteLength=len(body_idx_arr) * body_idx_arr.itemsize, target=34963),
-    ]
-    hair_idx_bv = None
-    if hair_idx_arr is not None and len(hair_idx_arr) > 0:
-        hair_idx_bv = len(bv_list)
-        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=hair_idx_offset,
-                       byteLength=len(hair_idx_arr) * hair_idx_arr.itemsize, target=34963))
-    pos_bv = len(bv_list)
-    bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=pos_offset,
-                   byteLength=num_verts * 12, target=34962, byteStride=12))
-    norm_bv = len(bv_list)
-    bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=norm_offset,
-                   byteLength=num_verts * 12, target=34962, byteStride=12))
-    uv_bv = len(bv_list)
-    bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=uv_offset,
-                   byteLength=num_verts * 8, target=34962, byteStride=8))
-
-    if has_skeleton:
-        joints_bv = len(bv_list)
-        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=joints_offset,
-                       byteLength=num_verts * 4, target=34962, byteStride=4))
-        weights_bv = len(bv_list)
-        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=weights_offset,
-                       byteLength=num_verts * 16, target=34962, byteStride=16))
-        ibm_bv = len(bv_list)
-        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=ibm_offset,
-                       byteLength=num_bones * 64))
-
-    # ── Accessors ────────────────────────────────────────────────────────
-    acc_list = [
-        pygltflib.Accessor(bufferView=0, componentType=idx_ct,
-                           count=len(body_idx_arr), type="SCALAR",
-                           max=[int(body_idx_arr.max())], min=[int(body_idx_arr.min())]),
-    ]
-    hair_idx_acc = None
-    if hair_idx_arr is not None and len(hair_idx_arr) > 0:
-        hair_idx_acc = len(acc_list)
-        acc_list.append(pygltflib.Accessor(bufferView=hair_idx_bv, componentType=idx_ct,
-                        count=len(hair_idx_arr), type="SCALAR",
-                        max=[int(hair_idx_arr.max())], min=[int(hair_idx_arr.min())]))
-    pos_acc = len(acc_list)
-    acc_list.append(pygltflib.Accessor(bufferView=pos_bv, componentType=5126,
-                    count=num_verts, type="VEC3", max=pos_max, min=pos_min))
-    norm_acc = len(acc_list)
-    acc_list.append(pygltflib.Accessor(bufferView=norm_bv, componentType=5126,
-                    count=num_verts, type="VEC3"))
-    uv_acc = len(acc_list)
-    acc_list.append(pygltflib.Accessor(bufferView=uv_bv, componentType=5126,
-                    count=num_verts, type="VEC2"))
-
-    if has_skeleton:
-        joints_acc = len(acc_list)
-        acc_list.append(pygltflib.Accessor(bufferView=joints_bv, componentType=5121,
-                        count=num_verts, type="VEC4"))
-        weights_acc = len(acc_list)
-        acc_list.append(pygltflib.Accessor(bufferView=weights_bv, componentType=5126,
-                        count=num_verts, type="VEC4"))
-        ibm_acc = len(acc_list)
-        acc_list.append(pygltflib.Accessor(bufferView=ibm_bv, componentType=5126,
-                        count=num_bones, type="MAT4"))
+        gltf.add_image(texture_pngs[0])
 
     # ── Mesh primitives ──────────────────────────────────────────────────
-    attrs = pygltflib.Attributes(POSITION=pos_acc, NORMAL=norm_acc, TEXCOORD_0=uv_acc)
+    attrs = {"POSITION": pos_acc, "NORMAL": norm_acc, "TEXCOORD_0": uv_acc}
     if has_skeleton:
-        attrs.JOINTS_0 = joints_acc
-        attrs.WEIGHTS_0 = weights_acc
+        attrs["JOINTS_0"] = joints_acc
+        attrs["WEIGHTS_0"] = weights_acc
 
-    primitives = [pygltflib.Primitive(attributes=attrs, indices=0, material=0)]
+    primitives = [{"attributes": attrs, "indices": body_idx_acc, "material": 0}]
     if hair_idx_acc is not None:
-        primitives.append(pygltflib.Primitive(attributes=attrs, indices=hair_idx_acc, material=1))
+        primitives.append({"attributes": attrs, "indices": hair_idx_acc, "material": 1})
 
     # ── Nodes: [mesh_node, bone_0, bone_1, ...] ─────────────────────────
-    nodes = []
     if has_skeleton:
         root_bone_nodes = [i + 1 for i, b in enumerate(bones) if b["parent"] == -1]
-        nodes.append(pygltflib.Node(mesh=0, skin=0, children=root_bone_nodes))
+        gltf.add("nodes", {"mesh": 0, "skin": 0, "children": root_bone_nodes})
         for i, bone in enumerate(bones):
             px, py, pz = wow_to_gltf_pos(*bone["pivot"])
             if bone["parent"] >= 0:
@@ -677,25 +867,24 @@ def build_glb(m2_vertices, local_to_global, indices, submeshes, texture_pngs=Non
             else:
                 tx, ty, tz = px, py, pz
             children = [j + 1 for j, b in enumerate(bones) if b["parent"] == i]
-            node = pygltflib.Node(name=f"Bone_{i}", translation=[tx, ty, tz],
-                                  rotation=[0, 0, 0, 1], scale=[1, 1, 1])
+            node = {"name": f"Bone_{i}", "translation": [tx, ty, tz],
+                    "rotation": [0, 0, 0, 1], "scale": [1, 1, 1]}
             if children:
-                node.children = children
-            nodes.append(node)
+                node["children"] = children
+            gltf.add("nodes", node)
     else:
-        nodes.append(pygltflib.Node(mesh=0))
+        gltf.add("nodes", {"mesh": 0})
 
     # ── Skin ─────────────────────────────────────────────────────────────
-    skins = []
     if has_skeleton:
         first_root = next((i + 1 for i, b in enumerate(bones) if b["parent"] == -1), 1)
-        skins.append(pygltflib.Skin(
-            joints=list(range(1, num_bones + 1)),
-            inverseBindMatrices=ibm_acc,
-            skeleton=first_root))
+        gltf.add("skins", {
+            "joints": list(range(1, num_bones + 1)),
+            "inverseBindMatrices": ibm_acc,
+            "skeleton": first_root,
+        })
 
     # ── Animations ───────────────────────────────────────────────────────
-    gltf_animations = []
     if has_skeleton and sequences:
         for seq in sequences:
             if seq["id"] not in WANTED_ANIMATION_IDS or seq["variation"] != 0:
@@ -720,25 +909,14 @@ def build_glb(m2_vertices, local_to_global, indices, submeshes, texture_pngs=Non
                             vals.extend([gx, gy, gz, gw])
                         val_arr = np.array(vals, dtype=np.float32)
 
-                        ts_bvi = len(bv_list)
-                        ts_off = append_bin(ts.tobytes())
-                        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=ts_off, byteLength=n_kf * 4))
-                        val_bvi = len(bv_list)
-                        val_off = append_bin(val_arr.tobytes())
-                        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=val_off, byteLength=n_kf * 16))
-
-                        ts_ai = len(acc_list)
-                        acc_list.append(pygltflib.Accessor(bufferView=ts_bvi, componentType=5126,
-                                        count=n_kf, type="SCALAR",
-                                        max=[float(ts.max())], min=[float(ts.min())]))
-                        val_ai = len(acc_list)
-                        acc_list.append(pygltflib.Accessor(bufferView=val_bvi, componentType=5126,
-                                        count=n_kf, type="VEC4"))
+                        ts_ai = gltf.add_accessor(gltf.add_buffer_view(ts), FLOAT, n_kf, "SCALAR",
+                                                  max=[float(ts.max())], min=[float(ts.min())])
+                        val_ai = gltf.add_accessor(gltf.add_buffer_view(val_arr), FLOAT, n_kf, "VEC4")
 
                         si = len(samplers)
-                        samplers.append(pygltflib.AnimationSampler(input=ts_ai, output=val_ai, interpolation="LINEAR"))
-                        channels.append(pygltflib.AnimationChannel(sampler=si,
-                                        target=pygltflib.AnimationChannelTarget(node=joint_node_idx, path="rotation")))
+                        samplers.append({"input": ts_ai, "output": val_ai, "interpolation": "LINEAR"})
+                        channels.append({"sampler": si,
+                                         "target": {"node": joint_node_idx, "path": "rotation"}})
 
                 # ── Translation channel ──
                 if seq_idx in bone["translation"]:
@@ -760,73 +938,50 @@ def build_glb(m2_vertices, local_to_global, indices, submeshes, texture_pngs=Non
                             vals.extend([poff[0] + gx, poff[1] + gy, poff[2] + gz])
                         val_arr = np.array(vals, dtype=np.float32)
 
-                        ts_bvi = len(bv_list)
-                        ts_off = append_bin(ts.tobytes())
-                        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=ts_off, byteLength=n_kf * 4))
-                        val_bvi = len(bv_list)
-                        val_off = append_bin(val_arr.tobytes())
-                        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=val_off, byteLength=n_kf * 12))
-
-                        ts_ai = len(acc_list)
-                        acc_list.append(pygltflib.Accessor(bufferView=ts_bvi, componentType=5126,
-                                        count=n_kf, type="SCALAR",
-                                        max=[float(ts.max())], min=[float(ts.min())]))
-                        val_ai = len(acc_list)
-                        acc_list.append(pygltflib.Accessor(bufferView=val_bvi, componentType=5126,
-                                        count=n_kf, type="VEC3"))
+                        ts_ai = gltf.add_accessor(gltf.add_buffer_view(ts), FLOAT, n_kf, "SCALAR",
+                                                  max=[float(ts.max())], min=[float(ts.min())])
+                        val_ai = gltf.add_accessor(gltf.add_buffer_view(val_arr), FLOAT, n_kf, "VEC3")
 
                         si = len(samplers)
-                        samplers.append(pygltflib.AnimationSampler(input=ts_ai, output=val_ai, interpolation="LINEAR"))
-                        channels.append(pygltflib.AnimationChannel(sampler=si,
-                                        target=pygltflib.AnimationChannelTarget(node=joint_node_idx, path="translation")))
+                        samplers.append({"input": ts_ai, "output": val_ai, "interpolation": "LINEAR"})
+                        channels.append({"sampler": si,
+                                         "target": {"node": joint_node_idx, "path": "translation"}})
 
             if channels:
-                gltf_animations.append(pygltflib.Animation(
-                    name=anim_name, channels=channels, samplers=samplers))
+                gltf.add("animations", {"name": anim_name, "channels": channels, "samplers": samplers})
                 print(f"  Animation '{anim_name}': {len(channels)} channels, {seq['duration']}ms")
 
     # ── Assemble glTF ────────────────────────────────────────────────────
-    gltf = pygltflib.GLTF2(
-        scene=0,
-        scenes=[pygltflib.Scene(nodes=[0])],
-        nodes=nodes,
-        meshes=[pygltflib.Mesh(primitives=primitives)],
-        skins=skins,
-        animations=gltf_animations,
-        accessors=acc_list,
-        bufferViews=bv_list,
-        buffers=[pygltflib.Buffer(byteLength=len(bin_data))],
-        materials=[], textures=[], images=[], samplers=[],
-    )
+    gltf.gltf["scene"] = 0
+    gltf.add("scenes", {"nodes": [0]})
+    gltf.add("meshes", {"primitives": primitives})
 
     # Material 0: body with skin texture
     if has_texture:
-        gltf.bufferViews.append(
-            pygltflib.BufferView(buffer=0, byteOffset=tex_offset,
-                                 byteLength=len(texture_pngs[0])))
-        gltf.images.append(pygltflib.Image(bufferView=len(gltf.bufferViews) - 1, mimeType="image/png"))
-        gltf.samplers.append(pygltflib.Sampler(magFilter=9729, minFilter=9987, wrapS=10497, wrapT=10497))
-        gltf.textures.append(pygltflib.Texture(source=0, sampler=0))
-        gltf.materials.append(pygltflib.Material(
-            pbrMetallicRoughness=pygltflib.PbrMetallicRoughness(
-                baseColorTexture=pygltflib.TextureInfo(index=0),
-                metallicFactor=0.0, roughnessFactor=0.8),
-            doubleSided=True))
+        gltf.add("samplers", {"magFilter": 9729, "minFilter": 9987, "wrapS": 10497, "wrapT": 10497})
+        gltf.add("textures", {"source": 0, "sampler": 0})
+        gltf.add("materials", {
+            "pbrMetallicRoughness": {
+                "baseColorTexture": {"index": 0},
+                "metallicFactor": 0.0, "roughnessFactor": 0.8},
+            "doubleSided": True,
+        })
     else:
-        gltf.materials.append(pygltflib.Material(
-            pbrMetallicRoughness=pygltflib.PbrMetallicRoughness(
-                baseColorFactor=[0.76, 0.60, 0.47, 1.0],
-                metallicFactor=0.0, roughnessFactor=0.8),
-            doubleSided=True))
+        gltf.add("materials", {
+            "pbrMetallicRoughness": {
+                "baseColorFactor": [0.76, 0.60, 0.47, 1.0],
+                "metallicFactor": 0.0, "roughnessFactor": 0.8},
+            "doubleSided": True,
+        })
 
     # Material 1: hair (dark brown)
-    gltf.materials.append(pygltflib.Material(
-        pbrMetallicRoughness=pygltflib.PbrMetallicRoughness(
-            baseColorFactor=[0.20, 0.12, 0.06, 1.0],
-            metallicFactor=0.0, roughnessFactor=0.9),
-        doubleSided=True))
+    gltf.add("materials", {
+        "pbrMetallicRoughness": {
+            "baseColorFactor": [0.20, 0.12, 0.06, 1.0],
+            "metallicFactor": 0.0, "roughnessFactor": 0.9},
+        "doubleSided": True,
+    })
 
-    gltf.set_binary_blob(bytes(bin_data))
     return gltf
 
 
@@ -899,7 +1054,9 @@ def main():
         required=True,
         help="Output .glb file path",
     )
+    add_texture_cache_args(parser)
     args = parser.parse_args()
+    texture_cache = texture_cache_from_args(args)
 
     data_dir = Path(args.data_dir)
     model_path = args.model
@@ -965,7 +1122,7 @@ def main():
             print(f"\nTrying skin texture {tex_path}...")
             blp_data = archive_pool.read_file(tex_path)
             if blp_data:
-                png_data = blp_to_png_bytes(blp_data)
+                png_data = blp_to_png_bytes(blp_data, texture_cache)
                 if png_data:
                     texture_pngs.append(png_data)
                     break
@@ -977,7 +1134,7 @@ def main():
                 print(f"\nExtracting texture {tex['filename']}...")
                 blp_data = archive_pool.read_file(tex["filename"])
                 if blp_data:
-                    png_data = blp_to_png_bytes(blp_data)
+                    png_data = blp_to_png_bytes(blp_data, texture_cache)
                     if png_data:
                         texture_pngs.append(png_data)
                         break
@@ -1011,6 +1168,8 @@ def main():
     gltf.save(str(output_path))
     file_size = output_path.stat().st_size
     print(f"Done! Output: {output_path} ({file_size / 1024:.1f} KB)")
+    if texture_cache is not None:
+        print(f"Texture cache: {texture_cache.summary()}")
 
     # Close all archives
     archive_pool.close_all()
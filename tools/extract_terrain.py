@@ -210,130 +210,139 @@ def parse_wdt(data):
 
 # ── ADT Parser ────────────────────────────────────────────────────────────
 
+def fourcc(name):
+    """Chunk ID as chunk_table returns it: b"MCNK" is stored as b"KNCM", i.e. LE uint32."""
+    return int.from_bytes(name, "big")
+
+
+CHUNK_HEADER = struct.Struct("<II")  # (chunk ID, size)
+CHUNK_ID = struct.Struct("<I")
+
+MTEX, MCNK = fourcc(b"MTEX"), fourcc(b"MCNK")
+MMDX, MMID, MDDF = fourcc(b"MMDX"), fourcc(b"MMID"), fourcc(b"MDDF")
+MWMO, MWID, MODF = fourcc(b"MWMO"), fourcc(b"MWID"), fourcc(b"MODF")
+MCVT, MCLY, MCAL = fourcc(b"MCVT"), fourcc(b"MCLY"), fourcc(b"MCAL")
+
+# MDDF/MODF placement records (wowdev.wiki ADT/v18), decoded in place
+MDDF_DTYPE = np.dtype([
+    ("nameId", "<u4"), ("uniqueId", "<u4"),
+    ("position", "<f4", 3), ("rotation", "<f4", 3),
+    ("scale", "<u2"), ("flags", "<u2"),
+])  # 36 bytes
+MODF_DTYPE = np.dtype([
+    ("nameId", "<u4"), ("uniqueId", "<u4"),
+    ("position", "<f4", 3), ("rotation", "<f4", 3),
+    ("extentsLo", "<f4", 3), ("extentsHi", "<f4", 3),
+    ("flags", "<u2"), ("doodadSet", "<u2"), ("nameSet", "<u2"), ("scale", "<u2"),
+])  # 64 bytes
+
+
+def chunk_table(data):
+    """
+    One pass over the top-level chunks of data: list of (chunk ID, data offset,
+    size), with IDs compared against fourcc() constants instead of sliced bytes.
+    """
+    table = []
+    pos = 0
+    end = len(data)
+    while pos + 8 <= end:
+        magic, size = CHUNK_HEADER.unpack_from(data, pos)
+        table.append((magic, pos + 8, size))
+        pos += 8 + size
+    return table
+
+
 def parse_adt(data):
-    """Parse ADT file. Return (mtex_list, mcnk_list, doodad_info, wmo_info)."""
+    """
+    Parse ADT file. Return (mtex_list, mcnk_list, doodad_info, wmo_info).
+    doodad_info / wmo_info: {"entries": MDDF_DTYPE / MODF_DTYPE structured array
+    (a view into data), "modelPaths": model filename per entry, "count"}.
+    """
+    view = memoryview(data)
     mtex_list = []
     mcnk_list = []
 
     # Doodad-related chunks
     mmdx_data = None    # raw concatenated null-terminated M2 filenames
     mmid_offsets = []   # u32 offsets into mmdx_data
-    mddf_entries = []   # parsed MDDF placement records
+    mddf_entries = np.zeros(0, dtype=MDDF_DTYPE)
 
     # WMO-related chunks
     mwmo_data = None    # raw concatenated null-terminated WMO filenames
     mwid_offsets = []   # u32 offsets into mwmo_data
-    modf_entries = []   # parsed MODF placement records
-
-    for magic, data_ofs, size in scan_chunks(data):
-        if magic == b"MTEX":
-            # Concatenated null-terminated texture filenames
-            tex_data = data[data_ofs:data_ofs + size]
-            names = tex_data.split(b"\x00")
-            mtex_list = [n.decode("ascii", errors="replace") for n in names if n]
+    modf_entries = np.zeros(0, dtype=MODF_DTYPE)
 
-        elif magic == b"MCNK":
-            mcnk = parse_mcnk(data, data_ofs, size)
+    for magic, data_ofs, size in chunk_table(view):
+        if magic == MCNK:
+            mcnk = parse_mcnk(view, data_ofs, size)
             if mcnk:
                 mcnk_list.append(mcnk)
 
+        elif magic == MTEX:
+            # Concatenated null-terminated texture filenames
+            names = bytes(view[data_ofs:data_ofs + size]).split(b"\x00")
+            mtex_list = [n.decode("ascii", errors="replace") for n in names if n]
+
         # -- Doodad chunks --
-        elif magic == b"MMDX":
-            mmdx_data = data[data_ofs:data_ofs + size]
-
-        elif magic == b"MMID":
-            count = size // 4
-            mmid_offsets = list(struct.unpack_from(f"<{count}I", data, data_ofs))
-
-        elif magic == b"MDDF":
-            entry_size = 36
-            count = size // entry_size
-            for i in range(count):
-                ofs = data_ofs + i * entry_size
-                name_id, unique_id = struct.unpack_from("<II", data, ofs)
-                pos = struct.unpack_from("<3f", data, ofs + 8)
-                rot = struct.unpack_from("<3f", data, ofs + 20)
-                scale, flags = struct.unpack_from("<HH", data, ofs + 32)
-                mddf_entries.append({
-                    "nameId": name_id,
-                    "uniqueId": unique_id,
-                    "position": pos,
-                    "rotation": rot,
-                    "scale": scale,
-                    "flags": flags,
-                })
+        elif magic == MMDX:
+            mmdx_data = bytes(view[data_ofs:data_ofs + size])
 
-        # -- WMO chunks --
-        elif magic == b"MWMO":
-            mwmo_data = data[data_ofs:data_ofs + size]
-
-        elif magic == b"MWID":
-            count = size // 4
-            mwid_offsets = list(struct.unpack_from(f"<{count}I", data, data_ofs))
-
-        elif magic == b"MODF":
-            entry_size = 64
-            count = size // entry_size
-            for i in range(count):
-                ofs = data_ofs + i * entry_size
-                name_id, unique_id = struct.unpack_from("<II", data, ofs)
-                pos = struct.unpack_from("<3f", data, ofs + 8)
-                rot = struct.unpack_from("<3f", data, ofs + 20)
-                ext_lo = struct.unpack_from("<3f", data, ofs + 32)
-                ext_hi = struct.unpack_from("<3f", data, ofs + 44)
-                flags, doodad_set, name_set, scale = struct.unpack_from(
-                    "<HHHH", data, ofs + 56
-                )
-                modf_entries.append({
-                    "nameId": name_id,
-                    "uniqueId": unique_id,
-                    "position": pos,
-                    "rotation": rot,
-                    "extentsLo": ext_lo,
-                    "extentsHi": ext_hi,
-                    "flags": flags,
-                    "doodadSet": doodad_set,
-                    "nameSet": name_set,
-                    "scale": scale,
-                })
+        elif magic == MMID:
+            mmid_offsets = np.frombuffer(view, dtype="<u4", count=size // 4, offset=data_ofs).tolist()
 
-    # Resolve model filenames
-    def resolve_name(name_data, id_offsets, name_id):
-        if name_data is None or name_id >= len(id_offsets):
-            return "unknown"
-        offset = id_offsets[name_id]
-        end = name_data.find(b"\x00", offset)
-        if end < 0:
-            end = len(name_data)
-        return name_data[offset:end].decode("ascii", errors="replace")
+        elif magic == MDDF:
+            mddf_entries = np.frombuffer(view, dtype=MDDF_DTYPE,
+                                         count=size // MDDF_DTYPE.itemsize, offset=data_ofs)
 
-    for entry in mddf_entries:
-        entry["modelPath"] = resolve_name(mmdx_data, mmid_offsets, entry["nameId"])
+        # -- WMO chunks --
+        elif magic == MWMO:
+            mwmo_data = bytes(view[data_ofs:data_ofs + size])
+
+        elif magic == MWID:
+            mwid_offsets = np.frombuffer(view, dtype="<u4", count=size // 4, offset=data_ofs).tolist()
+
+        elif magic == MODF:
+            modf_entries = np.frombuffer(view, dtype=MODF_DTYPE,
+                                         count=size // MODF_DTYPE.itemsize, offset=data_ofs)
+
+    # Resolve model filenames (once per name, not per placement)
+    def resolve_names(name_data, id_offsets, name_ids):
+        names = []
+        if name_data is not None:
+            for offset in id_offsets:
+                end = name_data.find(b"\x00", offset)
+                if end < 0:
+                    end = len(name_data)
+                names.append(name_data[offset:end].decode("ascii", errors="replace"))
+        return [names[i] if i < len(names) else "unknown" for i in name_ids.tolist()]
+
+    doodad_info = {"entries": mddf_entries, "count": len(mddf_entries),
+                   "modelPaths": resolve_names(mmdx_data, mmid_offsets, mddf_entries["nameId"])}
+    wmo_info = {"entries": modf_entries, "count": len(modf_entries),
+                "modelPaths": resolve_names(mwmo_data, mwid_offsets, modf_entries["nameId"])}
 
-    for entry in modf_entries:
-        entry["modelPath"] = resolve_name(mwmo_data, mwid_offsets, entry["nameId"])
+    return mtex_list, mcnk_list, doodad_info, wmo_info
 
-    doodad_info = {"entries": mddf_entries, "count": len(mddf_entries)}
-    wmo_info = {"entries": modf_entries, "count": len(modf_entries)}
 
-    return mtex_list, mcnk_list, doodad_info, wmo_info
+# MCNK header fields 0x00-0x37: flags, indexX, indexY, nLayers, nDoodadRefs,
+# ofsHeight, ofsNormal, ofsLayer, ofsRefs, ofsAlpha, sizeAlpha, ofsShadow,
+# sizeShadow, areaId
+MCNK_HEADER = struct.Struct("<14I")
+MCVT_ROW_STRIDES = (17 * 4, 4)  # bytes per outer+inner row pair, per float
 
 
 def parse_mcnk(data, data_ofs, size):
-    """Parse a single MCNK chunk. Returns dict with heights, layers, alpha."""
+    """
+    Parse a single MCNK chunk. Returns dict with heights, layers, alpha.
+    Sub-chunks are found through the header offsets; with a memoryview as
+    data, alphaRaw is a view rather than a copy.
+    """
     if size < 128:
         return None
 
     # ── MCNK header (128 bytes) ──
-    flags    = struct.unpack_from("<I", data, data_ofs + 0x00)[0]
-    indexX   = struct.unpack_from("<I", data, data_ofs + 0x04)[0]
-    indexY   = struct.unpack_from("<I", data, data_ofs + 0x08)[0]
-    nLayers  = struct.unpack_from("<I", data, data_ofs + 0x0C)[0]
-    ofsHeight = struct.unpack_from("<I", data, data_ofs + 0x14)[0]
-    ofsLayer = struct.unpack_from("<I", data, data_ofs + 0x1C)[0]
-    ofsAlpha = struct.unpack_from("<I", data, data_ofs + 0x24)[0]
-    sizeAlpha = struct.unpack_from("<I", data, data_ofs + 0x28)[0]
-    areaId   = struct.unpack_from("<I", data, data_ofs + 0x34)[0]
+    (flags, indexX, indexY, nLayers, _, ofsHeight, _, ofsLayer, _,
+     ofsAlpha, sizeAlpha, _, _, areaId) = MCNK_HEADER.unpack_from(data, data_ofs)
 
     # Position at offset 0x68: C3Vector (x, y, z)
     # In ADT: pos[0] = WoW X (N-S), pos[1] = WoW Y (E-W), pos[2] = height
@@ -346,24 +355,24 @@ def parse_mcnk(data, data_ofs, size):
     # ── MCVT: Height map (145 floats) ──
     mcvt_ofs = chunk_base + ofsHeight
     outer_heights = None
+    inner_heights = None
 
     if mcvt_ofs + 8 <= len(data):
-        mcvt_magic = data[mcvt_ofs:mcvt_ofs + 4][::-1]
-        if mcvt_magic == b"MCVT":
+        if CHUNK_ID.unpack_from(data, mcvt_ofs)[0] == MCVT:
             mcvt_data_ofs = mcvt_ofs + 8
             if mcvt_data_ofs + 145 * 4 <= len(data):
-                heights_145 = struct.unpack_from("<145f", data, mcvt_data_ofs)
-                # Extract 9x9 outer grid (skip inner 8x8 vertices)
-                outer_heights = []
-                for row in range(9):
-                    start = row * 17  # 9 outer + 8 inner = 17 per row pair
-                    outer_heights.extend(heights_145[start:start + 9])
+                # Rows alternate 9 outer + 8 inner = 17 floats (the last row is
+                # outer only), so both grids are views with a 17-float row stride
+                outer_heights = np.ndarray((9, 9), dtype="<f4", buffer=data,   # 9x9 chunk corner grid
+                                           offset=mcvt_data_ofs, strides=MCVT_ROW_STRIDES)
+                inner_heights = np.ndarray((8, 8), dtype="<f4", buffer=data,   # 8x8 cell centres
+                                           offset=mcvt_data_ofs + 9 * 4, strides=MCVT_ROW_STRIDES)
 
     # ── MCLY: Texture layers ──
     layers = []
     if nLayers > 0 and ofsLayer > 0:
         mcly_ofs = chunk_base + ofsLayer
-        if mcly_ofs + 4 <= len(data) and data[mcly_ofs:mcly_ofs + 4][::-1] == b"MCLY":
+        if mcly_ofs + 4 <= len(data) and CHUNK_ID.unpack_from(data, mcly_ofs)[0] == MCLY:
             mcly_data_ofs = mcly_ofs + 8
             for i in range(min(nLayers, 4)):  # max 4 layers
                 lo = mcly_data_ofs + i * 16
@@ -384,7 +393,7 @@ def parse_mcnk(data, data_ofs, size):
     alpha_raw = None
     if sizeAlpha > 0 and ofsAlpha > 0:
         mcal_ofs = chunk_base + ofsAlpha
-        if mcal_ofs + 4 <= len(data) and data[mcal_ofs:mcal_ofs + 4][::-1] == b"MCAL":
+        if mcal_ofs + 4 <= len(data) and CHUNK_ID.unpack_from(data, mcal_ofs)[0] == MCAL:
             mcal_data_ofs = mcal_ofs + 8
             alpha_raw = data[mcal_data_ofs:mcal_data_ofs + sizeAlpha]
 
@@ -395,7 +404,8 @@ def parse_mcnk(data, data_ofs, size):
         "position": pos,
         "areaId": areaId,
         "nLayers": nLayers,
-        "outerHeights": outer_heights,  # 81 floats (9x9) or None
+        "outerHeights": outer_heights,  # (9, 9) float32 array or None
+        "innerHeights": inner_heights,  # (8, 8) float32 array or None
         "layers": layers,
         "alphaRaw": alpha_raw,
     }
@@ -569,13 +579,15 @@ def build_heightmap_grid(all_tile_data, start_tx, start_ty, num_tx, num_ty):
             # pos[0] = WoW X (north-south), pos[1] = WoW Y (east-west)
             base_height = pos[2]
 
-            for row in range(9):
-                for col in range(9):
-                    gx = tile_col * 128 + cx * 8 + col
-                    gy = tile_row * 128 + cy * 8 + row
-                    if 0 <= gx < gw and 0 <= gy < gh:
-                        h = base_height + chunk["outerHeights"][row * 9 + col]
-                        grid[gy, gx] = h
+            # Whole 9x9 chunk in one slice (neighbours share edge rows/columns;
+            # later chunks overwrite them), clipped to the grid
+            gx = tile_col * 128 + cx * 8
+            gy = tile_row * 128 + cy * 8
+            x0, x1 = max(gx, 0), min(gx + 9, gw)
+            y0, y1 = max(gy, 0), min(gy + 9, gh)
+            if x0 < x1 and y0 < y1:
+                heights = chunk["outerHeights"][y0 - gy:y1 - gy, x0 - gx:x1 - gx]
+                grid[y0:y1, x0:x1] = heights.astype(np.float64) + base_height
 
     # Determine world coordinate mapping from MCNK positions
     # pos = (x_adt, y_adt, z_adt) - need to figure out which is which
@@ -715,13 +727,15 @@ def build_doodad_json(all_tile_data, center_pos, center_height):
     seen_ids = set()
 
     for (tx, ty), (_, _, doodad_info, wmo_info) in all_tile_data.items():
-        for entry in doodad_info["entries"]:
-            uid = entry["uniqueId"]
+        # Column-wise tolist() gives Python ints/floats (float64 math, as before)
+        entries = doodad_info["entries"]
+        for uid, p, rotation, raw_scale, model_path in zip(
+                entries["uniqueId"].tolist(), entries["position"].tolist(),
+                entries["rotation"].tolist(), entries["scale"].tolist(), doodad_info["modelPaths"]):
             if uid in seen_ids:
                 continue
             seen_ids.add(uid)
 
-            p = entry["position"]
             three_x = ofs_x + p[0]
             three_z = ofs_z + p[2]
             three_y = p[1] - center_height
@@ -729,12 +743,12 @@ def build_doodad_json(all_tile_data, center_pos, center_height):
             # ADT rotations are in degrees (wowdev wiki MDDF reference)
             # rotation[0] = around N/S axis (Z), rotation[1] = around Up (Y), rotation[2] = around E/W (X)
             # Negation of rotation[0] is applied in Environment.js (not here) to avoid double-negation
-            rot_x = entry["rotation"][2]  # Around E/W axis (X)
-            rot_y = entry["rotation"][1] - 90.0  # Around Up axis (Y), model orientation offset
-            rot_z = entry["rotation"][0]  # Around N/S axis (Z), raw — JS negates
+            rot_x = rotation[2]  # Around E/W axis (X)
+            rot_y = rotation[1] - 90.0  # Around Up axis (Y), model orientation offset
+            rot_z = rotation[0]  # Around N/S axis (Z), raw — JS negates
 
-            scale = entry["scale"] / 1024.0
-            model = entry["modelPath"].lower().replace("\\", "/")
+            scale = raw_scale / 1024.0
+            model = model_path.lower().replace("\\", "/")
 
             doodads.append({
                 "id": uid,
@@ -749,13 +763,15 @@ def build_doodad_json(all_tile_data, center_pos, center_height):
                 "type": classify_doodad(model),
             })
 
-        for entry in wmo_info["entries"]:
-            uid = entry["uniqueId"]
+        entries = wmo_info["entries"]
+        for uid, p, rotation, lo, hi, raw_scale, model_path in zip(
+                entries["uniqueId"].tolist(), entries["position"].tolist(),
+                entries["rotation"].tolist(), entries["extentsLo"].tolist(),
+                entries["extentsHi"].tolist(), entries["scale"].tolist(), wmo_info["modelPaths"]):
             if uid in seen_ids:
                 continue
             seen_ids.add(uid)
 
-            p = entry["position"]
             three_x = ofs_x + p[0]
             three_z = ofs_z + p[2]
             three_y = p[1] - center_height
@@ -763,19 +779,17 @@ def build_doodad_json(all_tile_data, center_pos, center_height):
             # ADT rotations are in degrees (wowdev wiki MDDF reference)
             # rotation[0] = around N/S axis (Z), rotation[1] = around Up (Y), rotation[2] = around E/W (X)
             # Negation of rotation[0] is applied in Environment.js (not here) to avoid double-negation
-            rot_x = entry["rotation"][2]  # Around E/W axis (X)
-            rot_y = entry["rotation"][1] - 90.0  # Around Up axis (Y), model orientation offset
-            rot_z = entry["rotation"][0]  # Around N/S axis (Z), raw — JS negates
+            rot_x = rotation[2]  # Around E/W axis (X)
+            rot_y = rotation[1] - 90.0  # Around Up axis (Y), model orientation offset
+            rot_z = rotation[0]  # Around N/S axis (Z), raw — JS negates
 
             # Bounding box size from extents
-            lo = entry["extentsLo"]
-            hi = entry["extentsHi"]
             size_x = abs(hi[0] - lo[0])  # east-west -> threeX
             size_y = abs(hi[1] - lo[1])  # height -> threeY
             size_z = abs(hi[2] - lo[2])  # north-south -> threeZ
 
-            scale = entry["scale"] / 1024.0 if entry["scale"] > 0 else 1.0
-            model = entry["modelPath"].lower().replace("\\", "/")
+            scale = raw_scale / 1024.0 if raw_scale > 0 else 1.0
+            model = model_path.lower().replace("\\", "/")
 
             wmos.append({
                 "id": uid,
@@ -894,15 +908,15 @@ def main():
 
         # Print sample doodad positions for coordinate verification
         if doodad_info["count"] > 0:
-            for entry in doodad_info["entries"][:3]:
+            for entry, model_path in zip(doodad_info["entries"][:3], doodad_info["modelPaths"]):
                 p = entry["position"]
-                print(f"    Doodad: {entry['modelPath'][:60]}")
+                print(f"    Doodad: {model_path[:60]}")
                 print(f"      pos=({p[0]:.1f}, {p[1]:.1f}, {p[2]:.1f}), scale={entry['scale']/1024:.2f}")
 
         if wmo_info["count"] > 0:
-            for entry in wmo_info["entries"][:2]:
+            for entry, model_path in zip(wmo_info["entries"][:2], wmo_info["modelPaths"]):
                 p = entry["position"]
-                print(f"    WMO: {entry['modelPath'][:60]}")
+                print(f"    WMO: {model_path[:60]}")
                 print(f"      pos=({p[0]:.1f}, {p[1]:.1f}, {p[2]:.1f})")
 
         all_tile_data[(tx, ty)] = (mtex_list, mcnk_list, doodad_info, wmo_info)
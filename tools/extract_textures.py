@@ -5,8 +5,11 @@ Extract terrain textures from northshire_chunks.json to WebP format.
 Reads the unique texture list and extracts each BLP from MPQ archives.
 """
 
+import argparse
 import json
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from PIL import Image
 import io
@@ -18,13 +21,58 @@ sys.path.insert(0, str(SCRIPT_DIR))
 from extract_terrain import (
     StormLib, MPQArchivePool, STORMLIB_DLL, MPQ_LOAD_ORDER
 )
+from texture_cache import add_texture_cache_args, texture_cache_from_args
 
 DEFAULT_DATA_DIR = r"C:\Program Files\Ascension Launcher\resources\epoch_live\Data"
 DEFAULT_TERRAIN_DIR = str(SCRIPT_DIR.parent / "client" / "public" / "assets" / "terrain")
 DEFAULT_OUTPUT_DIR = str(SCRIPT_DIR.parent / "client" / "public" / "assets" / "terrain" / "textures")
 
+# Terrain WebP defaults (quality/method are part of the texture cache key)
+DEFAULT_WEBP_QUALITY = 90
+DEFAULT_WEBP_METHOD = 6  # slowest, smallest; lower for fast iteration builds
+
+
+def terrain_output_name(tex_path):
+    """Output filename for a terrain texture: tileset/elwynn/grass.blp -> elwynn_grass.webp"""
+    parts = tex_path.replace("\\", "/").split("/")
+    if len(parts) >= 2:
+        # Use last two parts: folder + filename
+        folder = parts[-2]
+        filename = Path(parts[-1]).stem
+        return f"{folder}_{filename}.webp"
+    # Fallback: just use filename
+    return f"{Path(tex_path).stem}.webp"
+
+
+def convert_terrain_texture(blp_data, quality, method):
+    """
+    Decode a BLP and encode it as RGB WebP (runs in worker processes with --jobs).
+    Returns (WebP bytes, width, height, seconds spent).
+    """
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(blp_data)).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, "WEBP", quality=quality, method=method)
+    return buf.getvalue(), img.width, img.height, time.perf_counter() - start
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract terrain textures to WebP")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Encode textures in N worker processes")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="Most textures queued on the worker pool at once (default 2 x --jobs)")
+    parser.add_argument("--webp-quality", type=int, default=DEFAULT_WEBP_QUALITY,
+                        help="Lossy WebP quality 0-100")
+    parser.add_argument("--webp-method", type=int, choices=range(7), default=DEFAULT_WEBP_METHOD,
+                        help="WebP encoder effort, 0 = fastest (iteration builds), "
+                             "6 = smallest (release builds)")
+    add_texture_cache_args(parser)
+    args = parser.parse_args()
+    texture_cache = texture_cache_from_args(args)
+    webp_settings = {"kind": "terrain", "format": "webp",
+                     "quality": args.webp_quality, "method": args.webp_method}
+
     data_dir = Path(DEFAULT_DATA_DIR)
     terrain_dir = Path(DEFAULT_TERRAIN_DIR)
     output_dir = Path(DEFAULT_OUTPUT_DIR)
@@ -44,9 +92,39 @@ def main():
     archive_pool = MPQArchivePool(storm, data_dir, MPQ_LOAD_ORDER)
 
     print(f"\n== Extracting Textures ==")
+    print(f"   (WebP quality {args.webp_quality}, method {args.webp_method}, "
+          f"{args.jobs} job{'s' if args.jobs != 1 else ''})")
 
     extracted = 0
     failed = []
+    timings = []  # (seconds, tex_path) per converted texture
+    wall_start = time.perf_counter()
+
+    def finish(tex_path, output_name, cache_key, get_result):
+        """Write one converted texture (get_result() returns convert_terrain_texture's result)."""
+        nonlocal extracted
+        try:
+            webp_data, width, height, seconds = get_result()
+        except Exception as e:
+            print(f"  [ERROR] Failed to decode {tex_path}: {e}")
+            failed.append(tex_path)
+            return
+        (output_dir / output_name).write_bytes(webp_data)
+        if texture_cache is not None:
+            texture_cache.put(cache_key, webp_data, {
+                "mimeType": "image/webp", "width": width, "height": height,
+            })
+        timings.append((seconds, tex_path))
+        print(f"  [OK] {tex_path} ({seconds * 1000:.0f} ms)")
+        print(f"       -> {output_name} ({width}x{height})")
+        extracted += 1
+
+    # BLPs are read here (archives stay in this process); only encoding is farmed out
+    executor = None
+    pending = {}  # future → (tex_path, output_name, cache_key)
+    max_in_flight = args.max_in_flight or 2 * args.jobs
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
 
     for tex_path in unique_textures:
         # Convert path for MPQ (backslashes)
@@ -59,12 +137,9 @@ def main():
         ]
 
         blp_data = None
-        successful_path = None
-
         for try_path in paths_to_try:
             blp_data = archive_pool.read_file(try_path)
             if blp_data:
-                successful_path = try_path
                 break
 
         if not blp_data:
@@ -72,36 +147,41 @@ def main():
             failed.append(tex_path)
             continue
 
-        # Convert BLP to image
-        try:
-            img = Image.open(io.BytesIO(blp_data)).convert("RGB")
-
-            # Generate output filename from texture path
-            # tileset/elwynn/grass.blp -> elwynn_grass.webp
-            parts = tex_path.replace("\\", "/").split("/")
-            if len(parts) >= 2:
-                # Use last two parts: folder + filename
-                folder = parts[-2]
-                filename = Path(parts[-1]).stem
-                output_name = f"{folder}_{filename}.webp"
-            else:
-                # Fallback: just use filename
-                output_name = f"{Path(tex_path).stem}.webp"
-
-            output_path = output_dir / output_name
-
-            # Save as WebP with good quality
-            img.save(str(output_path), "WEBP", quality=90, method=6)
+        output_name = terrain_output_name(tex_path)
+
+        cache_key = None
+        if texture_cache is not None:
+            cache_key = texture_cache.key(blp_data, webp_settings)
+            cached = texture_cache.get(cache_key)
+            if cached:
+                webp_data, meta = cached
+                (output_dir / output_name).write_bytes(webp_data)
+                print(f"  [OK] {tex_path} (cached)")
+                print(f"       -> {output_name} ({meta['width']}x{meta['height']})")
+                extracted += 1
+                continue
+
+        if executor is None:
+            finish(tex_path, output_name, cache_key,
+                   lambda: convert_terrain_texture(blp_data, args.webp_quality, args.webp_method))
+            continue
 
-            print(f"  [OK] {tex_path}")
-            print(f"       -> {output_name} ({img.width}x{img.height})")
-            extracted += 1
+        # Bounded queue: don't hold every BLP in memory waiting for a worker
+        while len(pending) >= max_in_flight:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(*pending.pop(future), future.result)
+        future = executor.submit(convert_terrain_texture, blp_data,
+                                 args.webp_quality, args.webp_method)
+        pending[future] = (tex_path, output_name, cache_key)
 
-        except Exception as e:
-            print(f"  [ERROR] Failed to decode {tex_path}: {e}")
-            failed.append(tex_path)
+    for future in list(pending):
+        finish(*pending.pop(future), future.result)
+    if executor is not None:
+        executor.shutdown()
 
     archive_pool.close_all()
+    wall_time = time.perf_counter() - wall_start
 
     print(f"\n== Summary ==")
     print(f"  Extracted: {extracted}/{len(unique_textures)}")
@@ -109,6 +189,15 @@ def main():
         print(f"  Failed: {len(failed)}")
         for f in failed:
             print(f"    - {f}")
+    if timings:
+        encode_time = sum(seconds for seconds, _ in timings)
+        print(f"  Encoded: {len(timings)} textures, {encode_time:.1f} s total, "
+              f"{encode_time / len(timings) * 1000:.0f} ms average, {wall_time:.1f} s wall")
+        print("  Slowest:")
+        for seconds, tex_path in sorted(timings, reverse=True)[:5]:
+            print(f"    {seconds * 1000:7.0f} ms  {tex_path}")
+    if texture_cache is not None:
+        print(f"  Texture cache: {texture_cache.summary()}")
     print(f"  Output: {output_dir}")
 
 
@@ -16,19 +16,33 @@ import struct
 import sys
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import io
 
 from extract_model import (
     StormLib, extract_from_mpq, MPQ_LOAD_ORDER, STORMLIB_DLL,
-    blp_to_png_bytes, wow_to_gltf_pos, read_m2array,
+    wow_to_gltf_pos, read_m2array, convert_blp_texture,
+    BLEND_MODE_OPAQUE, ALPHA_CUTOFF,
+    add_texture_codec_args, texture_codec_from_args,
 )
-
-import pygltflib
+from glb_writer import (
+    GLBWriter, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT,
+    read_glb_json,
+)
+from meshopt_encoder import apply_meshopt_compression
+from mesh_simplify import add_lod_args, add_lod_levels, lod_summary
+from texture_store import TextureStore
+from collision_pack import COLLISION_INDEX_NAME, read_collision_pack, write_collision_pack
+from texture_cache import add_texture_cache_args, texture_cache_from_args
 
 SCRIPT_DIR = Path(__file__).parent
 DEFAULT_DATA_DIR = Path(r"C:\Program Files\Ascension Launcher\resources\epoch_live\Data")
 DEFAULT_DOODAD_JSON = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "terrain" / "northshire_doodads.json"
 DEFAULT_OUTPUT_DIR = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "models"
+DEFAULT_TEXTURE_DIR = SCRIPT_DIR / ".." / "client" / "public" / "assets" / "textures"
+
+# WMOs with more groups are whole cities (e.g. Stormwind), not Northshire buildings
+MAX_WMO_GROUPS = 100
 
 
 # ── MPQ Archive Pool (keeps archives open for fast access) ──────────────────
@@ -86,6 +100,9 @@ def scan_chunks(data, start=0):
 
 # ── WMO Root parser ─────────────────────────────────────────────────────────
 
+# MOMT material flags
+MOMT_FLAG_UNCULLED = 0x04  # render both faces
+
 def parse_wmo_root(data):
     """Parse WMO root file. Returns dict with header, textures, materials, group info."""
     result = {
@@ -248,11 +265,17 @@ def parse_wmo_group(data):
 
 # ── GLB builder for WMO ─────────────────────────────────────────────────────
 
-def build_wmo_glb(root_info, group_geometries, archive_pool):
+def build_wmo_glb(root_info, group_geometries, archive_pool, meshopt=False, texture_store=None,
+                  texture_codec=None, texture_cache=None, lod_ratios=()):
     """
     Build a GLB from WMO root + groups.
     Merges all groups, splits by material for multi-primitive mesh.
     archive_pool: MPQArchivePool instance with open archives
+    meshopt: compress vertex/index buffer views with EXT_meshopt_compression
+    texture_store: TextureStore to reference shared texture files from (None = embed PNGs)
+    texture_codec: texture codec dict for convert_blp_texture (None = PNG)
+    texture_cache: TextureCache of converted textures (None = always convert)
+    lod_ratios: triangle ratios of extra MSFT_lod levels (quadric simplification)
     """
     # Merge all group geometry with vertex offset tracking
     all_verts = []
@@ -318,50 +341,22 @@ def build_wmo_glb(root_info, group_geometries, archive_pool):
     uvs_arr = np.vstack(all_uvs).astype(np.float32)
     total_verts = len(positions)
 
-    def pad4(b):
-        rem = len(b) % 4
-        return b + b"\x00" * (4 - rem) if rem else b
-
-    bin_data = bytearray()
-
-    def append_bin(data_bytes):
-        offset = len(bin_data)
-        bin_data.extend(pad4(data_bytes))
-        return offset
-
-    # Write vertex data
-    pos_offset = append_bin(positions.tobytes())
-    norm_offset = append_bin(normals_arr.tobytes())
-    uv_offset = append_bin(uvs_arr.tobytes())
-
-    pos_min = positions.min(axis=0).tolist()
-    pos_max = positions.max(axis=0).tolist()
-
-    # Buffer views for shared vertex data
-    bv_list = [
-        pygltflib.BufferView(buffer=0, byteOffset=pos_offset,
-                             byteLength=total_verts * 12, target=34962, byteStride=12),
-        pygltflib.BufferView(buffer=0, byteOffset=norm_offset,
-                             byteLength=total_verts * 12, target=34962, byteStride=12),
-        pygltflib.BufferView(buffer=0, byteOffset=uv_offset,
-                             byteLength=total_verts * 8, target=34962, byteStride=8),
-    ]
-
-    # Accessors for shared vertex attributes
-    acc_list = [
-        pygltflib.Accessor(bufferView=0, componentType=5126,
-                           count=total_verts, type="VEC3", max=pos_max, min=pos_min),
-        pygltflib.Accessor(bufferView=1, componentType=5126,
-                           count=total_verts, type="VEC3"),
-        pygltflib.Accessor(bufferView=2, componentType=5126,
-                           count=total_verts, type="VEC2"),
-    ]
-    pos_acc = 0
-    norm_acc = 1
-    uv_acc = 2
-
-    # Extract textures for materials
-    mat_textures = {}  # materialID -> png_bytes or None
+    gltf = GLBWriter()
+
+    # Buffer views + accessors for shared vertex data
+    pos_acc = gltf.add_accessor(
+        gltf.add_buffer_view(positions, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+        total_verts, "VEC3", max=positions.max(axis=0).tolist(), min=positions.min(axis=0).tolist())
+    norm_acc = gltf.add_accessor(
+        gltf.add_buffer_view(normals_arr, target=ARRAY_BUFFER, byte_stride=12), FLOAT,
+        total_verts, "VEC3")
+    uv_acc = gltf.add_accessor(
+        gltf.add_buffer_view(uvs_arr, target=ARRAY_BUFFER, byte_stride=8), FLOAT,
+        total_verts, "VEC2")
+
+    # Extract textures for materials (budgeted against the whole WMO's extent)
+    extent = float(np.ptp(positions, axis=0).max())
+    mat_textures = {}  # materialID -> (image bytes, mime type, uses_alpha) or None
     materials_list = root_info.get("materials", [])
 
     for mat_id in mat_triangles.keys():
@@ -372,19 +367,15 @@ def build_wmo_glb(root_info, group_geometries, archive_pool):
                 mpq_path = tex_path.replace("/", "\\")
                 blp_data = archive_pool.read_file(mpq_path)
                 if blp_data:
-                    png = blp_to_png_bytes(blp_data)
-                    if png:
-                        mat_textures[mat_id] = png
+                    image = convert_blp_texture(blp_data, texture_codec, extent, texture_cache)
+                    if image:
+                        mat_textures[mat_id] = image
                         continue
         mat_textures[mat_id] = None
 
     # Build one primitive per material
     primitives = []
-    gltf_materials = []
-    gltf_images = []
-    gltf_textures = []
-    gltf_samplers = []
-    tex_idx_counter = 0
+    sampler_idx = None
 
     sorted_mats = sorted(mat_triangles.keys())
 
@@ -396,69 +387,69 @@ def build_wmo_glb(root_info, group_geometries, archive_pool):
 
         idx_type = np.uint16 if total_verts < 65536 else np.uint32
         idx_arr = np.array(idx_flat, dtype=idx_type)
-        idx_ct = 5123 if idx_type == np.uint16 else 5125
-
-        # Write index buffer
-        idx_bv = len(bv_list)
-        idx_off = append_bin(idx_arr.tobytes())
-        bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=idx_off,
-                                            byteLength=len(idx_arr) * idx_arr.itemsize, target=34963))
+        idx_ct = UNSIGNED_SHORT if idx_type == np.uint16 else UNSIGNED_INT
 
-        idx_acc = len(acc_list)
-        acc_list.append(pygltflib.Accessor(bufferView=idx_bv, componentType=idx_ct,
-                                           count=len(idx_arr), type="SCALAR",
-                                           max=[int(idx_arr.max())], min=[int(idx_arr.min())]))
+        # Index buffer
+        idx_acc = gltf.add_accessor(
+            gltf.add_buffer_view(idx_arr, target=ELEMENT_ARRAY_BUFFER), idx_ct,
+            len(idx_arr), "SCALAR", max=[int(idx_arr.max())], min=[int(idx_arr.min())])
 
         # Primitive
-        attrs = pygltflib.Attributes(POSITION=pos_acc, NORMAL=norm_acc, TEXCOORD_0=uv_acc)
-        primitives.append(pygltflib.Primitive(attributes=attrs, indices=idx_acc, material=gltf_mat_idx))
+        primitives.append({
+            "attributes": {"POSITION": pos_acc, "NORMAL": norm_acc, "TEXCOORD_0": uv_acc},
+            "indices": idx_acc,
+            "material": gltf_mat_idx,
+        })
+
+        # MOMT render state: F_UNCULLED → two-sided; blendMode 0 ignores texture alpha
+        mat_info = materials_list[mat_id] if mat_id < len(materials_list) else None
+        two_sided = mat_info is None or bool(mat_info["flags"] & MOMT_FLAG_UNCULLED)
+        alpha_key = mat_info is not None and mat_info["blendMode"] != BLEND_MODE_OPAQUE
 
         # Material with texture if available
-        png_data = mat_textures.get(mat_id)
-        if png_data:
-            tex_bv = len(bv_list)
-            tex_off = append_bin(png_data)
-            bv_list.append(pygltflib.BufferView(buffer=0, byteOffset=tex_off,
-                                                byteLength=len(png_data)))
-            img_idx = len(gltf_images)
-            gltf_images.append(pygltflib.Image(bufferView=tex_bv, mimeType="image/png"))
-
-            if not gltf_samplers:
-                gltf_samplers.append(pygltflib.Sampler(magFilter=9729, minFilter=9987,
-                                                       wrapS=10497, wrapT=10497))
-
-            tex_index = len(gltf_textures)
-            gltf_textures.append(pygltflib.Texture(source=img_idx, sampler=0))
-
-            gltf_materials.append(pygltflib.Material(
-                pbrMetallicRoughness=pygltflib.PbrMetallicRoughness(
-                    baseColorTexture=pygltflib.TextureInfo(index=tex_index),
-                    metallicFactor=0.0, roughnessFactor=0.8),
-                doubleSided=True))
+        tex_image = mat_textures.get(mat_id)
+        if tex_image:
+            image_data, mime_type, uses_alpha = tex_image
+            if texture_store is not None:
+                img_idx = gltf.add_image_uri(texture_store.add(image_data, mime_type), mime_type)
+            else:
+                img_idx = gltf.add_image(image_data, mime_type)
+
+            if sampler_idx is None:
+                sampler_idx = gltf.add("samplers", {"magFilter": 9729, "minFilter": 9987,
+                                                    "wrapS": 10497, "wrapT": 10497})
+
+            tex_index = gltf.add_texture(img_idx, sampler_idx, mime_type)
+
+            material = {
+                "pbrMetallicRoughness": {
+                    "baseColorTexture": {"index": tex_index},
+                    "metallicFactor": 0.0, "roughnessFactor": 0.8},
+                "doubleSided": two_sided,
+            }
+            if alpha_key and uses_alpha:
+                material["alphaMode"] = "MASK"
+                material["alphaCutoff"] = ALPHA_CUTOFF
+            gltf.add("materials", material)
         else:
             # Solid color fallback
-            gltf_materials.append(pygltflib.Material(
-                pbrMetallicRoughness=pygltflib.PbrMetallicRoughness(
-                    baseColorFactor=[0.7, 0.6, 0.5, 1.0],
-                    metallicFactor=0.0, roughnessFactor=0.8),
-                doubleSided=True))
+            gltf.add("materials", {
+                "pbrMetallicRoughness": {
+                    "baseColorFactor": [0.7, 0.6, 0.5, 1.0],
+                    "metallicFactor": 0.0, "roughnessFactor": 0.8},
+                "doubleSided": two_sided,
+            })
 
     # Assemble
-    gltf = pygltflib.GLTF2(
-        scene=0,
-        scenes=[pygltflib.Scene(nodes=[0])],
-        nodes=[pygltflib.Node(mesh=0)],
-        meshes=[pygltflib.Mesh(primitives=primitives)],
-        accessors=acc_list,
-        bufferViews=bv_list,
-        buffers=[pygltflib.Buffer(byteLength=len(bin_data))],
-        materials=gltf_materials,
-        textures=gltf_textures,
-        images=gltf_images,
-        samplers=gltf_samplers,
-    )
-
-    gltf.set_binary_blob(bytes(bin_data))
+    gltf.gltf["scene"] = 0
+    gltf.add("scenes", {"nodes": [0]})
+    gltf.add("nodes", {"mesh": 0})
+    gltf.add("meshes", {"primitives": primitives})
+
+    if lod_ratios:
+        add_lod_levels(gltf, lod_ratios)
+    if meshopt:
+        apply_meshopt_compression(gltf)
     return gltf
 
 
@@ -469,6 +460,9 @@ def extract_wmo_collision(group_geometries):
       - Triangles with flags & 0x04 are NO-COLLISION, skip them.
       - All other triangles (including materialID == 0xFF invisible walls) are collision.
 
+    Vertices are welded by rounded position across groups, then zero-area
+    triangles and vertices no collision triangle uses are dropped.
+
     Returns (verts_flat, tris_flat) in glTF Y-up coords, or ([], []) if none.
       verts_flat: [x0,y0,z0, x1,y1,z1, ...] in glTF space
       tris_flat:  [i0,i1,i2, ...] triangle indices
@@ -482,93 +476,244 @@ def extract_wmo_collision(group_geometries):
             continue
 
         verts = group["vertices"]
-        tris = group["indices"]
+        tris = group["indices"].astype(np.int64)
         tri_flags = group["triFlags"]
-        n_verts = len(verts)
+
+        # Collision triangles are those NOT marked no-collision (bit 0x04)
+        if tri_flags is not None:
+            flags = np.zeros(len(tris), dtype=np.uint8)
+            n_flags = min(len(tris), len(tri_flags))
+            flags[:n_flags] = tri_flags[:n_flags]
+            tris = tris[(flags & 0x04) == 0]
 
         # Transform vertices: WoW (x,y,z) Z-up → glTF (x, z, -y) Y-up
-        for i in range(n_verts):
-            x, y, z = float(verts[i][0]), float(verts[i][1]), float(verts[i][2])
-            all_verts.extend([round(x, 3), round(z, 3), round(-y, 3)])
+        all_verts.append(np.column_stack([verts[:, 0], verts[:, 2], -verts[:, 1]]).astype(np.float64))
+        all_tris.append(tris + vert_offset)
+        vert_offset += len(verts)
 
-        # Collect collision triangles (those NOT marked no-collision)
-        for tri_idx in range(len(tris)):
-            flags = int(tri_flags[tri_idx]) if tri_flags is not None else 0
-            # Bit 0x04 = no-collision — skip these
-            if flags & 0x04:
-                continue
-            v0, v1, v2 = int(tris[tri_idx][0]), int(tris[tri_idx][1]), int(tris[tri_idx][2])
-            all_tris.extend([v0 + vert_offset, v1 + vert_offset, v2 + vert_offset])
+    if not all_tris:
+        return [], []
+    verts = np.round(np.concatenate(all_verts), 3)
+    tris = np.concatenate(all_tris)
+    if len(tris) == 0:
+        return [], []
 
-        vert_offset += n_verts
+    # Weld identical positions (groups share walls, UV/normal seams split vertices)
+    verts, remap = np.unique(verts, axis=0, return_inverse=True)
+    tris = remap.reshape(-1)[tris]
 
-    if not all_tris:
+    # Drop zero-area triangles (collapsed by welding or degenerate in the source)
+    p0, p1, p2 = verts[tris[:, 0]], verts[tris[:, 1]], verts[tris[:, 2]]
+    area2 = np.linalg.norm(np.cross(p1 - p0, p2 - p0), axis=1)
+    tris = tris[area2 > 1e-9]
+    if len(tris) == 0:
         return [], []
 
-    return all_verts, all_tris
+    # Keep only referenced vertices
+    used, tris = np.unique(tris, return_inverse=True)
+    verts = verts[used]
 
+    return verts.ravel().tolist(), tris.reshape(-1).tolist()
 
-def extract_single_wmo(archive_pool, wow_wmo_path):
-    """
-    Extract a single WMO (root + all groups) and return a pygltflib.GLTF2 object.
-    Returns None on failure.
-    archive_pool: MPQArchivePool instance with open archives
-    """
-    # Normalize path for MPQ
+
+def wmo_mpq_path(wow_wmo_path):
+    """MPQ path of a WMO root file (backslashes, .wmo extension)."""
     mpq_path = wow_wmo_path.replace("/", "\\")
     if not mpq_path.lower().endswith(".wmo"):
         mpq_path += ".wmo"
+    return mpq_path
+
+
+def wmo_group_paths(mpq_path, n_groups):
+    """MPQ paths of a WMO's group files (<root>_000.wmo, <root>_001.wmo, ...)."""
+    base_path = mpq_path[:-4]  # strip .wmo
+    return [f"{base_path}_{gi:03d}.wmo" for gi in range(n_groups)]
 
-    # Extract root file
-    root_data = archive_pool.read_file(mpq_path)
-    if root_data is None:
-        print(f"    Root .wmo not found: {mpq_path}")
+
+def read_wmo_group(archive_pool, group_path):
+    """Read and parse one WMO group file, or None if it is missing."""
+    group_data = archive_pool.read_file(group_path)
+    if group_data is None:
         return None
+    return parse_wmo_group(group_data)
+
 
-    # Parse root
-    root_info = parse_wmo_root(root_data)
+def load_wmo(archive_pool, wow_wmo_path, group_loader=None, verbose=True, root_info=None):
+    """
+    Read and parse a WMO root and all its group files.
+    Returns (root_info, group geometries with vertices), or None on failure.
+    group_loader: callable mapping a list of group file paths to parsed groups
+                  (None for missing files); None = read them here one by one
+    verbose: print per-group statistics
+    root_info: the already parsed root file, if any (None = read it here)
+    """
+    mpq_path = wmo_mpq_path(wow_wmo_path)
+
+    if root_info is None:
+        # Extract root file
+        root_data = archive_pool.read_file(mpq_path)
+        if root_data is None:
+            print(f"    Root .wmo not found: {mpq_path}")
+            return None
+
+        # Parse root
+        root_info = parse_wmo_root(root_data)
     n_groups = root_info["nGroups"]
-    print(f"    Groups: {n_groups}, Materials: {len(root_info['materials'])}")
+    if verbose:
+        print(f"    Groups: {n_groups}, Materials: {len(root_info['materials'])}")
 
     if n_groups == 0:
         print(f"    No groups in WMO")
         return None
 
     # Skip extremely large WMOs (e.g. Stormwind with 209+ groups)
-    if n_groups > 100:
+    if n_groups > MAX_WMO_GROUPS:
         print(f"    Skipping: too many groups ({n_groups}), likely out-of-area WMO")
         return None
 
     # Extract and parse each group file
-    base_path = mpq_path[:-4]  # strip .wmo
+    group_paths = wmo_group_paths(mpq_path, n_groups)
+    if group_loader is not None:
+        groups = group_loader(group_paths)
+    else:
+        groups = [read_wmo_group(archive_pool, group_path) for group_path in group_paths]
     group_geometries = []
 
-    for gi in range(n_groups):
-        group_path = f"{base_path}_{gi:03d}.wmo"
-        group_data = archive_pool.read_file(group_path)
-        if group_data is None:
+    for gi, group in enumerate(groups):
+        if group is None:
             print(f"    Group {gi:03d} not found, skipping")
             continue
 
-        group = parse_wmo_group(group_data)
         if group["vertices"] is not None:
-            n_v = len(group["vertices"])
-            n_t = len(group["indices"]) if group["indices"] is not None else 0
-            print(f"    Group {gi:03d}: {n_v} verts, {n_t} tris")
+            if verbose:
+                n_v = len(group["vertices"])
+                n_t = len(group["indices"]) if group["indices"] is not None else 0
+                print(f"    Group {gi:03d}: {n_v} verts, {n_t} tris")
             group_geometries.append(group)
 
     if not group_geometries:
         print(f"    No valid group geometry found")
         return None
+    return root_info, group_geometries
+
+
+def extract_wmo_collision_only(archive_pool, wow_wmo_path, group_loader=None, root_info=None):
+    """
+    Collision mesh of a WMO without converting textures or building a glTF
+    (for WMOs whose GLB is cached). Returns (coll_verts, coll_tris) or None.
+    group_loader, root_info: see load_wmo()
+    """
+    loaded = load_wmo(archive_pool, wow_wmo_path, group_loader, verbose=False, root_info=root_info)
+    if loaded is None:
+        return None
+    return extract_wmo_collision(loaded[1])
+
+
+def extract_single_wmo(archive_pool, wow_wmo_path, meshopt=False, texture_store=None,
+                       texture_codec=None, texture_cache=None, lod_ratios=(), group_loader=None,
+                       root_info=None):
+    """
+    Extract a single WMO (root + all groups) and return a GLBWriter.
+    Returns None on failure.
+    archive_pool: MPQArchivePool instance with open archives
+    meshopt: compress geometry with EXT_meshopt_compression
+    texture_store: TextureStore for shared texture files (None = embed PNGs)
+    texture_codec: texture codec dict for convert_blp_texture (None = PNG)
+    texture_cache: TextureCache of converted textures (None = always convert)
+    lod_ratios: triangle ratios of extra LOD levels (empty = full detail only)
+    group_loader, root_info: see load_wmo()
+    """
+    loaded = load_wmo(archive_pool, wow_wmo_path, group_loader, root_info=root_info)
+    if loaded is None:
+        return None
+    root_info, group_geometries = loaded
 
     # Extract collision geometry from MOPY-flagged triangles
     coll_verts, coll_tris = extract_wmo_collision(group_geometries)
 
     # Build GLB
-    gltf = build_wmo_glb(root_info, group_geometries, archive_pool)
+    gltf = build_wmo_glb(root_info, group_geometries, archive_pool, meshopt=meshopt,
+                         texture_store=texture_store, texture_codec=texture_codec,
+                         texture_cache=texture_cache, lod_ratios=lod_ratios)
     return gltf, coll_verts, coll_tris
 
 
+# ── Worker processes (--jobs) ───────────────────────────────────────────────
+
+_worker = {}
+
+
+def _init_wmo_worker(data_dir):
+    """Process pool initializer: open this worker's own StormLib + archive pool."""
+    storm = StormLib(STORMLIB_DLL)
+    _worker["archive_pool"] = MPQArchivePool(storm, Path(data_dir), MPQ_LOAD_ORDER)
+
+
+def _read_wmo_group_worker(group_path):
+    return read_wmo_group(_worker["archive_pool"], group_path)
+
+
+class WMOGroupReader:
+    """
+    Reads WMO group files on a process pool ahead of use, in the order the WMOs
+    are built, so one building with 80 groups is spread over all workers.
+    At most max_in_flight groups are queued or waiting to be used at once, so a
+    large WMO set never holds all of its group data in memory.
+
+    roots:  wow path → parsed root of every planned WMO (pass to load_wmo())
+    """
+
+    def __init__(self, executor, archive_pool, max_in_flight):
+        self.executor = executor
+        self.archive_pool = archive_pool
+        self.max_in_flight = max_in_flight
+        self.roots = {}
+        self.paths = []    # group paths of every planned WMO, in build order
+        self.order = {}    # group path → index in self.paths
+        self.next_submit = 0
+        self.futures = {}  # group path → future, submitted but not yet used
+
+    def plan(self, wow_wmo_path):
+        """Read and parse a WMO's root and queue its group files after the planned ones."""
+        mpq_path = wmo_mpq_path(wow_wmo_path)
+        root_data = self.archive_pool.read_file(mpq_path)
+        if root_data is None:
+            return
+        root_info = parse_wmo_root(root_data)
+        self.roots[wow_wmo_path] = root_info
+        if root_info["nGroups"] > MAX_WMO_GROUPS:
+            return
+        for group_path in wmo_group_paths(mpq_path, root_info["nGroups"]):
+            self.order[group_path] = len(self.paths)
+            self.paths.append(group_path)
+
+    def _submit_more(self):
+        while self.next_submit < len(self.paths) and len(self.futures) < self.max_in_flight:
+            group_path = self.paths[self.next_submit]
+            self.futures[group_path] = self.executor.submit(_read_wmo_group_worker, group_path)
+            self.next_submit += 1
+
+    def load_groups(self, group_paths):
+        """group_loader for load_wmo(): parsed groups in order, None for missing files."""
+        first = self.order.get(group_paths[0]) if group_paths else None
+        if first is not None:
+            # Planned WMOs that were never loaded (e.g. failed) must not hold slots
+            for group_path in [p for p in self.futures if self.order[p] < first]:
+                self.futures.pop(group_path).cancel()
+            self.next_submit = max(self.next_submit, first)
+
+        groups = []
+        for group_path in group_paths:
+            self._submit_more()
+            future = self.futures.pop(group_path, None)
+            if future is not None:
+                groups.append(future.result())
+            else:
+                groups.append(read_wmo_group(self.archive_pool, group_path))
+        self._submit_more()
+        return groups
+
+
 def main():
     parser = argparse.ArgumentParser(description="Extract WoW WMO buildings to GLB")
     parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR),
@@ -579,7 +724,23 @@ def main():
                         help="Output base directory for models")
     parser.add_argument("--force", action="store_true",
                         help="Force re-extraction of existing files")
+    parser.add_argument("--meshopt", action="store_true",
+                        help="Compress geometry with EXT_meshopt_compression")
+    parser.add_argument("--shared-textures", action="store_true",
+                        help="Write textures once to --texture-dir and reference them by URI")
+    parser.add_argument("--texture-dir", default=str(DEFAULT_TEXTURE_DIR),
+                        help="Output directory for shared textures")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Read and parse WMO group files in N worker processes")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="Most WMO group files queued on the worker pool at once "
+                             "(default 2 x --jobs)")
+    add_lod_args(parser)
+    add_texture_codec_args(parser)
+    add_texture_cache_args(parser)
     args = parser.parse_args()
+    texture_codec = texture_codec_from_args(args)
+    texture_cache = texture_cache_from_args(args)
 
     data_dir = Path(args.data_dir)
     doodad_json_path = Path(args.doodad_json)
@@ -621,13 +782,14 @@ def main():
     if "wmos" not in manifest:
         manifest["wmos"] = {}
 
+    # Shared content-addressed textures (index is kept in the manifest across runs)
+    texture_store = None
+    if args.shared_textures:
+        texture_store = TextureStore(args.texture_dir, wmo_dir, output_dir,
+                                     manifest.get("textures"))
+
     # Load existing collision data (from doodad extraction) to append WMO data
-    collision_path = output_dir / "collision_data.json"
-    if collision_path.exists():
-        with open(collision_path) as f:
-            collision_data = json.load(f)
-    else:
-        collision_data = {}
+    collision_data = read_collision_pack(output_dir)
 
     total_size = 0
     extracted = 0
@@ -640,12 +802,30 @@ def main():
     else:
         print(f"   (--force enabled - re-extracting all models)\n")
 
+    # With --jobs, read the group files of every WMO that needs work ahead of use
+    executor = None
+    group_loader = None
+    group_reader = None
+    if args.jobs > 1:
+        print(f"Reading WMO groups with {args.jobs} worker processes...")
+        executor = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_wmo_worker,
+                                       initargs=(data_dir,))
+        group_reader = WMOGroupReader(executor, archive_pool,
+                                      args.max_in_flight or 2 * args.jobs)
+        for wow_path in sorted(unique_wmos):
+            basename = wow_path.rsplit("/", 1)[-1].replace(".wmo", ".glb").lower()
+            cached = not args.force and (wmo_dir / basename).exists()
+            if not cached or wow_path not in collision_data:
+                group_reader.plan(wow_path)
+        group_loader = group_reader.load_groups
+
     for i, (wow_path, instance_count) in enumerate(sorted(unique_wmos.items())):
         short_name = wow_path.rsplit("/", 1)[-1]
         basename = short_name.replace(".wmo", ".glb").lower()
         glb_path = wmo_dir / basename
 
         progress = f"[{i+1}/{len(unique_wmos)}]"
+        root_info = group_reader.roots.pop(wow_path, None) if group_reader is not None else None
 
         # Check cache unless --force
         if not args.force and glb_path.exists():
@@ -654,13 +834,17 @@ def main():
             manifest["wmos"][wow_path] = {
                 "glb": "wmos/" + basename,
             }
+            lods = lod_summary(read_glb_json(glb_path))
+            if lods:
+                manifest["wmos"][wow_path]["lods"] = lods
             skipped += 1
             # Still need to extract collision if not already present
             if wow_path not in collision_data:
                 try:
-                    result = extract_single_wmo(archive_pool, wow_path)
+                    result = extract_wmo_collision_only(archive_pool, wow_path, group_loader,
+                                                        root_info)
                     if result is not None:
-                        _, coll_verts, coll_tris = result
+                        coll_verts, coll_tris = result
                         if coll_verts and coll_tris:
                             collision_data[wow_path] = {
                                 "verts": coll_verts,
@@ -673,7 +857,13 @@ def main():
         print(f"{progress} {short_name} ({instance_count} instances)...")
 
         try:
-            result = extract_single_wmo(archive_pool, wow_path)
+            result = extract_single_wmo(archive_pool, wow_path, meshopt=args.meshopt,
+                                        texture_store=texture_store,
+                                        texture_codec=texture_codec,
+                                        texture_cache=texture_cache,
+                                        lod_ratios=args.lods,
+                                        group_loader=group_loader,
+                                        root_info=root_info)
             if result is None:
                 print(f"  SKIP: extraction failed")
                 failed += 1
@@ -694,6 +884,11 @@ def main():
             manifest["wmos"][wow_path] = {
                 "glb": "wmos/" + basename,
             }
+            lods = lod_summary(gltf.gltf)
+            if lods:
+                manifest["wmos"][wow_path]["lods"] = lods
+                print("  LODs: " + ", ".join(f"{lod['triangles']} tris (error {lod['error']})"
+                                              for lod in lods[1:]))
 
             if coll_verts and coll_tris:
                 collision_data[wow_path] = {
@@ -713,6 +908,9 @@ def main():
             failed += 1
             continue
 
+    if executor is not None:
+        executor.shutdown()
+
     # Close all archives
     archive_pool.close_all()
 
@@ -720,13 +918,13 @@ def main():
     manifest["totalWmoExtracted"] = extracted
     manifest["totalWmoSkipped"] = skipped
     manifest["totalWmoFailed"] = failed
+    if texture_store is not None:
+        manifest["textures"] = texture_store.index
     with open(manifest_path, "w") as f:
         json.dump(manifest, f, indent=2)
 
     # Write collision data (M2 doodads + WMO combined)
-    with open(collision_path, "w") as f:
-        json.dump(collision_data, f, separators=(",", ":"))
-    collision_size = collision_path.stat().st_size
+    collision_size = write_collision_pack(output_dir, collision_data)
 
     # Count WMO collision stats
     wmo_coll_count = sum(1 for k in collision_data if k in unique_wmos)
@@ -738,9 +936,14 @@ def main():
     print(f"  Cached (skipped): {skipped}")
     print(f"  Failed: {failed}")
     print(f"  Total size: {total_size / 1024 / 1024:.1f} MB")
+    if texture_store is not None:
+        print(f"  Shared textures: {texture_store.written} written, {texture_store.reused} reused "
+              f"({len(texture_store.index)} in index)")
+    if texture_cache is not None:
+        print(f"  Texture cache: {texture_cache.summary()}")
     print(f"  WMO Collision: {wmo_coll_count}/{len(unique_wmos)} models with collision meshes")
     print(f"    {wmo_coll_verts} vertices, {wmo_coll_tris} triangles")
-    print(f"  Collision data: {collision_path} ({collision_size / 1024:.1f} KB)")
+    print(f"  Collision pack: {output_dir / COLLISION_INDEX_NAME} ({collision_size / 1024:.1f} KB)")
     print(f"  Manifest: {manifest_path}")
     print(f"  Output: {wmo_dir}")
 
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Lightweight streaming GLB (binary glTF 2.0) writer.
+
+The glTF JSON is assembled from plain dicts and buffer views are kept as
+memoryviews over the caller's arrays/bytes, so nothing is concatenated into an
+intermediate blob. save() streams every view straight to the output file with
+4-byte padding and patches the chunk lengths once the BIN chunk is written.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+# glTF enums
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+UNSIGNED_BYTE = 5121
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+FLOAT = 5126
+
+COMPONENT_DTYPES = {
+    UNSIGNED_BYTE: np.uint8,
+    UNSIGNED_SHORT: np.uint16,
+    UNSIGNED_INT: np.uint32,
+    FLOAT: np.float32,
+}
+ACCESSOR_WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT4": 16}
+
+KHR_TEXTURE_BASISU = "KHR_texture_basisu"
+EXT_TEXTURE_WEBP = "EXT_texture_webp"
+EXT_MESH_GPU_INSTANCING = "EXT_mesh_gpu_instancing"
+
+# Image MIME types that core glTF can't reference directly → texture extension
+TEXTURE_EXTENSIONS = {
+    "image/ktx2": KHR_TEXTURE_BASISU,
+    "image/webp": EXT_TEXTURE_WEBP,
+}
+
+GLB_MAGIC = b"glTF"
+GLB_VERSION = 2
+CHUNK_JSON = b"JSON"
+CHUNK_BIN = b"BIN\x00"
+
+
+def _as_bytes_view(data):
+    """Return a flat uint8 memoryview over bytes / bytearray / numpy data without copying."""
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data)
+    return memoryview(data).cast("B")
+
+
+def read_glb_json(path):
+    """
+    Read only the JSON chunk of a GLB (header + first chunk), for callers that
+    need the document but not the BIN data.
+    """
+    with open(path, "rb") as f:
+        header = f.read(20)
+        if len(header) < 20:
+            raise ValueError(f"{path} is not a glTF 2.0 binary")
+        magic, version, _, length, chunk_type = struct.unpack("<4sIII4s", header)
+        if magic != GLB_MAGIC or version != GLB_VERSION or chunk_type != CHUNK_JSON:
+            raise ValueError(f"{path} is not a glTF 2.0 binary")
+        return json.loads(f.read(length))
+
+
+class GLBWriter:
+    """
+    Builds a single-scene GLB. Buffer 0 is the BIN chunk.
+
+    self.gltf      — the glTF JSON document as plain dicts/lists
+    self.segments  — (memoryview, ref) pairs in BIN chunk order; on save,
+                     ref["byteOffset"] is set to the segment's offset in buffer 0.
+                     ref is normally the bufferView dict itself, but passes such
+                     as EXT_meshopt_compression point it at an extension dict.
+    """
+
+    def __init__(self):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "WorldofVibecraft tools"},
+            "buffers": [{"byteLength": 0}],
+        }
+        self.segments = []
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a GLB back into a writer so nodes/accessors can be added before it
+        is saved again. Buffer views in the BIN chunk (and extension blocks such
+        as EXT_meshopt_compression that point into it) become segments again,
+        in their original order; their data is not copied.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, _ = struct.unpack_from("<4sII", data, 0)
+        if magic != GLB_MAGIC or version != GLB_VERSION:
+            raise ValueError(f"{path} is not a glTF 2.0 binary")
+
+        writer = cls()
+        view = memoryview(data)
+        offset = 12
+        bin_chunk = view[0:0]
+        while offset + 8 <= len(data):
+            length, chunk_type = struct.unpack_from("<I4s", data, offset)
+            chunk = view[offset + 8:offset + 8 + length]
+            if chunk_type == CHUNK_JSON:
+                writer.gltf = json.loads(bytes(chunk))
+            elif chunk_type == CHUNK_BIN:
+                bin_chunk = chunk
+            offset += 8 + length
+        writer.gltf.setdefault("buffers", [{"byteLength": 0}])
+
+        refs = []
+        for buffer_view in writer.gltf.get("bufferViews", []):
+            for ref in [buffer_view] + list(buffer_view.get("extensions", {}).values()):
+                if ref.get("buffer", 0) == 0 and "byteLength" in ref:
+                    refs.append(ref)
+        refs.sort(key=lambda ref: ref.get("byteOffset", 0))
+        writer.segments = [
+            (bin_chunk[ref.get("byteOffset", 0):ref.get("byteOffset", 0) + ref["byteLength"]], ref)
+            for ref in refs
+        ]
+        return writer
+
+    def add(self, key, obj):
+        """Append obj to the top-level glTF array `key`, return its index."""
+        items = self.gltf.setdefault(key, [])
+        items.append(obj)
+        return len(items) - 1
+
+    def add_extension(self, name, required=False):
+        used = self.gltf.setdefault("extensionsUsed", [])
+        if name not in used:
+            used.append(name)
+        if required:
+            req = self.gltf.setdefault("extensionsRequired", [])
+            if name not in req:
+                req.append(name)
+
+    def add_buffer_view(self, data, target=None, byte_stride=None):
+        """Add a buffer view over data (bytes or numpy array, not copied), return its index."""
+        view_bytes = _as_bytes_view(data)
+        view = {"buffer": 0, "byteLength": len(view_bytes)}
+        if byte_stride is not None:
+            view["byteStride"] = byte_stride
+        if target is not None:
+            view["target"] = target
+        self.segments.append((view_bytes, view))
+        return self.add("bufferViews", view)
+
+    def add_accessor(self, buffer_view, component_type, count, type, min=None, max=None):
+        acc = {"bufferView": buffer_view, "componentType": component_type,
+               "count": count, "type": type}
+        if min is not None:
+            acc["min"] = min
+        if max is not None:
+            acc["max"] = max
+        return self.add("accessors", acc)
+
+    def read_accessor(self, index):
+        """
+        Read-only numpy view of an accessor's data. Only works while its buffer
+        view is still a plain segment (before EXT_meshopt_compression).
+        """
+        acc = self.gltf["accessors"][index]
+        view = self.gltf["bufferViews"][acc["bufferView"]]
+        data = next(data for data, ref in self.segments if ref is view)
+        width = ACCESSOR_WIDTHS[acc["type"]]
+        arr = np.frombuffer(data, dtype=COMPONENT_DTYPES[acc["componentType"]],
+                            count=acc["count"] * width, offset=acc.get("byteOffset", 0))
+        return arr.reshape(acc["count"], width) if width > 1 else arr
+
+    def add_image(self, data, mime_type="image/png"):
+        """Embed an encoded image in the BIN chunk, return the image index."""
+        bv = self.add_buffer_view(data)
+        return self.add("images", {"bufferView": bv, "mimeType": mime_type})
+
+    def add_image_uri(self, uri, mime_type="image/png"):
+        """Reference an external image file by URI, return the image index."""
+        return self.add("images", {"uri": uri, "mimeType": mime_type})
+
+    def add_texture(self, image, sampler=None, mime_type="image/png"):
+        """Add a texture for image, routing KTX2/WebP images through their extension.
+        No PNG fallback image is written, so those extensions are required."""
+        tex = {}
+        extension = TEXTURE_EXTENSIONS.get(mime_type)
+        if extension is not None:
+            tex["extensions"] = {extension: {"source": image}}
+            self.add_extension(extension, required=True)
+        else:
+            tex["source"] = image
+        if sampler is not None:
+            tex["sampler"] = sampler
+        return self.add("textures", tex)
+
+    def save(self, path):
+        """Write the GLB to path."""
+        # Lay out buffer 0 so byte offsets are known before the JSON is encoded
+        offset = 0
+        for view_bytes, ref in self.segments:
+            ref["byteOffset"] = offset
+            offset += (len(view_bytes) + 3) & ~3
+        self.gltf["buffers"][0]["byteLength"] = offset
+
+        gltf = self.gltf
+        if not self.segments and len(gltf["buffers"]) == 1:
+            # Nothing in the BIN chunk: a zero-length buffer is invalid glTF
+            gltf = {key: value for key, value in gltf.items() if key != "buffers"}
+        json_blob = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        json_blob += b" " * (-len(json_blob) % 4)
+
+        with open(path, "wb") as f:
+            f.write(struct.pack("<4sII", GLB_MAGIC, GLB_VERSION, 0))  # length patched below
+            f.write(struct.pack("<I4s", len(json_blob), CHUNK_JSON))
+            f.write(json_blob)
+
+            if self.segments:
+                bin_header_pos = f.tell()
+                f.write(struct.pack("<I4s", 0, CHUNK_BIN))
+                bin_length = 0
+                for view_bytes, _ in self.segments:
+                    f.write(view_bytes)
+                    pad = -len(view_bytes) % 4
+                    if pad:
+                        f.write(b"\x00" * pad)
+                    bin_length += len(view_bytes) + pad
+                f.seek(bin_header_pos)
+                f.write(struct.pack("<I", bin_length))
+                f.seek(0, 2)
+
+            total_length = f.tell()
+            f.seek(8)
+            f.write(struct.pack("<I", total_length))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Minimal KTX2 container writer for block-compressed (BCn / DXT) textures.
+
+Writes an uncompressed-supercompression KTX2 file with a basic data format
+descriptor and the given mip levels; no key/value data, no transcoding.
+Spec: https://registry.khronos.org/KTX/specs/2.0/ktxspec.v2.html
+
+Run directly to check the data format descriptors against the spec:
+    python ktx2.py
+"""
+
+import struct
+
+KTX2_IDENTIFIER = b"\xabKTX 20\xbb\r\n\x1a\n"
+
+# VkFormat values
+VK_FORMAT_BC1_RGB_UNORM_BLOCK = 131
+VK_FORMAT_BC1_RGB_SRGB_BLOCK = 132
+VK_FORMAT_BC1_RGBA_UNORM_BLOCK = 133
+VK_FORMAT_BC1_RGBA_SRGB_BLOCK = 134
+VK_FORMAT_BC2_UNORM_BLOCK = 135
+VK_FORMAT_BC2_SRGB_BLOCK = 136
+VK_FORMAT_BC3_UNORM_BLOCK = 137
+VK_FORMAT_BC3_SRGB_BLOCK = 138
+
+# Data format descriptor constants
+KHR_DF_MODEL_BC1A = 128
+KHR_DF_MODEL_BC2 = 129
+KHR_DF_MODEL_BC3 = 130
+KHR_DF_PRIMARIES_BT709 = 1
+KHR_DF_TRANSFER_LINEAR = 1
+KHR_DF_TRANSFER_SRGB = 2
+KHR_DF_CHANNEL_COLOR = 0
+KHR_DF_CHANNEL_ALPHA = 15
+# BC1A has its own channel ids: one sample covers the whole block either way
+KHR_DF_CHANNEL_BC1A_COLOR = 0
+KHR_DF_CHANNEL_BC1A_ALPHAPRESENT = 1
+
+# vkFormat → (color model, block bytes, [(bitOffset, channel), ...], srgb)
+BC_FORMATS = {
+    VK_FORMAT_BC1_RGB_UNORM_BLOCK: (KHR_DF_MODEL_BC1A, 8, [(0, KHR_DF_CHANNEL_BC1A_COLOR)], False),
+    VK_FORMAT_BC1_RGB_SRGB_BLOCK: (KHR_DF_MODEL_BC1A, 8, [(0, KHR_DF_CHANNEL_BC1A_COLOR)], True),
+    VK_FORMAT_BC1_RGBA_UNORM_BLOCK: (KHR_DF_MODEL_BC1A, 8,
+                                     [(0, KHR_DF_CHANNEL_BC1A_ALPHAPRESENT)], False),
+    VK_FORMAT_BC1_RGBA_SRGB_BLOCK: (KHR_DF_MODEL_BC1A, 8,
+                                    [(0, KHR_DF_CHANNEL_BC1A_ALPHAPRESENT)], True),
+    VK_FORMAT_BC2_UNORM_BLOCK: (KHR_DF_MODEL_BC2, 16,
+                                [(0, KHR_DF_CHANNEL_ALPHA), (64, KHR_DF_CHANNEL_COLOR)], False),
+    VK_FORMAT_BC2_SRGB_BLOCK: (KHR_DF_MODEL_BC2, 16,
+                               [(0, KHR_DF_CHANNEL_ALPHA), (64, KHR_DF_CHANNEL_COLOR)], True),
+    VK_FORMAT_BC3_UNORM_BLOCK: (KHR_DF_MODEL_BC3, 16,
+                                [(0, KHR_DF_CHANNEL_ALPHA), (64, KHR_DF_CHANNEL_COLOR)], False),
+    VK_FORMAT_BC3_SRGB_BLOCK: (KHR_DF_MODEL_BC3, 16,
+                               [(0, KHR_DF_CHANNEL_ALPHA), (64, KHR_DF_CHANNEL_COLOR)], True),
+}
+
+
+def _basic_dfd(vk_format):
+    """Basic data format descriptor block (with leading dfdTotalSize) for a BCn format."""
+    model, block_bytes, samples, srgb = BC_FORMATS[vk_format]
+    block_size = 24 + 16 * len(samples)
+    dfd = struct.pack(
+        "<IHHBBBB4B8B",
+        0,                      # vendorId (KHRONOS) | descriptorType (BASICFORMAT)
+        2,                      # versionNumber (KDF 1.3)
+        block_size,
+        model,
+        KHR_DF_PRIMARIES_BT709,
+        KHR_DF_TRANSFER_SRGB if srgb else KHR_DF_TRANSFER_LINEAR,
+        0,                      # flags: straight alpha
+        3, 3, 0, 0,             # texelBlockDimension - 1
+        block_bytes, 0, 0, 0, 0, 0, 0, 0,
+    )
+    for bit_offset, channel in samples:
+        dfd += struct.pack("<HBB4BII", bit_offset, 63, channel, 0, 0, 0, 0, 0, 0xFFFFFFFF)
+    return struct.pack("<I", 4 + len(dfd)) + dfd
+
+
+def write_ktx2(vk_format, width, height, levels):
+    """
+    Build a KTX2 file from already block-compressed mip levels (largest first).
+    Returns the file bytes.
+    """
+    _, block_bytes, _, _ = BC_FORMATS[vk_format]
+    level_count = len(levels)
+
+    header_size = 12 + 9 * 4 + 4 * 4 + 2 * 8
+    level_index_size = level_count * 24
+    dfd = _basic_dfd(vk_format)
+    dfd_offset = header_size + level_index_size
+
+    # Level data follows the DFD, smallest level first, each aligned to the block size
+    offset = dfd_offset + len(dfd)
+    level_offsets = [0] * level_count
+    for level in reversed(range(level_count)):
+        offset += -offset % block_bytes
+        level_offsets[level] = offset
+        offset += len(levels[level])
+
+    out = bytearray(KTX2_IDENTIFIER)
+    out += struct.pack("<9I", vk_format, 1, width, height, 0, 0, 1, level_count, 0)
+    out += struct.pack("<4I2Q", dfd_offset, len(dfd), 0, 0, 0, 0)
+    for level in range(level_count):
+        length = len(levels[level])
+        out += struct.pack("<3Q", level_offsets[level], length, length)
+    out += dfd
+    for level in reversed(range(level_count)):
+        out += b"\x00" * (level_offsets[level] - len(out))
+        out += levels[level]
+    return bytes(out)
+
+
+# ── Self-check ──
+
+# Expected basic DFD words after dfdTotalSize, per KDF 1.3 section 5
+_EXPECTED_BC1_DFD = {
+    VK_FORMAT_BC1_RGB_SRGB_BLOCK: "00000000020028008001020003030000080000000000000000003f000000000000000000ffffffff",
+    VK_FORMAT_BC1_RGBA_SRGB_BLOCK: "00000000020028008001020003030000080000000000000000003f010000000000000000ffffffff",
+    VK_FORMAT_BC1_RGBA_UNORM_BLOCK: "00000000020028008001010003030000080000000000000000003f010000000000000000ffffffff",
+}
+
+
+def check_dfd():
+    """Compare the BC1 descriptors byte-for-byte and every sample's channel with the spec."""
+    for vk_format, expected in _EXPECTED_BC1_DFD.items():
+        dfd = _basic_dfd(vk_format)
+        assert dfd[4:].hex() == expected, f"vkFormat {vk_format}: DFD {dfd[4:].hex()}"
+    for vk_format, (model, _, samples, _) in BC_FORMATS.items():
+        dfd = _basic_dfd(vk_format)
+        channels = [dfd[4 + 24 + 16 * i + 3] & 0x0F for i in range(len(samples))]
+        if model == KHR_DF_MODEL_BC1A:
+            has_alpha = vk_format in (VK_FORMAT_BC1_RGBA_UNORM_BLOCK, VK_FORMAT_BC1_RGBA_SRGB_BLOCK)
+            assert channels == [KHR_DF_CHANNEL_BC1A_ALPHAPRESENT if has_alpha else KHR_DF_CHANNEL_BC1A_COLOR], \
+                f"vkFormat {vk_format}: channels {channels}"
+        else:
+            assert channels == [KHR_DF_CHANNEL_ALPHA, KHR_DF_CHANNEL_COLOR], \
+                f"vkFormat {vk_format}: channels {channels}"
+    print(f"KTX2 DFDs OK ({len(BC_FORMATS)} formats)")
+
+
+if __name__ == "__main__":
+    check_dfd()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Quadric-error-metric mesh simplification for static model LODs.
+
+Garland & Heckbert edge collapses, restricted to half-edge collapses (a vertex
+is merged into one of its neighbours) so LOD levels only need a new index
+buffer and share the full-detail vertex buffers. Quadrics and initial edge
+costs are computed with NumPy; the collapse loop runs over a heap.
+
+Border vertices (on edges used by a single triangle) never move. Extracted
+meshes split vertices along UV seams and between materials, so this keeps
+seams, material boundaries and open borders intact.
+
+add_lod_levels() adds the LODs to a GLBWriter as MSFT_lod nodes outside the
+scene, so loaders without MSFT_lod support still draw only the full mesh.
+"""
+
+import argparse
+import heapq
+import math
+
+import numpy as np
+
+from glb_writer import ELEMENT_ARRAY_BUFFER, UNSIGNED_SHORT
+
+MSFT_LOD = "MSFT_lod"
+
+# MSFT_screencoverage thresholds for the base mesh and up to three LODs
+LOD_SCREEN_COVERAGE = (0.25, 0.1, 0.04, 0.015)
+MAX_LOD_LEVELS = len(LOD_SCREEN_COVERAGE) - 1
+
+
+class QuadricSimplifier:
+    """
+    positions: (V, 3) float array
+    indices:   flat or (T, 3) triangle list indices into positions
+
+    simplify() can be called with decreasing targets to produce successive LODs
+    from one simplification run.
+    """
+
+    def __init__(self, positions, indices):
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.tris = np.array(indices, dtype=np.int64).reshape(-1, 3)
+        self.alive = np.ones(len(self.tris), dtype=bool)
+        self.triangle_count = len(self.tris)
+        self.max_cost = 0.0
+
+        vertex_count = len(self.positions)
+        self.quadrics = self._vertex_quadrics(vertex_count)
+        self.locked = self._border_vertices(vertex_count)
+        self.version = np.zeros(vertex_count, dtype=np.int64)
+
+        self.vertex_faces = [set() for _ in range(vertex_count)]
+        for face, tri in enumerate(self.tris.tolist()):
+            for vertex in tri:
+                self.vertex_faces[vertex].add(face)
+
+        # Initial edge costs, vectorized
+        edges = np.unique(np.sort(self.tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1), axis=0)
+        edges = np.concatenate([edges, edges[:, ::-1]])
+        edges = edges[~self.locked[edges[:, 0]]]
+        costs = self._collapse_costs(edges[:, 0], edges[:, 1])
+        self.heap = [(cost, u, v, 0, 0) for cost, (u, v) in zip(costs.tolist(), edges.tolist())]
+        heapq.heapify(self.heap)
+
+    def _vertex_quadrics(self, vertex_count):
+        """(V, 4, 4) sum of the plane quadrics of each vertex's triangles."""
+        p0, p1, p2 = (self.positions[self.tris[:, k]] for k in range(3))
+        normals = np.cross(p1 - p0, p2 - p0)
+        lengths = np.linalg.norm(normals, axis=1)
+        valid = lengths > 0
+        normals[valid] /= lengths[valid, None]
+        normals[~valid] = 0
+        planes = np.column_stack([normals, -(normals * p0).sum(axis=1)])
+        face_quadrics = planes[:, :, None] * planes[:, None, :]
+
+        quadrics = np.zeros((vertex_count, 4, 4))
+        for k in range(3):
+            np.add.at(quadrics, self.tris[:, k], face_quadrics)
+        return quadrics
+
+    def _border_vertices(self, vertex_count):
+        """Vertices on an edge that does not have exactly two triangles."""
+        edges = np.sort(self.tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+        unique, counts = np.unique(edges, axis=0, return_counts=True)
+        locked = np.zeros(vertex_count, dtype=bool)
+        locked[unique[counts != 2].ravel()] = True
+        return locked
+
+    def _collapse_costs(self, sources, targets):
+        """Quadric error of moving each source vertex onto its target."""
+        q = self.quadrics[sources] + self.quadrics[targets]
+        p = np.column_stack([self.positions[targets], np.ones(len(targets))])
+        return np.maximum(np.einsum("ni,nij,nj->n", p, q, p), 0.0)
+
+    def _face_normal(self, tri):
+        p0, p1, p2 = self.positions[tri]
+        return np.cross(p1 - p0, p2 - p0)
+
+    def _can_collapse(self, u, v):
+        """Half-edge collapse u → v keeps the mesh manifold and flips no triangle."""
+        shared = self.vertex_faces[u] & self.vertex_faces[v]
+        if not shared:
+            return False
+        neighbours_u = {w for f in self.vertex_faces[u] for w in self.tris[f]}
+        neighbours_v = {w for f in self.vertex_faces[v] for w in self.tris[f]}
+        if len(neighbours_u & neighbours_v) - 2 != len(shared):
+            return False
+        for face in self.vertex_faces[u] - shared:
+            tri = self.tris[face]
+            moved = np.where(tri == u, v, tri)
+            if np.dot(self._face_normal(tri), self._face_normal(moved)) <= 0:
+                return False
+        return True
+
+    def _collapse(self, u, v):
+        for face in self.vertex_faces[u]:
+            if v in self.tris[face]:
+                self.alive[face] = False
+                self.triangle_count -= 1
+                for w in self.tris[face]:
+                    if w != u:
+                        self.vertex_faces[w].discard(face)
+            else:
+                self.tris[face][self.tris[face] == u] = v
+                self.vertex_faces[v].add(face)
+        self.vertex_faces[u] = set()
+        self.quadrics[v] += self.quadrics[u]
+        self.version[u] += 1
+        self.version[v] += 1
+
+        # Every edge touching v changed cost
+        neighbours = sorted({w for f in self.vertex_faces[v] for w in self.tris[f]} - {v})
+        if not neighbours:
+            return
+        others = np.array(neighbours, dtype=np.int64)
+        sources = np.concatenate([others, np.full(len(others), v)])
+        targets = np.concatenate([np.full(len(others), v), others])
+        movable = ~self.locked[sources]
+        sources, targets = sources[movable], targets[movable]
+        for cost, s, t in zip(self._collapse_costs(sources, targets).tolist(),
+                              sources.tolist(), targets.tolist()):
+            heapq.heappush(self.heap, (cost, s, t, int(self.version[s]), int(self.version[t])))
+
+    def simplify(self, target_triangles, max_error=None):
+        """
+        Collapse edges until at most target_triangles remain (or no collapse
+        below max_error is left). Returns (flat index array, error), where error
+        is the square root of the largest quadric error accepted so far, in the
+        units of positions.
+        """
+        max_cost = math.inf if max_error is None else max_error * max_error
+        deferred = []
+        while self.triangle_count > target_triangles and self.heap:
+            cost, u, v, version_u, version_v = heapq.heappop(self.heap)
+            if version_u != self.version[u] or version_v != self.version[v]:
+                continue
+            if cost > max_cost:
+                heapq.heappush(self.heap, (cost, u, v, version_u, version_v))
+                break
+            if not self._can_collapse(u, v):
+                # Topology around u or v may still change, retry at the next simplify()
+                deferred.append((cost, u, v, version_u, version_v))
+                continue
+            self._collapse(u, v)
+            self.max_cost = max(self.max_cost, cost)
+        for entry in deferred:
+            heapq.heappush(self.heap, entry)
+        return self.tris[self.alive].ravel(), math.sqrt(self.max_cost)
+
+
+# ── glTF LOD levels ──────────────────────────────────────────────────────────
+
+def parse_lod_ratios(text):
+    """argparse type for --lods: comma-separated triangle ratios, e.g. '0.5,0.25'."""
+    try:
+        ratios = [float(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid LOD ratios: {text!r}")
+    if len(ratios) > MAX_LOD_LEVELS or any(not 0 < r < 1 for r in ratios):
+        raise argparse.ArgumentTypeError(
+            f"expected up to {MAX_LOD_LEVELS} ratios between 0 and 1, got {text!r}")
+    return tuple(sorted(ratios, reverse=True))
+
+
+def add_lod_args(parser):
+    """Add the LOD generation option to an argparse parser."""
+    parser.add_argument("--lods", type=parse_lod_ratios, default=(),
+                        help="Comma-separated triangle ratios of extra LOD levels, "
+                             "e.g. 0.5,0.25 (quadric simplification, MSFT_lod)")
+
+
+def add_lod_levels(writer, ratios):
+    """
+    Simplify every scene mesh of an uncompressed GLBWriter to each triangle
+    ratio and attach the results as MSFT_lod levels. Levels that remove no
+    further triangles are dropped, as are a node's levels once all of its
+    triangles are simplified away. The summary [{"ratio", "triangles", "error"}]
+    (base mesh first) is returned and stored under the root "extras" → "lods".
+    """
+    gltf = writer.gltf
+    scene = gltf["scenes"][gltf.get("scene", 0)]
+    mesh_nodes = [gltf["nodes"][n] for n in scene["nodes"] if "mesh" in gltf["nodes"][n]]
+
+    # One simplifier per primitive, carried from one level to the next
+    meshes = []
+    base_triangles = 0
+    for node in mesh_nodes:
+        prims = []
+        for prim in gltf["meshes"][node["mesh"]]["primitives"]:
+            indices = writer.read_accessor(prim["indices"])
+            positions = writer.read_accessor(prim["attributes"]["POSITION"])
+            prims.append((prim, QuadricSimplifier(positions, indices)))
+            base_triangles += len(indices) // 3
+        meshes.append((node, prims))
+
+    summary = [{"ratio": 1.0, "triangles": base_triangles, "error": 0.0}]
+    lod_nodes = {id(node): [] for node, _ in meshes}
+    for ratio in ratios:
+        level_meshes = []
+        triangles = 0
+        error = 0.0
+        for node, prims in meshes:
+            level_prims = []
+            for prim, simplifier in prims:
+                target = int(simplifier.tris.shape[0] * ratio)
+                indices, prim_error = simplifier.simplify(target)
+                error = max(error, prim_error)
+                if len(indices) == 0:
+                    continue
+                triangles += len(indices) // 3
+                level_prims.append((prim, indices))
+            level_meshes.append((node, level_prims))
+        if triangles >= summary[-1]["triangles"]:
+            continue
+
+        for node, level_prims in level_meshes:
+            if not level_prims:
+                # Simplified away entirely: an empty mesh is invalid glTF, so this
+                # node's LOD chain stops at its previous level
+                continue
+            primitives = []
+            for prim, indices in level_prims:
+                component_type = gltf["accessors"][prim["indices"]]["componentType"]
+                idx_arr = indices.astype(np.uint16 if component_type == UNSIGNED_SHORT else np.uint32)
+                idx_acc = writer.add_accessor(
+                    writer.add_buffer_view(idx_arr, target=ELEMENT_ARRAY_BUFFER), component_type,
+                    len(idx_arr), "SCALAR", max=[int(idx_arr.max())], min=[int(idx_arr.min())])
+                primitives.append(dict(prim, indices=idx_acc))
+            mesh_idx = writer.add("meshes", {"primitives": primitives})
+            lod_nodes[id(node)].append(writer.add("nodes", {"mesh": mesh_idx}))
+        summary.append({"ratio": ratio, "triangles": triangles, "error": round(error, 4)})
+
+    if len(summary) > 1:
+        for node, _ in meshes:
+            ids = lod_nodes[id(node)]
+            if not ids:
+                continue
+            node.setdefault("extensions", {})[MSFT_LOD] = {"ids": ids}
+            node.setdefault("extras", {})["MSFT_screencoverage"] = list(
+                LOD_SCREEN_COVERAGE[:len(ids) + 1])
+        writer.add_extension(MSFT_LOD)
+    gltf.setdefault("extras", {})["lods"] = summary
+    return summary
+
+
+def lod_summary(gltf):
+    """LOD summary stored by add_lod_levels(), or None if the GLB has none.
+    gltf: the glTF JSON document (GLBWriter.gltf or read_glb_json())."""
+    return gltf.get("extras", {}).get("lods")
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+NumPy implementation of the meshoptimizer vertex and index codecs.
+
+Produces bitstreams decodable by three.js MeshoptDecoder / EXT_meshopt_compression:
+  - vertex codec version 0 (mode "ATTRIBUTES")
+  - index codec version 1 (mode "TRIANGLES")
+
+Format reference: meshoptimizer src/vertexcodec.cpp and src/indexcodec.cpp.
+"""
+
+import numpy as np
+
+from glb_writer import ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, UNSIGNED_SHORT, UNSIGNED_INT
+
+EXT_MESHOPT = "EXT_meshopt_compression"
+
+# ── Vertex codec ─────────────────────────────────────────────────────────────
+
+VERTEX_HEADER = 0xA0         # kVertexHeader | version 0
+VERTEX_BLOCK_SIZE_BYTES = 8192
+VERTEX_BLOCK_MAX_SIZE = 256
+BYTE_GROUP_SIZE = 16
+TAIL_MIN_SIZE = 32
+
+# Bit widths selectable per byte group (header value = index into this table)
+GROUP_BITS = (0, 2, 4, 8)
+
+
+def vertex_block_size(vertex_size):
+    """Vertices per block; part of the format, must match the decoder."""
+    result = (VERTEX_BLOCK_SIZE_BYTES // vertex_size) & ~(BYTE_GROUP_SIZE - 1)
+    return min(result, VERTEX_BLOCK_MAX_SIZE)
+
+
+def _pack_groups(values, bits):
+    """Pack (..., 16) uint8 values into (..., 16 * bits / 8) bytes, first value in high bits."""
+    per_byte = 8 // bits
+    sentinel = (1 << bits) - 1
+    enc = np.minimum(values, sentinel).astype(np.uint16)
+    enc = enc.reshape(values.shape[:-1] + (BYTE_GROUP_SIZE // per_byte, per_byte))
+    shifts = np.arange(per_byte - 1, -1, -1, dtype=np.uint16) * bits
+    return (enc << shifts).sum(axis=-1).astype(np.uint8)
+
+
+def _encode_byte_groups(groups):
+    """Encode (n_groups, 16) zigzagged bytes. Returns (bitk per group, list of group bytes)."""
+    n = len(groups)
+    sizes = np.empty((n, 4), dtype=np.int64)
+    sizes[:, 0] = np.where(groups.any(axis=1), 1 << 30, 0)
+    sizes[:, 1] = 4 + (groups >= 3).sum(axis=1)
+    sizes[:, 2] = 8 + (groups >= 15).sum(axis=1)
+    sizes[:, 3] = BYTE_GROUP_SIZE
+    bitk = sizes.argmin(axis=1)
+
+    packed2 = _pack_groups(groups, 2)
+    packed4 = _pack_groups(groups, 4)
+
+    out = []
+    for g in range(n):
+        k = bitk[g]
+        if k == 0:
+            continue
+        values = groups[g]
+        if k == 3:
+            out.append(values.tobytes())
+            continue
+        bits = GROUP_BITS[k]
+        fixed = packed2[g] if bits == 2 else packed4[g]
+        escapes = values[values >= (1 << bits) - 1]
+        out.append(fixed.tobytes() + escapes.tobytes())
+    return bitk, out
+
+
+def encode_vertex_buffer(data, vertex_size):
+    """Encode a vertex stream (bytes-like or array) with interleaved vertex_size-byte elements.
+
+    vertex_size must be a multiple of 4 and at most 256 (EXT_meshopt_compression
+    ATTRIBUTES mode requirement). Returns the encoded bytes.
+    """
+    assert vertex_size % 4 == 0 and 0 < vertex_size <= 256
+    raw = np.frombuffer(memoryview(data).cast("B"), dtype=np.uint8)
+    assert len(raw) % vertex_size == 0
+    vertex_count = len(raw) // vertex_size
+    verts = raw.reshape(vertex_count, vertex_size)
+
+    out = bytearray([VERTEX_HEADER])
+
+    if vertex_count > 0:
+        # Byte-wise deltas against the previous vertex; the first vertex is
+        # predicted from itself (it's also stored in the tail), so its delta is 0.
+        deltas = np.zeros_like(verts)
+        deltas[1:] = verts[1:] - verts[:-1]
+        zigzag = (deltas << 1) ^ (0 - (deltas >> 7)).astype(np.uint8)
+
+        # Pad to a whole number of byte groups; padding encodes as zeros
+        padded_count = (vertex_count + BYTE_GROUP_SIZE - 1) & ~(BYTE_GROUP_SIZE - 1)
+        columns = np.zeros((vertex_size, padded_count), dtype=np.uint8)
+        columns[:, :vertex_count] = zigzag.T
+
+        block_size = vertex_block_size(vertex_size)
+        for block_start in range(0, vertex_count, block_size):
+            block_len = min(block_size, vertex_count - block_start)
+            aligned = (block_len + BYTE_GROUP_SIZE - 1) & ~(BYTE_GROUP_SIZE - 1)
+            n_groups = aligned // BYTE_GROUP_SIZE
+
+            for k in range(vertex_size):
+                groups = columns[k, block_start:block_start + aligned].reshape(n_groups, BYTE_GROUP_SIZE)
+                bitk, group_bytes = _encode_byte_groups(groups)
+
+                # 2 bits of header per group, 4 groups per header byte
+                header = np.zeros(((n_groups + 3) // 4) * 4, dtype=np.uint8)
+                header[:n_groups] = bitk
+                header = header.reshape(-1, 4) << np.array([0, 2, 4, 6], dtype=np.uint8)
+                out += np.bitwise_or.reduce(header, axis=1).astype(np.uint8).tobytes()
+                for chunk in group_bytes:
+                    out += chunk
+
+    # Tail: first vertex, padded to 32 bytes so the decoder can skip bounds checks
+    first_vertex = verts[0].tobytes() if vertex_count > 0 else bytes(vertex_size)
+    if vertex_size < TAIL_MIN_SIZE:
+        out += bytes(TAIL_MIN_SIZE - vertex_size)
+    out += first_vertex
+    return bytes(out)
+
+
+# ── Index codec ──────────────────────────────────────────────────────────────
+
+INDEX_HEADER = 0xE1          # kIndexHeader | version 1
+
+TRIANGLE_INDEX_ORDER = ((0, 1, 2), (1, 2, 0), (2, 0, 1))
+
+# Static codeaux table from meshoptimizer (derived from symbol frequencies)
+CODE_AUX_TABLE = bytes([
+    0x00, 0x76, 0x87, 0x56, 0x67, 0x78, 0xA9, 0x86,
+    0x65, 0x89, 0x68, 0x98, 0x01, 0x69, 0x00, 0x00,
+])
+
+
+def _encode_vbyte(out, v):
+    while True:
+        if v > 127:
+            out.append((v & 127) | 128)
+            v >>= 7
+        else:
+            out.append(v)
+            return
+
+
+def _encode_index(out, index, last):
+    d = (index - last) & 0xFFFFFFFF
+    _encode_vbyte(out, ((d << 1) & 0xFFFFFFFF) ^ (0xFFFFFFFF if d & 0x80000000 else 0))
+
+
+def encode_index_buffer(indices):
+    """Encode a triangle list (any integer array, length divisible by 3). Returns bytes."""
+    tris = np.asarray(indices, dtype=np.int64).reshape(-1, 3).tolist()
+
+    codes = bytearray()
+    data = bytearray()
+
+    edge_fifo = [(-1, -1)] * 16
+    vertex_fifo = [-1] * 16
+    edge_ofs = 0
+    vertex_ofs = 0
+    next_index = 0
+    last = 0
+    fecmax = 13
+
+    def get_vertex_fifo(v):
+        for i in range(16):
+            if vertex_fifo[(vertex_ofs - 1 - i) & 15] == v:
+                return i
+        return -1
+
+    for tri in tris:
+        # Look for an edge of this triangle among recently emitted edges
+        fer = -1
+        t0, t1, t2 = tri
+        for i in range(15):
+            e0, e1 = edge_fifo[(edge_ofs - 1 - i) & 15]
+            if e0 == t0 and e1 == t1:
+                fer = (i << 2)
+            elif e0 == t1 and e1 == t2:
+                fer = (i << 2) | 1
+            elif e0 == t2 and e1 == t0:
+                fer = (i << 2) | 2
+            else:
+                continue
+            break
+
+        if fer >= 0:
+            order = TRIANGLE_INDEX_ORDER[fer & 3]
+            a, b, c = tri[order[0]], tri[order[1]], tri[order[2]]
+            fe = fer >> 2
+            fc = get_vertex_fifo(c)
+
+            if 1 <= fc < fecmax:
+                fec = fc
+            elif c == next_index:
+                fec = 0
+                next_index += 1
+            else:
+                fec = 15
+                # last-1 / last+1 shortcuts for strip-like sequences
+                if c + 1 == last:
+                    fec, last = 13, c
+                elif c == last + 1:
+                    fec, last = 14, c
+
+            codes.append((fe << 4) | fec)
+            if fec == 15:
+                _encode_index(data, c, last)
+                last = c
+
+            if fec == 0 or fec >= fecmax:
+                vertex_fifo[vertex_ofs] = c
+                vertex_ofs = (vertex_ofs + 1) & 15
+
+            edge_fifo[edge_ofs] = (c, b)
+            edge_ofs = (edge_ofs + 1) & 15
+            edge_fifo[edge_ofs] = (a, c)
+            edge_ofs = (edge_ofs + 1) & 15
+        else:
+            rotation = 1 if t1 == next_index else 2 if t2 == next_index else 0
+            order = TRIANGLE_INDEX_ORDER[rotation]
+            a, b, c = tri[order[0]], tri[order[1]], tri[order[2]]
+
+            reset = False
+            if a == 0 and b == 1 and c == 2 and next_index > 0:
+                reset = True
+                next_index = 0
+                vertex_fifo = [-1] * 16
+
+            fb = get_vertex_fifo(b)
+            fc = get_vertex_fifo(c)
+
+            if a == next_index:
+                fea = 0
+                next_index += 1
+            else:
+                fea = 15
+
+            if 0 <= fb < 14:
+                feb = fb + 1
+            elif b == next_index:
+                feb = 0
+                next_index += 1
+            else:
+                feb = 15
+
+            if 0 <= fc < 14:
+                fec = fc + 1
+            elif c == next_index:
+                fec = 0
+                next_index += 1
+            else:
+                fec = 15
+
+            codeaux = (feb << 4) | fec
+            aux_index = CODE_AUX_TABLE.find(bytes([codeaux]), 0, 14)
+
+            if fea == 0 and aux_index >= 0 and not reset:
+                codes.append(0xF0 | aux_index)
+            else:
+                codes.append(0xF0 | 14 | (1 if fea == 15 else 0))
+                data.append(codeaux)
+
+            if fea == 15:
+                _encode_index(data, a, last)
+                last = a
+            if feb == 15:
+                _encode_index(data, b, last)
+                last = b
+            if fec == 15:
+                _encode_index(data, c, last)
+                last = c
+
+            for v, fe_v in ((a, fea), (b, feb), (c, fec)):
+                if fe_v == 0 or fe_v == 15:
+                    vertex_fifo[vertex_ofs] = v
+                    vertex_ofs = (vertex_ofs + 1) & 15
+
+            edge_fifo[edge_ofs] = (b, a)
+            edge_ofs = (edge_ofs + 1) & 15
+            edge_fifo[edge_ofs] = (c, b)
+            edge_ofs = (edge_ofs + 1) & 15
+            edge_fifo[edge_ofs] = (a, c)
+            edge_ofs = (edge_ofs + 1) & 15
+
+    # The codeaux table doubles as padding so the decoder can over-read per triangle
+    return bytes([INDEX_HEADER]) + bytes(codes) + bytes(data) + CODE_AUX_TABLE
+
+
+# ── glTF integration ─────────────────────────────────────────────────────────
+
+def apply_meshopt_compression(writer):
+    """Rewrite a GLBWriter so vertex and index buffer views use EXT_meshopt_compression.
+
+    Vertex views (target ARRAY_BUFFER with byteStride) are encoded as ATTRIBUTES,
+    index views (target ELEMENT_ARRAY_BUFFER) as TRIANGLES. Everything else
+    (images, animation data) is kept in the GLB blob unchanged. The original
+    layout moves to a data-less fallback buffer, so the extension is required.
+    """
+    views = writer.gltf.get("bufferViews", [])
+
+    # Index views can only use TRIANGLES mode if every accessor using them is a triangle list
+    index_views = {}
+    for acc in writer.gltf.get("accessors", []):
+        if views[acc["bufferView"]].get("target") == ELEMENT_ARRAY_BUFFER:
+            index_views[id(views[acc["bufferView"]])] = acc
+
+    segments = []
+    fallback_size = 0
+
+    for data, view in writer.segments:
+        target = view.get("target")
+        stride = view.get("byteStride")
+
+        encoded = None
+        if target == ARRAY_BUFFER and stride and stride % 4 == 0:
+            count = len(data) // stride
+            encoded = encode_vertex_buffer(data, stride)
+            mode = "ATTRIBUTES"
+        elif target == ELEMENT_ARRAY_BUFFER and id(view) in index_views:
+            acc = index_views[id(view)]
+            stride = 2 if acc["componentType"] == UNSIGNED_SHORT else 4
+            count = len(data) // stride
+            if count % 3 == 0 and acc["componentType"] in (UNSIGNED_SHORT, UNSIGNED_INT):
+                idx = np.frombuffer(data, dtype=np.uint16 if stride == 2 else np.uint32)
+                encoded = encode_index_buffer(idx)
+                mode = "TRIANGLES"
+
+        if encoded is None:
+            segments.append((data, view))
+            continue
+
+        # byteOffset of the compressed data is filled in by GLBWriter.save()
+        ext = {
+            "buffer": 0,
+            "byteLength": len(encoded),
+            "byteStride": stride,
+            "count": count,
+            "mode": mode,
+        }
+        segments.append((memoryview(encoded), ext))
+
+        view["buffer"] = 1
+        view["byteOffset"] = fallback_size
+        view["extensions"] = {EXT_MESHOPT: ext}
+        fallback_size += (len(data) + 3) & ~3
+
+    if fallback_size == 0:
+        return writer
+
+    writer.segments = segments
+    writer.gltf["buffers"].append({"byteLength": fallback_size,
+                                   "extensions": {EXT_MESHOPT: {"fallback": True}}})
+    writer.add_extension(EXT_MESHOPT, required=True)
+    return writer
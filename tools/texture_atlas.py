@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Texture atlas packing for static models.
+
+Packs several decoded RGBA textures into one image so primitives that only
+differed by texture can share a material (and a draw call). Only textures
+whose UVs stay inside 0..1 can be atlased, since a tile can't repeat.
+
+Each tile is surrounded by an edge-replicated gutter so bilinear filtering and
+the first few mip levels don't bleed neighbouring tiles into each other.
+"""
+
+import numpy as np
+
+ATLAS_PADDING = 4        # gutter pixels around each tile
+MAX_ATLAS_SIZE = 2048    # give up rather than produce a larger atlas
+UV_EPSILON = 1e-3        # UVs this far outside 0..1 still count as unwrapped
+
+
+def uvs_in_unit_range(uvs):
+    """True if every UV in the (N, 2) array lies within 0..1 (give or take UV_EPSILON)."""
+    uvs = np.asarray(uvs, dtype=np.float32)
+    return bool(len(uvs) == 0 or (uvs.min() >= -UV_EPSILON and uvs.max() <= 1 + UV_EPSILON))
+
+
+def _shelf_layout(order, sizes, width):
+    """Place (w, h) sizes left to right in rows of the given width. Returns (positions, height)."""
+    positions = {}
+    x = y = shelf_height = 0
+    for key in order:
+        w, h = sizes[key]
+        if x + w > width:
+            y += shelf_height
+            x = shelf_height = 0
+        positions[key] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def pack_atlas(images, padding=ATLAS_PADDING, max_size=MAX_ATLAS_SIZE):
+    """
+    Shelf-pack RGBA images (dict key → (H, W, 4) uint8 array) into one atlas.
+    Returns (atlas array, {key: (offset_u, offset_v, scale_u, scale_v)}) where
+    an image's UV (u, v) maps to (offset_u + u * scale_u, offset_v + v * scale_v),
+    or None if the atlas would exceed max_size.
+    """
+    # Tallest first keeps shelves tight
+    order = sorted(images, key=lambda k: (-images[k].shape[0], -images[k].shape[1], k))
+    sizes = {k: (images[k].shape[1] + 2 * padding, images[k].shape[0] + 2 * padding) for k in order}
+
+    # Try every first-row length as the atlas width and keep the smallest area
+    candidates = set()
+    row_width = 0
+    for key in order:
+        row_width += sizes[key][0]
+        candidates.add(max(row_width, max(w for w, _ in sizes.values())))
+    best = None
+    for width in sorted(candidates):
+        if width > max_size:
+            break
+        positions, height = _shelf_layout(order, sizes, width)
+        # Keep dimensions block-aligned for GPU compressors
+        width, height = width + -width % 4, height + -height % 4
+        if height > max_size:
+            continue
+        score = (width * height, max(width, height))
+        if best is None or score < best[0]:
+            best = (score, width, height, positions)
+    if best is None:
+        return None
+    _, width, height, positions = best
+
+    atlas = np.zeros((height, width, 4), dtype=np.uint8)
+    transforms = {}
+    for key, (x, y) in positions.items():
+        image = images[key]
+        h, w = image.shape[:2]
+        atlas[y:y + h + 2 * padding, x:x + w + 2 * padding] = np.pad(
+            image, ((padding, padding), (padding, padding), (0, 0)), mode="edge")
+        transforms[key] = ((x + padding) / width, (y + padding) / height, w / width, h / height)
+    return atlas, transforms
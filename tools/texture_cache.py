@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache of converted BLP textures, shared by all extractors.
+
+Entries are keyed by SHA-256 over the BLP bytes plus the conversion settings
+(output codec, quality, mip budget, ...), so a --force rebuild or a second
+extractor only decodes and encodes textures whose source or settings changed.
+
+Layout: <cache dir>/<key[:2]>/<key>.<ext> holds the converted image and
+<key>.json its metadata (mimeType plus whatever the caller stored). The
+metadata file is written last, so a half-written entry is never returned.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from texture_store import MIME_EXTENSIONS
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_TEXTURE_CACHE_DIR = SCRIPT_DIR / ".texture_cache"
+
+# Bump when decoding/encoding changes in a way that alters cached output
+CACHE_VERSION = 2
+
+
+def add_texture_cache_args(parser):
+    """Add the texture cache options to an argparse parser."""
+    parser.add_argument("--texture-cache", default=str(DEFAULT_TEXTURE_CACHE_DIR),
+                        help="Directory of the persistent converted-texture cache")
+    parser.add_argument("--no-texture-cache", action="store_true",
+                        help="Convert every texture without reading or writing the cache")
+
+
+def texture_cache_from_args(args):
+    """TextureCache for parsed add_texture_cache_args options, or None if disabled."""
+    if args.no_texture_cache:
+        return None
+    return TextureCache(args.texture_cache)
+
+
+class TextureCache:
+    """
+    cache_dir: directory holding the cache entries (created on first write)
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, blp_data, settings):
+        """Cache key for converting blp_data with a JSON-serializable settings dict."""
+        digest = hashlib.sha256(blp_data)
+        digest.update(json.dumps([CACHE_VERSION, settings], sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key):
+        """Return (image bytes, metadata dict) for key, or None on a miss."""
+        entry = self._entry_path(key)
+        try:
+            meta = json.loads(entry.with_suffix(".json").read_text())
+            data = entry.with_suffix("." + MIME_EXTENSIONS[meta["mimeType"]]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data, meta
+
+    def put(self, key, data, meta):
+        """Store converted image bytes under key. meta must include "mimeType"."""
+        entry = self._entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        data_path = entry.with_suffix("." + MIME_EXTENSIONS[meta["mimeType"]])
+        meta_path = entry.with_suffix(".json")
+
+        # Write to temporary names and rename, so concurrent extractors never
+        # read a partial file
+        tmp_suffix = f".{os.getpid()}.tmp"
+        tmp_data = data_path.with_name(data_path.name + tmp_suffix)
+        tmp_data.write_bytes(data)
+        os.replace(tmp_data, data_path)
+        tmp_meta = meta_path.with_name(meta_path.name + tmp_suffix)
+        tmp_meta.write_text(json.dumps(meta))
+        os.replace(tmp_meta, meta_path)
+
+    def summary(self):
+        """One-line hit/miss summary for extractor output."""
+        return f"{self.hits} cached, {self.misses} converted ({self.cache_dir})"
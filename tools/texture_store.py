@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Content-addressed texture store shared by doodad and WMO GLBs.
+
+Instead of embedding a PNG into every GLB that uses it, each texture is written
+once as <textures dir>/<hash>.<ext> and GLBs reference it by relative URI. The
+index (hash → file info) is saved under "textures" in doodad_manifest.json so
+repeated runs and both extractors share one store.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+HASH_LENGTH = 16  # hex digits of SHA-256 kept in the filename
+
+MIME_EXTENSIONS = {
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/ktx2": "ktx2",
+}
+
+
+class TextureStore:
+    """
+    texture_dir:  directory the texture files are written to
+    glb_dir:      directory the referencing GLBs live in (for image URIs)
+    manifest_dir: directory of doodad_manifest.json (for index "file" paths)
+    index:        existing manifest "textures" dict to extend, if any
+    """
+
+    def __init__(self, texture_dir, glb_dir, manifest_dir, index=None):
+        self.texture_dir = Path(texture_dir)
+        self.texture_dir.mkdir(parents=True, exist_ok=True)
+        self.uri_prefix = Path(os.path.relpath(self.texture_dir, glb_dir)).as_posix() + "/"
+        self.file_prefix = Path(os.path.relpath(self.texture_dir, manifest_dir)).as_posix() + "/"
+        self.index = dict(index or {})
+        self.written = 0
+        self.reused = 0
+
+    def add(self, data, mime_type="image/png"):
+        """Store encoded image bytes (once), return the URI to use from a GLB."""
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        filename = f"{digest}.{MIME_EXTENSIONS[mime_type]}"
+        path = self.texture_dir / filename
+
+        if path.exists():
+            self.reused += 1
+        else:
+            # Write to a temporary name and rename, so parallel extraction workers
+            # and interrupted runs never leave a partial texture behind
+            tmp_path = path.with_name(f"{filename}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self.written += 1
+
+        if digest not in self.index:
+            self.index[digest] = {
+                "file": self.file_prefix + filename,
+                "mimeType": mime_type,
+                "bytes": len(data),
+            }
+        return self.uri_prefix + filename